@@ -1,54 +1,127 @@
-import os
-from typing import Dict, List, Optional, Any
+import sys
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, List, Optional, Any, Mapping, Tuple
+from pydantic import computed_field
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from app.models.role import Role, ToneProfile
 
 class Settings(BaseSettings):
     """
     Application settings loaded from environment variables
+    
+    Fields are populated by pydantic-settings from the environment (and .env)
+    once, when ``Settings()`` is instantiated.
     """
     # LLM provider settings
-    default_provider: str = os.getenv("DEFAULT_PROVIDER", "openai")
+    default_provider: str = "openai"
     
     # OpenAI settings
-    openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
-    openai_model: str = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-    openai_vision_model: str = os.getenv("OPENAI_VISION_MODEL", "gpt-4o")
+    openai_api_key: str = ""
+    openai_model: str = "gpt-4o-mini"
+    openai_vision_model: str = "gpt-4o"
     
     # Anthropic settings
-    anthropic_api_key: str = os.getenv("ANTHROPIC_API_KEY", "")
-    anthropic_model: str = os.getenv("ANTHROPIC_MODEL", "claude-3-haiku-20240307")
-    anthropic_vision_model: str = os.getenv("ANTHROPIC_VISION_MODEL", "claude-3-opus-20240229")
+    anthropic_api_key: str = ""
+    anthropic_model: str = "claude-3-haiku-20240307"
+    anthropic_vision_model: str = "claude-3-opus-20240229"
     
     # Google Gemini settings
-    gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
-    gemini_model: str = os.getenv("GEMINI_MODEL", "gemini-1.5-pro")
-    gemini_vision_model: str = os.getenv("GEMINI_VISION_MODEL", "gemini-1.5-pro-vision")
+    gemini_api_key: str = ""
+    gemini_model: str = "gemini-1.5-pro"
+    gemini_vision_model: str = "gemini-1.5-pro-vision"
     
     # Server settings
     app_name: str = "Small Business Executive Advisors"
     app_version: str = "1.0.0"
     api_prefix: str = "/api/v1"
-    debug: bool = os.getenv("DEBUG", "False").lower() == "true"
-    port: int = int(os.getenv("PORT", "8000"))
+    debug: bool = False
+    port: int = 8000
+    
+    # CORS settings (CORS_ORIGINS is a JSON list in the environment)
+    cors_origins: List[str] = ["http://localhost:5173"]
+    cors_max_age: int = 86400  # Browsers cache preflight responses for a day
+    
+    # Response compression settings
+    gzip_minimum_size: int = 1024  # Responses smaller than this (in bytes) are sent as-is
+    gzip_compresslevel: int = 4  # Favour speed; higher levels gain little on JSON
+    
+    # Optional features (disable to skip loading their services and routes)
+    enable_browser: bool = True
+    enable_multimodal: bool = True
+    
+    # Multi-modal upload settings (types may end in /* to allow a whole family)
+    upload_max_bytes: int = 20 * 1024 * 1024  # 20 MiB
+    upload_allowed_types: List[str] = [
+        "image/*", "audio/*", "video/*", "text/*",
+        "application/pdf", "application/json", "application/octet-stream"
+    ]
     
     # Redis settings (optional)
-    redis_url: Optional[str] = os.getenv("REDIS_URL")
-    use_redis: bool = redis_url is not None
+    redis_url: Optional[str] = None
     
     # Supabase settings (optional)
-    supabase_url: Optional[str] = os.getenv("SUPABASE_URL")
-    supabase_key: Optional[str] = os.getenv("SUPABASE_KEY")
-    use_supabase: bool = supabase_url is not None and supabase_key is not None
+    supabase_url: Optional[str] = None
+    supabase_key: Optional[str] = None
     
     # Memory settings
     memory_ttl_session: int = 60 * 60  # 1 hour in seconds
     memory_ttl_user: int = 60 * 60 * 24 * 30  # 30 days in seconds
     memory_ttl_knowledge: int = 60 * 60 * 24 * 365  # 1 year in seconds
+    memory_batch_limit: int = 256  # Maximum number of memories per batch request
+    
+    # Maximum number of concurrent LLM and embedding API requests (streams count while open)
+    llm_max_concurrency: int = 20
+    # Size of each provider client's connection pool (connections are kept alive between requests)
+    llm_max_connections: int = 100
+    # Retries for rate-limited (429) and failed provider requests; the SDKs back off
+    # exponentially with jitter and honour Retry-After
+    llm_max_retries: int = 4
+    
+    # LLM response cache settings (identical prompts reuse one sampled completion, so it is opt-in;
+    # shared through Redis when REDIS_URL is set)
+    llm_cache_enabled: bool = False
+    llm_cache_size: int = 10_000  # Maximum number of cached completions (in-process cache)
+    llm_cache_ttl: int = 60 * 60  # 1 hour in seconds
+    llm_semantic_cache_enabled: bool = False  # Also reuse completions of paraphrased prompts (in-process)
+    llm_semantic_cache_size: int = 1024  # Maximum number of completions matched by similarity (0 disables the cache)
+    llm_semantic_cache_similarity: float = 0.95  # Minimum prompt embedding similarity for a hit
+    
+    # Browser result cache settings (search and page results reused across prompts)
+    browser_cache_size: int = 256  # Maximum number of cached results
+    browser_cache_ttl: int = 5 * 60  # 5 minutes in seconds
+    
+    # Embedding model (stored memory vectors are only comparable within one model)
+    embedding_model: str = "text-embedding-3-small"
+    
+    # Embedding cache settings
+    embedding_cache_size: int = 2048  # Maximum number of cached embeddings
+    embedding_cache_ttl: int = 60 * 60  # 1 hour in seconds
+    
+    # Semantic search cache settings
+    search_cache_size: int = 1024  # Maximum number of cached searches (0 disables the cache)
+    search_cache_similarity: float = 0.97  # Minimum query embedding similarity for a hit
+    search_cache_ttl: int = 60  # 1 minute in seconds
+    
+    # Context switching settings
+    context_history_limit: int = 100  # Most recent switches kept per session
     
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=False)
+    
+    @computed_field
+    @property
+    def use_redis(self) -> bool:
+        """Whether Redis is configured"""
+        return self.redis_url is not None
+    
+    @computed_field
+    @property
+    def use_supabase(self) -> bool:
+        """Whether Supabase is configured"""
+        return self.supabase_url is not None and self.supabase_key is not None
 
 # Tone profiles
-TONE_PROFILES = {
+_TONE_PROFILE_DATA = {
     "strategic": {
         "description": "Strategic and forward-thinking",
         "modifiers": "Use clear, confident language focused on long-term vision and business growth"
@@ -80,7 +153,7 @@ TONE_PROFILES = {
 }
 
 # Default roles
-DEFAULT_ROLES = [
+_DEFAULT_ROLE_DATA = [
     {
         "id": "ceo-advisor",
         "name": "CEO Advisor",
@@ -143,5 +216,34 @@ DEFAULT_ROLES = [
     }
 ]
 
+# Validated once at import; shared read-only by every request (and across
+# forked workers via copy-on-write)
+TONE_PROFILES: Mapping[str, ToneProfile] = MappingProxyType(
+    {sys.intern(name): ToneProfile(**profile) for name, profile in _TONE_PROFILE_DATA.items()}
+)
+DEFAULT_ROLES: Tuple[Role, ...] = tuple(
+    Role(**{
+        **role_data,
+        # Ids, tones and domains are compared and hashed on every request
+        "id": sys.intern(role_data["id"]),
+        "tone": sys.intern(role_data["tone"]),
+        "domains": [sys.intern(domain) for domain in role_data["domains"]]
+    })
+    for role_data in _DEFAULT_ROLE_DATA
+)
+
+@lru_cache(maxsize=64)
+def get_tone_guidance(tone: str) -> str:
+    """Get the tone section of a system prompt, built once per tone
+    
+    Args:
+        tone: The role's tone (unknown tones fall back to the strategic profile)
+        
+    Returns:
+        The tone description and guidance text
+    """
+    tone_profile = TONE_PROFILES.get(tone, TONE_PROFILES["strategic"])
+    return f"Tone: {tone} - {tone_profile.description}\nTone Guidance: {tone_profile.modifiers}"
+
 # Create settings object
 settings = Settings()
@@ -1,25 +1,41 @@
+import orjson
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response
 from contextlib import asynccontextmanager
 from app.config import settings
-from app.routes import role_routes, memory_routes, healthcheck, browser_routes, context_routes, multimodal_routes, provider_routes, domain_routes
+from app.routes import role_routes, memory_routes, healthcheck, context_routes, provider_routes, domain_routes
 from app.services.role_service import RoleService
 from app.services.memory_service import MemoryService
 from app.services.ai_processor import AIProcessor
-from app.services.multimodal_processor import MultiModalProcessor
-from app.services.web_browser.browser_service import BrowserService
-from app.services.web_browser.browser_integration import BrowserIntegration
+from app.services.llm_providers.provider_factory import LLMProviderFactory
 from app.services.trigger_service import TriggerService
 from app.services.context_switching_service import ContextSwitchingService
+from app.utils.queue_logging import start_queue_logging, stop_queue_logging
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Initialize services and cleanup on shutdown"""
-    # Initialize services
-    browser_service = BrowserService()
-    browser_integration = BrowserIntegration(browser_service)
+    # Write log records from a background thread so logging never blocks the event loop
+    log_listener = start_queue_logging()
+    
+    # Initialize optional services only when enabled (their imports are heavyweight)
+    browser_service = None
+    browser_integration = None
+    if settings.enable_browser:
+        from app.services.web_browser.browser_service import BrowserService
+        from app.services.web_browser.browser_integration import BrowserIntegration
+        browser_service = BrowserService()
+        browser_integration = BrowserIntegration(browser_service)
+    
+    multimodal_processor = None
+    if settings.enable_multimodal:
+        from app.services.multimodal_processor import MultiModalProcessor
+        multimodal_processor = MultiModalProcessor()
+    
+    # Initialize core services
     ai_processor = AIProcessor(browser_integration=browser_integration)
-    multimodal_processor = MultiModalProcessor()
     memory_service = MemoryService()
     role_service = RoleService(memory_service, ai_processor)
     
@@ -27,11 +43,7 @@ async def lifespan(app: FastAPI):
     trigger_service = TriggerService()
     context_switching_service = ContextSwitchingService(role_service, trigger_service)
     
-    # Initialize browser service
-    await browser_service.initialize()
-    
-    # Initialize triggers for all roles
-    await context_switching_service.initialize_roles()
+    # The browser and role triggers are initialized lazily on first use
     
     # Add services to app state
     app.state.ai_processor = ai_processor
@@ -42,44 +54,71 @@ async def lifespan(app: FastAPI):
     app.state.trigger_service = trigger_service
     app.state.context_switching_service = context_switching_service
     
+    # Model validators are built at import time, but the OpenAPI schema is generated
+    # lazily; build it now so the first /docs or /openapi.json request isn't slow
+    app.openapi()
+    
     yield
     
     # Clean up resources
     await memory_service.close()
-    await browser_service.close()
+    await ai_processor.close()
+    await LLMProviderFactory.close_clients()
+    if browser_service:
+        await browser_service.close()
+    stop_queue_logging(log_listener)
 
 # Create FastAPI app
 app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
     description="Role-Specific Context MCP Server for AI orchestration",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # In production, restrict this to your frontend domain
+    allow_origins=settings.cors_origins,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PATCH", "DELETE"],
+    allow_headers=["Authorization", "Content-Type", "Accept"],
+    max_age=settings.cors_max_age,
+)
+
+# Compress larger responses (role and memory listings are mostly repetitive text);
+# small payloads aren't worth the CPU. Since Starlette 1.7 (the floor in requirements.txt)
+# event streams are never compressed and other streamed bodies are flushed per chunk
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=settings.gzip_minimum_size,
+    compresslevel=settings.gzip_compresslevel,
 )
 
 # Include routers
 app.include_router(healthcheck.router, tags=["Health"])
 app.include_router(role_routes.router, prefix=settings.api_prefix, tags=["Roles"])
 app.include_router(memory_routes.router, prefix=settings.api_prefix, tags=["Memory"])
-app.include_router(browser_routes.router, prefix=settings.api_prefix + "/browser", tags=["Browser"])
 app.include_router(context_routes.router, prefix=settings.api_prefix, tags=["Context Switching"])
-app.include_router(multimodal_routes.router, prefix=settings.api_prefix, tags=["Multi-Modal"])
 app.include_router(provider_routes.router, prefix=settings.api_prefix + "/providers", tags=["LLM Providers"])
 app.include_router(domain_routes.router, prefix=settings.api_prefix + "/domain-analysis", tags=["Domain Analysis"])
 
-# Root endpoint
+# Optional feature routers
+if settings.enable_browser:
+    from app.routes import browser_routes
+    app.include_router(browser_routes.router, prefix=settings.api_prefix + "/browser", tags=["Browser"])
+if settings.enable_multimodal:
+    from app.routes import multimodal_routes
+    app.include_router(multimodal_routes.router, prefix=settings.api_prefix, tags=["Multi-Modal"])
+
+# Root endpoint (the payload never changes, so it is encoded once)
+_ROOT_BYTES = orjson.dumps({
+    "message": "Welcome to the Role-Specific Context MCP Server",
+    "version": settings.app_version,
+    "documentation": "/docs"
+})
+
 @app.get("/", tags=["Root"])
 async def root():
-    return {
-        "message": "Welcome to the Role-Specific Context MCP Server",
-        "version": settings.app_version,
-        "documentation": "/docs"
-    }
+    return Response(content=_ROOT_BYTES, media_type="application/json")
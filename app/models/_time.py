@@ -0,0 +1,5 @@
+from datetime import datetime, timezone
+
+def utcnow() -> datetime:
+    """Get the current time as a timezone-aware UTC datetime"""
+    return datetime.now(timezone.utc)
@@ -1,38 +1,51 @@
 from typing import List, Optional, Dict, Any, Literal
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
+from app.models._time import utcnow
 
 class BrowserSession(BaseModel):
     """Model for browser session information"""
     session_id: str = Field(..., description="Unique identifier for the browser session")
-    created_at: datetime = Field(default_factory=datetime.now, description="When the session was created")
+    created_at: datetime = Field(default_factory=utcnow, description="When the session was created")
     active: bool = Field(True, description="Whether the session is currently active")
     mock: bool = Field(False, description="Whether this is a mock session")
     error: Optional[str] = Field(None, description="Error message if browser initialization failed")
 
 class BrowserNavigationRequest(BaseModel):
     """Request model for browser navigation"""
-    url: HttpUrl = Field(..., description="URL to navigate to")
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
+    url: str = Field(..., min_length=1, description="URL to navigate to (https:// is assumed if no scheme is given)")
 
 class BrowserClickRequest(BaseModel):
     """Request model for clicking an element"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     selector: str = Field(..., description="CSS selector for the element to click")
 
 class BrowserFillRequest(BaseModel):
     """Request model for filling an input field"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     selector: str = Field(..., description="CSS selector for the input field")
     value: str = Field(..., description="Value to fill in the input field")
 
 class BrowserEvaluateRequest(BaseModel):
     """Request model for evaluating JavaScript"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     script: str = Field(..., description="JavaScript code to execute")
 
 class BrowserScreenshotRequest(BaseModel):
     """Request model for taking a screenshot"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     selector: Optional[str] = Field(None, description="CSS selector for element to screenshot")
 
 class BrowserResponse(BaseModel):
     """Base response model for browser operations"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     success: bool = Field(..., description="Whether the operation was successful")
     error: Optional[str] = Field(None, description="Error message if the operation failed")
 
@@ -55,9 +68,11 @@ class BrowserHistoryEntry(BaseModel):
     """Model for a browser history entry"""
     url: str = Field(..., description="URL that was visited")
     title: Optional[str] = Field(None, description="Title of the page")
-    timestamp: datetime = Field(default_factory=datetime.now, description="When the page was visited")
+    timestamp: datetime = Field(default_factory=utcnow, description="When the page was visited")
     actions: List[Dict[str, Any]] = Field(default_factory=list, description="Actions performed on the page")
 
 class BrowserHistoryResponse(BaseModel):
     """Response model for browser history"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     history: List[BrowserHistoryEntry] = Field(..., description="List of history entries")
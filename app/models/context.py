@@ -1,39 +1,47 @@
-from typing import List, Optional, Dict, Any, Literal
-from pydantic import BaseModel, Field
+import re
+from typing import List, Optional, Any, Literal, Pattern
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
 from datetime import datetime
-from uuid import uuid4
-
-class ContextSession(BaseModel):
-    """Model for context switching session"""
-    session_id: str = Field(..., description="Unique identifier for the session")
-    current_role_id: str = Field(..., description="ID of the current active role")
-    created_at: datetime = Field(default_factory=datetime.now, description="When the session was created")
-    last_activity: datetime = Field(default_factory=datetime.now, description="When the session was last active")
-    last_switch_reason: Optional[str] = Field(None, description="Reason for the last context switch")
-    history: List[Dict[str, Any]] = Field(default_factory=list, description="History of context switches")
+from app.models._time import utcnow
+import secrets
 
 class ContextSwitchEvent(BaseModel):
     """Model for a context switch event"""
-    timestamp: datetime = Field(default_factory=datetime.now, description="When the switch occurred")
+    timestamp: datetime = Field(default_factory=utcnow, description="When the switch occurred")
     from_role_id: str = Field(..., description="ID of the role switched from")
     to_role_id: str = Field(..., description="ID of the role switched to")
     reason: str = Field(..., description="Reason for the switch")
     query: Optional[str] = Field(None, description="Query that triggered the switch, if any")
     automatic: bool = Field(False, description="Whether the switch was automatic or manual")
 
+class ContextSession(BaseModel):
+    """Model for context switching session"""
+    session_id: str = Field(..., description="Unique identifier for the session")
+    current_role_id: str = Field(..., description="ID of the current active role")
+    created_at: datetime = Field(default_factory=utcnow, description="When the session was created")
+    last_activity: datetime = Field(default_factory=utcnow, description="When the session was last active")
+    last_switch_reason: Optional[str] = Field(None, description="Reason for the last context switch")
+    history: List[ContextSwitchEvent] = Field(default_factory=list, description="History of context switches")
+
 class CreateSessionRequest(BaseModel):
     """Request model for creating a new session"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     initial_role_id: str = Field(..., description="ID of the initial role to use")
     session_id: Optional[str] = Field(None, description="Optional custom session ID")
 
 class CreateSessionResponse(BaseModel):
     """Response model for session creation"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     session_id: str = Field(..., description="ID of the created session")
     current_role_id: str = Field(..., description="ID of the current role")
     message: str = Field(..., description="Status message")
 
 class ProcessWithContextRequest(BaseModel):
     """Request model for processing a query with context switching"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     session_id: str = Field(..., description="ID of the session to use")
     query: str = Field(..., description="Query to process")
     custom_instructions: Optional[str] = Field(None, description="Optional custom instructions")
@@ -41,6 +49,8 @@ class ProcessWithContextRequest(BaseModel):
 
 class ProcessWithContextResponse(BaseModel):
     """Response model for processed queries with context switching"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     session_id: str = Field(..., description="ID of the session")
     role_id: str = Field(..., description="ID of the role used")
     query: str = Field(..., description="The query that was processed")
@@ -50,12 +60,16 @@ class ProcessWithContextResponse(BaseModel):
 
 class SwitchContextRequest(BaseModel):
     """Request model for manually switching context"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     session_id: str = Field(..., description="ID of the session to switch context for")
     new_role_id: str = Field(..., description="ID of the role to switch to")
     reason: Optional[str] = Field("Manual switch by user", description="Reason for the switch")
 
 class SwitchContextResponse(BaseModel):
     """Response model for context switching"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     session_id: str = Field(..., description="ID of the session")
     current_role_id: str = Field(..., description="ID of the current role")
     previous_role_id: str = Field(..., description="ID of the previous role")
@@ -64,17 +78,44 @@ class SwitchContextResponse(BaseModel):
 
 class ContextTrigger(BaseModel):
     """Model for context switching triggers"""
-    id: str = Field(default_factory=lambda: str(uuid4()), description="Unique identifier for the trigger")
+    id: str = Field(default_factory=lambda: secrets.token_hex(16), description="Unique identifier for the trigger")
     role_id: str = Field(..., description="ID of the role this trigger is for")
     pattern: str = Field(..., description="Regex pattern or keyword to match")
     priority: int = Field(1, description="Priority of the trigger (higher numbers = higher priority)")
     description: str = Field(..., description="Description of what this trigger matches")
     is_regex: bool = Field(False, description="Whether the pattern is a regex pattern")
     enabled: bool = Field(True, description="Whether this trigger is enabled")
-    created_at: datetime = Field(default_factory=datetime.now, description="When the trigger was created")
+    source: str = Field("custom", description="Where the trigger came from (domain:<name>, name, or custom)")
+    created_at: datetime = Field(default_factory=utcnow, description="When the trigger was created")
+    
+    # Matchers are prepared once per trigger instead of on every query
+    _compiled: Optional[Pattern[str]] = PrivateAttr(default=None)
+    _lower: Optional[str] = PrivateAttr(default=None)
+    
+    def model_post_init(self, __context: Any) -> None:
+        """Precompile the regex pattern, or lower-case the keyword"""
+        if self.is_regex:
+            self._compiled = re.compile(self.pattern, re.IGNORECASE)
+        else:
+            self._lower = self.pattern.lower()
+    
+    def matches(self, query_lower: str) -> bool:
+        """Check whether this trigger matches a query
+        
+        Args:
+            query_lower: The query, already lower-cased by the caller
+            
+        Returns:
+            True if the trigger matches the query
+        """
+        if self._compiled is not None:
+            return self._compiled.search(query_lower) is not None
+        return self._lower in query_lower
 
 class CreateTriggerRequest(BaseModel):
     """Request model for creating a context trigger"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     role_id: str = Field(..., description="ID of the role this trigger is for")
     pattern: str = Field(..., description="Regex pattern or keyword to match")
     priority: int = Field(1, description="Priority of the trigger (higher numbers = higher priority)")
@@ -83,6 +124,8 @@ class CreateTriggerRequest(BaseModel):
 
 class UpdateTriggerRequest(BaseModel):
     """Request model for updating a trigger"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     pattern: Optional[str] = Field(None, description="Regex pattern or keyword to match")
     priority: Optional[int] = Field(None, description="Priority of the trigger")
     description: Optional[str] = Field(None, description="Description of what this trigger matches")
@@ -91,8 +134,12 @@ class UpdateTriggerRequest(BaseModel):
 
 class TriggerResponse(BaseModel):
     """Response model for trigger operations"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     trigger: ContextTrigger
 
 class TriggersResponse(BaseModel):
     """Response model for listing triggers"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     triggers: List[ContextTrigger]
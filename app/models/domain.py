@@ -1,5 +1,5 @@
 from typing import List, Dict, Any, Optional, Literal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 class DomainTemplate(BaseModel):
     """Model for domain-specific analysis templates"""
@@ -10,6 +10,8 @@ class DomainTemplate(BaseModel):
 
 class DomainAnalysisRequest(BaseModel):
     """Request model for domain analysis"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     content: str = Field(..., description="Content to analyze")
     role_id: str = Field(..., description="ID of the role to use for analysis")
 
@@ -29,6 +31,8 @@ class DomainSpecificAnalysis(BaseModel):
 
 class DomainAnalysisResponse(BaseModel):
     """Response model for domain analysis"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     role_id: str = Field(..., description="ID of the role used for analysis")
     role_name: str = Field(..., description="Name of the role used for analysis")
     domains: List[str] = Field(..., description="Domains of the role")
@@ -36,22 +40,30 @@ class DomainAnalysisResponse(BaseModel):
 
 class DomainTemplateResponse(BaseModel):
     """Response model for domain templates"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     domains: List[str] = Field(..., description="Available domain names")
     templates: Dict[str, DomainTemplate] = Field(..., description="Domain templates")
 
 class SpecificDomainTemplateResponse(BaseModel):
     """Response model for a specific domain template"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     domain: str = Field(..., description="The domain name")
     template: DomainTemplate = Field(..., description="The domain template")
 
 class EnhancedPromptRequest(BaseModel):
     """Request model for enhancing a prompt with domain analysis"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     system_prompt: str = Field(..., description="Original system prompt")
     content: str = Field(..., description="Content to analyze")
     role_id: str = Field(..., description="ID of the role to use for analysis")
 
 class EnhancedPromptResponse(BaseModel):
     """Response model for an enhanced prompt"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     original_prompt: str = Field(..., description="The original system prompt")
     enhanced_prompt: str = Field(..., description="The enhanced system prompt")
     domains_applied: List[str] = Field(..., description="Domains that were applied in the enhancement")
@@ -1,25 +1,99 @@
-from typing import List, Optional, Dict, Any, Literal, Set
-from pydantic import BaseModel, Field, UUID4
-from uuid import uuid4
+from typing import List, Optional, Dict, Any, Literal, Set, FrozenSet, Union, Sequence
+import base64
+import sys
+from array import array
+import msgspec
+from pydantic import BaseModel, ConfigDict, Field, UUID4
+import secrets
 from datetime import datetime
+from app.models._time import utcnow
+
+# How embeddings are returned: a JSON float list, or base64 of little-endian float32
+# bytes (the same encoding as the OpenAI embeddings API's encoding_format="base64")
+EmbeddingFormat = Literal["float", "base64"]
+
+def compact_embedding(embedding: Optional[Sequence[float]]) -> Optional[array]:
+    """Store an embedding as a packed float32 array
+    
+    A list of Python floats costs ~32 bytes per dimension; the packed array costs 4,
+    and numpy reads it through the buffer protocol without copying.
+    
+    Args:
+        embedding: The embedding (a list of floats or an existing float32 array)
+        
+    Returns:
+        The packed embedding, or None if it is empty
+    """
+    if not embedding:
+        return None
+    if isinstance(embedding, array) and embedding.typecode == "f":
+        return embedding
+    return array("f", embedding)
+
+def encode_embedding_base64(embedding: Sequence[float]) -> str:
+    """Encode an embedding as base64 of its little-endian float32 bytes"""
+    packed = compact_embedding(embedding)
+    if sys.byteorder == "big":
+        # Swap a copy; the stored array is shared
+        packed = array("f", packed)
+        packed.byteswap()
+    return base64.b64encode(packed).decode("ascii")
 
 class Memory(BaseModel):
     """Model for memory entries"""
-    id: str = Field(default_factory=lambda: str(uuid4()), description="Unique identifier for the memory")
+    id: str = Field(default_factory=lambda: secrets.token_hex(16), description="Unique identifier for the memory")
     role_id: str = Field(..., description="ID of the role this memory belongs to")
     content: str = Field(..., description="Content of the memory")
     type: Literal["session", "user", "knowledge"] = Field(..., description="Type of memory")
     importance: Literal["low", "medium", "high"] = Field("medium", description="Importance of the memory")
-    embedding: Optional[List[float]] = Field(None, description="Vector embedding of the memory content")
-    created_at: datetime = Field(default_factory=datetime.now, description="When the memory was created")
+    embedding: Optional[Union[List[float], str]] = Field(None, description="Vector embedding of the memory content (a base64 string when requested with embedding_format=base64)")
+    created_at: datetime = Field(default_factory=utcnow, description="When the memory was created")
     expires_at: Optional[datetime] = Field(None, description="When the memory expires")
     tags: List[str] = Field(default_factory=list, description="Tags for categorizing and filtering memories")
     category: Optional[str] = Field(None, description="Primary category for the memory")
     shared_with: List[str] = Field(default_factory=list, description="List of role IDs this memory is shared with")
     parent_memory_id: Optional[str] = Field(None, description="ID of the parent memory if this is derived from another memory")
 
+class MemoryRecord(msgspec.Struct, kw_only=True, frozen=True, gc=False):
+    """Lightweight storage record used internally by MemoryService (converted to Memory at the API boundary)"""
+    id: str = msgspec.field(default_factory=lambda: secrets.token_hex(16))
+    role_id: str
+    content: str
+    type: Literal["session", "user", "knowledge"]
+    importance: Literal["low", "medium", "high"] = "medium"
+    # Packed float32 (see compact_embedding); converted to a list at the API boundary
+    embedding: Optional[array] = None
+    created_at: datetime = msgspec.field(default_factory=utcnow)
+    expires_at: Optional[datetime] = None
+    # Sets, since tags and sharing are only ever tested for membership
+    tags: FrozenSet[str] = msgspec.field(default_factory=frozenset)
+    category: Optional[str] = None
+    shared_with: FrozenSet[str] = msgspec.field(default_factory=frozenset)
+    parent_memory_id: Optional[str] = None
+    
+    def to_model(self, embedding_format: EmbeddingFormat = "float") -> Memory:
+        """Convert to the API-facing Memory model (fields were validated on write)
+        
+        Args:
+            embedding_format: Whether to return the embedding as floats or base64
+            
+        Returns:
+            The Memory model
+        """
+        fields = msgspec.structs.asdict(self)
+        fields["tags"] = sorted(self.tags)
+        fields["shared_with"] = sorted(self.shared_with)
+        if self.embedding:
+            if embedding_format == "base64":
+                fields["embedding"] = encode_embedding_base64(self.embedding)
+            else:
+                fields["embedding"] = self.embedding.tolist()
+        return Memory.model_construct(**fields)
+
 class MemoryCreate(BaseModel):
     """Model for creating a new memory"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     role_id: str = Field(..., description="ID of the role this memory belongs to")
     content: str = Field(..., description="Content of the memory")
     type: Literal["session", "user", "knowledge"] = Field(..., description="Type of memory")
@@ -31,14 +105,20 @@ class MemoryCreate(BaseModel):
 
 class MemoryResponse(BaseModel):
     """Response model for memory operations"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     success: bool = True
     memory: Memory
 
 class MemoriesResponse(BaseModel):
     """Response model for listing memories"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     memories: List[Memory]
 
 class ClearMemoriesResponse(BaseModel):
     """Response model for clearing memories"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     success: bool
     message: str
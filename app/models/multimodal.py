@@ -1,53 +1,83 @@
-from typing import List, Optional, Dict, Any, Literal
-from pydantic import BaseModel, Field, HttpUrl
+from functools import lru_cache
+from typing import Annotated, List, Optional, Dict, Any, Literal, get_args
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field, HttpUrl, TypeAdapter
 from datetime import datetime
-from enum import Enum
 
-class ContentType(str, Enum):
-    """Enum for content types"""
+class ContentType:
+    """Named media content types (plain strings, so they compare equal to validated values)"""
     TEXT = "text"
     IMAGE = "image"
     AUDIO = "audio"
     VIDEO = "video"
     FILE = "file"
 
+# Media content types for validation (a Literal validates as a plain string lookup, unlike an Enum)
+MediaType = Literal["text", "image", "audio", "video", "file"]
+CONTENT_TYPES = get_args(MediaType)
+
+_http_url_adapter = TypeAdapter(HttpUrl)
+
+@lru_cache(maxsize=4096)
+def _parse_http_url(value: str) -> HttpUrl:
+    """Parse a URL string once; repeated media URLs (e.g. the same CDN asset) hit the cache"""
+    return _http_url_adapter.validate_python(value)
+
+def _cached_http_url(value: Any) -> Any:
+    """Swap URL strings for their cached parsed form before HttpUrl validation"""
+    if isinstance(value, str):
+        try:
+            return _parse_http_url(value)
+        except ValueError:
+            # Leave invalid input to the HttpUrl validator so the usual error is reported
+            return value
+    return value
+
+CachedHttpUrl = Annotated[HttpUrl, BeforeValidator(_cached_http_url)]
+
+class MediaMetadata(BaseModel):
+    """Model for media metadata (common keys are typed, any others are kept as extra fields)"""
+    model_config = ConfigDict(extra="allow")
+    
+    width: Optional[int] = Field(None, description="Width of the media in pixels")
+    height: Optional[int] = Field(None, description="Height of the media in pixels")
+    duration: Optional[float] = Field(None, description="Duration of audio or video media in seconds")
+    detail: Optional[str] = Field(None, description="Image detail level to request from the provider (auto, low, high)")
+
 class MediaContent(BaseModel):
     """Model for media content"""
-    type: ContentType = Field(..., description="Type of media content")
-    url: Optional[HttpUrl] = Field(None, description="URL to the media content")
+    type: MediaType = Field(..., description="Type of media content")
+    url: Optional[CachedHttpUrl] = Field(None, description="URL to the media content")
     base64_data: Optional[str] = Field(None, description="Base64 encoded media data")
     mime_type: Optional[str] = Field(None, description="MIME type of the media content")
     alt_text: Optional[str] = Field(None, description="Alternative text description of the media")
-    metadata: Optional[Dict[str, Any]] = Field(None, description="Additional metadata for the media")
+    metadata: Optional[MediaMetadata] = Field(None, description="Additional metadata for the media")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "type": "image",
-                "base64_data": "data:image/jpeg;base64,/9j/4AAQSkZJRgABAQEAYABgAAD...",
-                "mime_type": "image/jpeg",
-                "alt_text": "A chart showing business growth metrics",
-                "metadata": {"width": 800, "height": 600}
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "type": "image",
+            "base64_data": "data:image/jpeg;base64,/9j/4AAQSkZJRgABAQEAYABgAAD...",
+            "mime_type": "image/jpeg",
+            "alt_text": "A chart showing business growth metrics",
+            "metadata": {"width": 800, "height": 600}
         }
+    })
 
 class MultiModalContent(BaseModel):
     """Model for multi-modal content"""
     text: Optional[str] = Field(None, description="Text content")
     media: Optional[List[MediaContent]] = Field(None, description="Media content")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "text": "Please analyze this chart of our quarterly sales:",
-                "media": [{
-                    "type": "image",
-                    "base64_data": "data:image/jpeg;base64,/9j/4AAQSkZJRgABAQEAYABgAAD...",
-                    "mime_type": "image/jpeg",
-                    "alt_text": "Quarterly sales chart for 2024"
-                }]
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "text": "Please analyze this chart of our quarterly sales:",
+            "media": [{
+                "type": "image",
+                "base64_data": "data:image/jpeg;base64,/9j/4AAQSkZJRgABAQEAYABgAAD...",
+                "mime_type": "image/jpeg",
+                "alt_text": "Quarterly sales chart for 2024"
+            }]
         }
+    })
 
 class MultiModalProcessRequest(BaseModel):
     """Request model for processing a multi-modal query"""
@@ -56,26 +86,27 @@ class MultiModalProcessRequest(BaseModel):
     custom_instructions: Optional[str] = Field(None, description="Optional custom instructions")
     provider_name: Optional[str] = Field(None, description="Optional LLM provider to use (defaults to the configured default provider)")
     
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "role_id": "cfo-advisor",
-                "content": {
-                    "text": "What insights can you provide about our financial performance based on this chart?",
-                    "media": [{
-                        "type": "image",
-                        "base64_data": "data:image/jpeg;base64,/9j/4AAQSkZJRgABAQEAYABgAAD...",
-                        "mime_type": "image/jpeg",
-                        "alt_text": "Financial performance chart"
-                    }]
-                },
-                "custom_instructions": "Focus on cash flow implications",
-                "provider_name": "openai"
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "role_id": "cfo-advisor",
+            "content": {
+                "text": "What insights can you provide about our financial performance based on this chart?",
+                "media": [{
+                    "type": "image",
+                    "base64_data": "data:image/jpeg;base64,/9j/4AAQSkZJRgABAQEAYABgAAD...",
+                    "mime_type": "image/jpeg",
+                    "alt_text": "Financial performance chart"
+                }]
+            },
+            "custom_instructions": "Focus on cash flow implications",
+            "provider_name": "openai"
         }
+    })
 
 class MultiModalProcessResponse(BaseModel):
     """Response model for processed multi-modal queries"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     role_id: str
     response: str
     processed_media: List[Dict[str, Any]] = Field(default_factory=list, description="Information about processed media")
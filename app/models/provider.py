@@ -1,5 +1,5 @@
 from typing import Dict, List, Optional, Any, Literal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 class LLMProvider(BaseModel):
     """Model for LLM provider information"""
@@ -13,11 +13,15 @@ class LLMProvider(BaseModel):
 
 class ProviderResponse(BaseModel):
     """Response model for provider information"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     providers: Dict[str, str] = Field(..., description="Dictionary of provider names to model names")
     default_provider: str = Field(..., description="Name of the default provider")
 
 class ProviderCapabilitiesResponse(BaseModel):
     """Response model for provider capabilities"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     providers: List[LLMProvider] = Field(..., description="List of provider information")
     default_provider: str = Field(..., description="Name of the default provider")
 
@@ -40,6 +44,8 @@ class ProviderGenerateRequest(BaseModel):
 
 class ProviderGenerateResponse(BaseModel):
     """Response model for generated content"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     response: str = Field(..., description="Generated response")
     provider_name: str = Field(..., description="Provider used for generation")
     model_name: str = Field(..., description="Model used for generation")
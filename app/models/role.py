@@ -1,56 +1,99 @@
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field, UUID4
+import hashlib
+from functools import cached_property
+from typing import Annotated, List, Optional, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field, UUID4
 from uuid import uuid4
 from datetime import datetime
 
+class ToneProfile(BaseModel):
+    """Model for communication tone profiles"""
+    model_config = ConfigDict(frozen=True)
+    
+    description: str = Field(..., description="Short description of the tone")
+    modifiers: str = Field(..., description="Guidance appended to the system prompt for this tone")
+
+# Field types shared by Role, RoleCreate and RoleUpdate
+RoleId = Annotated[str, Field(description="Unique identifier for the role")]
+RoleName = Annotated[str, Field(description="Human-readable name for the role")]
+RoleDescription = Annotated[str, Field(description="Description of the role's purpose")]
+RoleInstructions = Annotated[str, Field(description="Custom instructions for the role")]
+Domains = Annotated[List[str], Field(description="Areas of expertise")]
+Tone = Annotated[str, Field(description="Communication tone (strategic, analytical, creative, etc.)")]
+SystemPrompt = Annotated[str, Field(description="Base system prompt for this role")]
+ParentRoleId = Annotated[Optional[str], Field(description="ID of the parent role for inheritance")]
+InheritMemories = Annotated[bool, Field(description="Whether to inherit memories from parent role")]
+MemoryAccessLevel = Annotated[str, Field(description="Memory access level (standard, elevated, admin)")]
+MemoryCategories = Annotated[List[str], Field(description="Categories of memories this role specializes in")]
+
 class Role(BaseModel):
     """Model for role definitions"""
-    id: str = Field(..., description="Unique identifier for the role")
-    name: str = Field(..., description="Human-readable name for the role")
-    description: str = Field(..., description="Description of the role's purpose")
-    instructions: str = Field(..., description="Custom instructions for the role")
-    domains: List[str] = Field(default_factory=list, description="Areas of expertise")
-    tone: str = Field("strategic", description="Communication tone (strategic, analytical, creative, etc.)")
-    system_prompt: str = Field(..., description="Base system prompt for this role")
+    model_config = ConfigDict(frozen=True)
+    
+    id: RoleId
+    name: RoleName
+    description: RoleDescription
+    instructions: RoleInstructions
+    domains: Domains = Field(default_factory=list)
+    tone: Tone = "strategic"
+    system_prompt: SystemPrompt
     is_default: bool = Field(False, description="Whether this is a default system role")
-    parent_role_id: Optional[str] = Field(None, description="ID of the parent role for inheritance")
-    inherit_memories: bool = Field(False, description="Whether to inherit memories from parent role")
-    memory_access_level: str = Field("standard", description="Memory access level (standard, elevated, admin)")
-    memory_categories: List[str] = Field(default_factory=list, description="Categories of memories this role specializes in")
+    parent_role_id: ParentRoleId = None
+    inherit_memories: InheritMemories = False
+    memory_access_level: MemoryAccessLevel = "standard"
+    memory_categories: MemoryCategories = Field(default_factory=list)
+    
+    @cached_property
+    def prompt_hash(self) -> bytes:
+        """Digest of the fields that make up the role's system prompt
+        
+        Roles with identical prompt content share a digest, so caches keyed on it
+        are reused across roles and invalidated automatically when a role changes.
+        Build changed roles with model_validate, since model_copy would carry the
+        cached digest over.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (self.system_prompt, self.tone, "\x1f".join(self.domains), self.instructions):
+            digest.update(part.encode())
+            digest.update(b"\x1e")
+        return digest.digest()
 
 class RoleCreate(BaseModel):
     """Model for creating a new role"""
-    id: str = Field(..., description="Unique identifier for the role")
-    name: str = Field(..., description="Human-readable name for the role")
-    description: str = Field(..., description="Description of the role's purpose")
-    instructions: str = Field(..., description="Custom instructions for the role")
-    domains: List[str] = Field(default_factory=list, description="Areas of expertise")
-    tone: str = Field("strategic", description="Communication tone (strategic, analytical, creative, etc.)")
-    system_prompt: str = Field(..., description="Base system prompt for this role")
-    parent_role_id: Optional[str] = Field(None, description="ID of the parent role for inheritance")
-    inherit_memories: bool = Field(False, description="Whether to inherit memories from parent role")
-    memory_access_level: str = Field("standard", description="Memory access level (standard, elevated, admin)")
-    memory_categories: List[str] = Field(default_factory=list, description="Categories of memories this role specializes in")
+    id: RoleId
+    name: RoleName
+    description: RoleDescription
+    instructions: RoleInstructions
+    domains: Domains = Field(default_factory=list)
+    tone: Tone = "strategic"
+    system_prompt: SystemPrompt
+    parent_role_id: ParentRoleId = None
+    inherit_memories: InheritMemories = False
+    memory_access_level: MemoryAccessLevel = "standard"
+    memory_categories: MemoryCategories = Field(default_factory=list)
 
 class RoleUpdate(BaseModel):
     """Model for updating an existing role"""
-    name: Optional[str] = Field(None, description="Human-readable name for the role")
-    description: Optional[str] = Field(None, description="Description of the role's purpose")
-    instructions: Optional[str] = Field(None, description="Custom instructions for the role")
-    domains: Optional[List[str]] = Field(None, description="Areas of expertise")
-    tone: Optional[str] = Field(None, description="Communication tone (strategic, analytical, creative, etc.)")
-    system_prompt: Optional[str] = Field(None, description="Base system prompt for this role")
-    parent_role_id: Optional[str] = Field(None, description="ID of the parent role for inheritance")
-    inherit_memories: Optional[bool] = Field(None, description="Whether to inherit memories from parent role")
-    memory_access_level: Optional[str] = Field(None, description="Memory access level (standard, elevated, admin)")
-    memory_categories: Optional[List[str]] = Field(None, description="Categories of memories this role specializes in")
+    name: Optional[RoleName] = None
+    description: Optional[RoleDescription] = None
+    instructions: Optional[RoleInstructions] = None
+    domains: Optional[Domains] = None
+    tone: Optional[Tone] = None
+    system_prompt: Optional[SystemPrompt] = None
+    parent_role_id: ParentRoleId = None
+    inherit_memories: Optional[InheritMemories] = None
+    memory_access_level: Optional[MemoryAccessLevel] = None
+    memory_categories: Optional[MemoryCategories] = None
 
 class RoleResponse(BaseModel):
     """Response model for role operations"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     role: Role
 
 class RolesResponse(BaseModel):
     """Response model for listing roles"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     roles: List[Role]
 
 class ProcessRequest(BaseModel):
@@ -61,6 +104,8 @@ class ProcessRequest(BaseModel):
 
 class ProcessResponse(BaseModel):
     """Response model for processed queries"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     role_id: str
     query: str
     response: str
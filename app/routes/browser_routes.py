@@ -1,173 +1,152 @@
 from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, Request
-from fastapi.responses import JSONResponse
-from typing import Dict, List, Optional, Any
-import uuid
+from fastapi.responses import JSONResponse, ORJSONResponse
+from typing import List, Any
+import functools
 import json
 
-from app.services.web_browser.browser_service import BrowserService
+from app.utils.uuidpool import next_uuid
+from app.models.browser import BrowserNavigationRequest, BrowserClickRequest, BrowserFillRequest, BrowserEvaluateRequest, BrowserScreenshotRequest
 
 router = APIRouter()
 
+def map_errors(error_prefix: str):
+    """Map exceptions raised by a browser endpoint to HTTP errors
+    
+    ValueError (unknown session) becomes a 404, HTTPException passes through
+    unchanged, and anything else becomes a 500 prefixed with error_prefix.
+    
+    Args:
+        error_prefix: Text to put in front of unexpected error messages
+    """
+    def decorator(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            except HTTPException:
+                raise
+            except ValueError as e:
+                raise HTTPException(status_code=404, detail=str(e))
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"{error_prefix}: {str(e)}")
+        return wrapper
+    return decorator
+
 # Browser session endpoints
 @router.post("/sessions")
+@map_errors("Failed to create browser session")
 async def create_browser_session(request: Request):
     """Create a new browser session"""
     browser_service = request.app.state.browser_service
-    session_id = str(uuid.uuid4())
+    session_id = next_uuid()
     
-    try:
-        # Create the session
-        await browser_service.create_session(session_id)
-        
-        # Check if this is a mock session
-        is_mock = False
-        if session_id in browser_service.active_sessions:
-            is_mock = browser_service.active_sessions[session_id].get("mock", False)
-        
-        # Return session info
-        response = {"session_id": session_id}
-        
-        # Add mock flag if applicable
-        if is_mock:
-            response["mock"] = True
-            response["warning"] = "Using mock browser session. Browser initialization failed."
-            
-            # Add error message if available
-            if "error" in browser_service.active_sessions[session_id]:
-                response["error"] = browser_service.active_sessions[session_id]["error"]
+    # Create the session
+    await browser_service.create_session(session_id)
+    
+    # Check if this is a mock session
+    is_mock = False
+    if session_id in browser_service.active_sessions:
+        is_mock = browser_service.active_sessions[session_id].get("mock", False)
+    
+    # Return session info
+    response = {"session_id": session_id}
+    
+    # Add mock flag if applicable
+    if is_mock:
+        response["mock"] = True
+        response["warning"] = "Using mock browser session. Browser initialization failed."
         
-        return response
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to create browser session: {str(e)}")
+        # Add error message if available
+        if "error" in browser_service.active_sessions[session_id]:
+            response["error"] = browser_service.active_sessions[session_id]["error"]
+    
+    return response
 
 @router.delete("/sessions/{session_id}")
+@map_errors("Failed to close browser session")
 async def close_browser_session(session_id: str, request: Request):
     """Close a browser session"""
     browser_service = request.app.state.browser_service
     
-    try:
-        success = await browser_service.close_session(session_id)
-        if not success:
-            raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
-        return {"success": True}
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to close browser session: {str(e)}")
+    success = await browser_service.close_session(session_id)
+    if not success:
+        raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
+    return {"success": True}
 
 # Browser navigation and interaction endpoints
 @router.post("/sessions/{session_id}/navigate")
-async def navigate(session_id: str, data: Dict[str, str], request: Request):
+@map_errors("Navigation error")
+async def navigate(session_id: str, data: BrowserNavigationRequest, request: Request):
     """Navigate to a URL"""
     browser_service = request.app.state.browser_service
     
-    if "url" not in data:
-        raise HTTPException(status_code=400, detail="URL is required")
-    
-    try:
-        result = await browser_service.navigate(session_id, data["url"])
-        if not result["success"]:
-            raise HTTPException(status_code=500, detail=result["error"])
-        return result
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Navigation error: {str(e)}")
+    result = await browser_service.navigate(session_id, data.url)
+    if not result["success"]:
+        raise HTTPException(status_code=500, detail=result["error"])
+    return result
 
 @router.get("/sessions/{session_id}/content")
+@map_errors("Error getting page content")
 async def get_page_content(session_id: str, request: Request):
     """Get the current page content"""
     browser_service = request.app.state.browser_service
     
-    try:
-        result = await browser_service.get_page_content(session_id)
-        if not result["success"]:
-            raise HTTPException(status_code=500, detail=result["error"])
-        return result
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting page content: {str(e)}")
+    result = await browser_service.get_page_content(session_id)
+    if not result["success"]:
+        raise HTTPException(status_code=500, detail=result["error"])
+    return result
 
 @router.post("/sessions/{session_id}/screenshot")
-async def take_screenshot(session_id: str, data: Dict[str, Optional[str]], request: Request):
+@map_errors("Screenshot error")
+async def take_screenshot(session_id: str, data: BrowserScreenshotRequest, request: Request):
     """Take a screenshot of the current page or a specific element"""
     browser_service = request.app.state.browser_service
-    selector = data.get("selector")
-    
-    try:
-        result = await browser_service.screenshot(session_id, selector)
-        if not result["success"]:
-            raise HTTPException(status_code=500, detail=result["error"])
-        return result
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Screenshot error: {str(e)}")
+    
+    result = await browser_service.screenshot(session_id, data.selector)
+    if not result["success"]:
+        raise HTTPException(status_code=500, detail=result["error"])
+    return result
 
 @router.post("/sessions/{session_id}/click")
-async def click_element(session_id: str, data: Dict[str, str], request: Request):
+@map_errors("Click error")
+async def click_element(session_id: str, data: BrowserClickRequest, request: Request):
     """Click an element on the page"""
     browser_service = request.app.state.browser_service
     
-    if "selector" not in data:
-        raise HTTPException(status_code=400, detail="Selector is required")
-    
-    try:
-        result = await browser_service.click(session_id, data["selector"])
-        if not result["success"]:
-            raise HTTPException(status_code=500, detail=result["error"])
-        return result
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Click error: {str(e)}")
+    result = await browser_service.click(session_id, data.selector)
+    if not result["success"]:
+        raise HTTPException(status_code=500, detail=result["error"])
+    return result
 
 @router.post("/sessions/{session_id}/fill")
-async def fill_input(session_id: str, data: Dict[str, str], request: Request):
+@map_errors("Fill error")
+async def fill_input(session_id: str, data: BrowserFillRequest, request: Request):
     """Fill out an input field"""
     browser_service = request.app.state.browser_service
     
-    if "selector" not in data or "value" not in data:
-        raise HTTPException(status_code=400, detail="Selector and value are required")
-    
-    try:
-        result = await browser_service.fill(session_id, data["selector"], data["value"])
-        if not result["success"]:
-            raise HTTPException(status_code=500, detail=result["error"])
-        return result
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Fill error: {str(e)}")
+    result = await browser_service.fill(session_id, data.selector, data.value)
+    if not result["success"]:
+        raise HTTPException(status_code=500, detail=result["error"])
+    return result
 
 @router.post("/sessions/{session_id}/evaluate")
-async def evaluate_script(session_id: str, data: Dict[str, str], request: Request):
+@map_errors("Evaluation error")
+async def evaluate_script(session_id: str, data: BrowserEvaluateRequest, request: Request):
     """Execute JavaScript in the browser"""
     browser_service = request.app.state.browser_service
     
-    if "script" not in data:
-        raise HTTPException(status_code=400, detail="Script is required")
-    
-    try:
-        result = await browser_service.evaluate(session_id, data["script"])
-        if not result["success"]:
-            raise HTTPException(status_code=500, detail=result["error"])
-        return result
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Evaluation error: {str(e)}")
+    result = await browser_service.evaluate(session_id, data.script)
+    if not result["success"]:
+        raise HTTPException(status_code=500, detail=result["error"])
+    return result
 
 @router.get("/sessions/{session_id}/history")
+@map_errors("Error getting session history")
 async def get_session_history(session_id: str, request: Request):
     """Get the browsing history for a session"""
     browser_service = request.app.state.browser_service
     
-    try:
-        history = await browser_service.get_session_history(session_id)
-        return {"history": history}
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting session history: {str(e)}")
+    history = await browser_service.get_session_history(session_id)
+    
+    # Serialize straight to orjson, skipping FastAPI's jsonable_encoder walk
+    return ORJSONResponse({"history": history})
@@ -1,58 +1,21 @@
+import orjson
 from fastapi import APIRouter, Depends, Request, HTTPException, Response
 from typing import List, Dict, Any, Optional, AsyncGenerator
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel, Field
-from uuid import uuid4
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from app.utils.uuidpool import next_uuid
+from app.models.context import CreateSessionRequest, CreateSessionResponse, ProcessWithContextRequest, ProcessWithContextResponse, SwitchContextRequest, SwitchContextResponse
 from app.services.context_switching_service import ContextSwitchingService
+from app.utils.sse import SSE_DATA_PREFIX, SSE_DONE, SSE_HEADERS, SSE_SEPARATOR, coalesce_frames, sse_frame
 
 router = APIRouter(prefix="/context")
 
+# Newline-delimited JSON, offered to clients that ask for it in the Accept header
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
 async def get_context_switching_service(request: Request) -> ContextSwitchingService:
     """Dependency for getting the context switching service"""
     return request.app.state.context_switching_service
 
-# Models for context switching API
-class CreateSessionRequest(BaseModel):
-    """Request model for creating a new session"""
-    initial_role_id: str = Field(..., description="ID of the initial role to use")
-    session_id: Optional[str] = Field(None, description="Optional custom session ID")
-
-class CreateSessionResponse(BaseModel):
-    """Response model for session creation"""
-    session_id: str = Field(..., description="ID of the created session")
-    current_role_id: str = Field(..., description="ID of the current role")
-    message: str = Field(..., description="Status message")
-
-class ProcessWithContextRequest(BaseModel):
-    """Request model for processing a query with context switching"""
-    session_id: str = Field(..., description="ID of the session to use")
-    query: str = Field(..., description="Query to process")
-    custom_instructions: Optional[str] = Field(None, description="Optional custom instructions")
-    force_role_id: Optional[str] = Field(None, description="Optional role ID to force using")
-
-class ProcessWithContextResponse(BaseModel):
-    """Response model for processed queries with context switching"""
-    session_id: str = Field(..., description="ID of the session")
-    role_id: str = Field(..., description="ID of the role used")
-    query: str = Field(..., description="The query that was processed")
-    response: str = Field(..., description="The processed response")
-    context_switched: bool = Field(..., description="Whether context was switched")
-    switch_reason: Optional[str] = Field(None, description="Reason for context switch, if any")
-
-class SwitchContextRequest(BaseModel):
-    """Request model for manually switching context"""
-    session_id: str = Field(..., description="ID of the session to switch context for")
-    new_role_id: str = Field(..., description="ID of the role to switch to")
-    reason: Optional[str] = Field("Manual switch by user", description="Reason for the switch")
-
-class SwitchContextResponse(BaseModel):
-    """Response model for context switching"""
-    session_id: str = Field(..., description="ID of the session")
-    current_role_id: str = Field(..., description="ID of the current role")
-    previous_role_id: str = Field(..., description="ID of the previous role")
-    reason: str = Field(..., description="Reason for the switch")
-    message: str = Field(..., description="Status message")
-
 @router.post("/sessions", response_model=CreateSessionResponse, status_code=201, summary="Create a new session")
 async def create_session(
     request: CreateSessionRequest, 
@@ -60,7 +23,7 @@ async def create_session(
 ):
     """Create a new session"""
     # Generate a session ID if not provided
-    session_id = request.session_id or str(uuid4())
+    session_id = request.session_id or next_uuid()
     
     # Create the session
     session = await context_switching_service.create_session(session_id, request.initial_role_id)
@@ -102,7 +65,7 @@ async def generate_stream_response_with_context(
     custom_instructions: Optional[str],
     force_role_id: Optional[str],
     context_switching_service: ContextSwitchingService
-) -> AsyncGenerator[str, None]:
+) -> AsyncGenerator[bytes, None]:
     """Generate a streaming response for a query with context switching"""
     try:
         async for chunk in context_switching_service.process_query_stream_with_context_switching(
@@ -111,27 +74,61 @@ async def generate_stream_response_with_context(
             custom_instructions,
             force_role_id
         ):
-            yield f"data: {chunk}\n\n"
-        yield "data: [DONE]\n\n"
-    except ValueError as e:
-        yield f"data: {{\"error\": \"{str(e)}\"}}\n\n"
-        yield "data: [DONE]\n\n"
+            yield sse_frame(chunk)
+        yield SSE_DONE
+    except Exception as e:
+        # Serialize the error properly so quotes in the message cannot break the JSON
+        yield SSE_DATA_PREFIX + orjson.dumps({"error": str(e)}) + SSE_SEPARATOR
+        yield SSE_DONE
+
+async def generate_ndjson_response_with_context(
+    session_id: str, 
+    query: str, 
+    custom_instructions: Optional[str],
+    force_role_id: Optional[str],
+    context_switching_service: ContextSwitchingService
+) -> AsyncGenerator[bytes, None]:
+    """Generate a newline-delimited JSON response for a query with context switching"""
+    try:
+        async for chunk in context_switching_service.process_query_stream_with_context_switching(
+            session_id,
+            query,
+            custom_instructions,
+            force_role_id
+        ):
+            yield orjson.dumps({"delta": chunk}) + b"\n"
+    except Exception as e:
+        yield orjson.dumps({"error": str(e)}) + b"\n"
 
 @router.post("/process/stream", summary="Process a query with context switching and streaming response")
 async def process_with_context_stream(
     request: ProcessWithContextRequest, 
+    http_request: Request,
     context_switching_service: ContextSwitchingService = Depends(get_context_switching_service)
 ):
-    """Process a query with context switching and streaming response"""
+    """Process a query with context switching and streaming response
+    
+    Streams server-sent events by default, or newline-delimited JSON objects
+    ({"delta": ...}) when the client accepts application/x-ndjson.
+    """
+    args = (
+        request.session_id,
+        request.query,
+        request.custom_instructions,
+        request.force_role_id,
+        context_switching_service
+    )
+    
+    # Pick the framing from the Accept header
+    if NDJSON_MEDIA_TYPE in http_request.headers.get("accept", ""):
+        content, media_type = generate_ndjson_response_with_context(*args), NDJSON_MEDIA_TYPE
+    else:
+        content, media_type = coalesce_frames(generate_stream_response_with_context(*args)), "text/event-stream"
+    
     return StreamingResponse(
-        generate_stream_response_with_context(
-            request.session_id,
-            request.query,
-            request.custom_instructions,
-            request.force_role_id,
-            context_switching_service
-        ),
-        media_type="text/event-stream"
+        content,
+        media_type=media_type,
+        headers=SSE_HEADERS
     )
 
 @router.post("/switch", response_model=SwitchContextResponse, summary="Manually switch context")
@@ -179,7 +176,7 @@ async def get_session(
         "session_id": session_id,
         "current_role_id": session["current_role_id"],
         "last_switch_reason": session.get("last_switch_reason"),
-        "switch_count": len(session["history"])
+        "switch_count": session["switch_count"]
     }
 
 @router.get("/sessions/{session_id}/history", summary="Get context switch history")
@@ -190,7 +187,9 @@ async def get_context_switch_history(
     """Get the context switch history for a session"""
     try:
         history = await context_switching_service.get_context_switch_history(session_id)
-        return {"history": history}
+        
+        # Serialize straight to orjson, skipping FastAPI's jsonable_encoder walk
+        return ORJSONResponse({"history": [event.model_dump() for event in history]})
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
@@ -1,27 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response
 from typing import Dict, List, Any, Optional
 from app.models.role import Role
+from app.models.domain import DomainAnalysisRequest
 from app.services.role_service import RoleService
 from app.services.domain_analysis_service import DomainAnalysisService
 
 router = APIRouter()
 
 # Dependency to get the role service
-async def get_role_service():
-    from app.main import app
-    return app.state.role_service
+async def get_role_service(request: Request):
+    return request.app.state.role_service
+
+# The domain analysis service is stateless, so one instance serves every request
+_domain_analysis_service = DomainAnalysisService()
 
 # Dependency to get the domain analysis service
-def get_domain_analysis_service():
-    return DomainAnalysisService()
+async def get_domain_analysis_service():
+    return _domain_analysis_service
+
+# The templates are read-only, so the /domains payload is encoded once
+_templates = _domain_analysis_service.get_domain_templates()
+_TEMPLATES_BYTES = orjson.dumps({
+    "domains": list(_templates.keys()),
+    "templates": _templates
+})
 
 @router.get("/domains")
-async def get_domain_templates(domain_analysis_service: DomainAnalysisService = Depends(get_domain_analysis_service)):
+async def get_domain_templates():
     """Get all available domain templates"""
-    return {
-        "domains": list(domain_analysis_service.get_domain_templates().keys()),
-        "templates": domain_analysis_service.get_domain_templates()
-    }
+    return Response(content=_TEMPLATES_BYTES, media_type="application/json")
 
 @router.get("/domains/{domain}")
 async def get_domain_template(domain: str, domain_analysis_service: DomainAnalysisService = Depends(get_domain_analysis_service)):
@@ -37,19 +46,20 @@ async def get_domain_template(domain: str, domain_analysis_service: DomainAnalys
 
 @router.post("/analyze")
 async def analyze_content(
-    content: str = Body(..., embed=True),
-    role_id: str = Body(..., embed=True),
+    request: DomainAnalysisRequest,
     role_service: RoleService = Depends(get_role_service),
     domain_analysis_service: DomainAnalysisService = Depends(get_domain_analysis_service)
 ):
     """Analyze content based on role domains"""
     try:
         # Get the role
-        role = await role_service.get_role(role_id)
+        role = await role_service.get_role(request.role_id)
         
         # Analyze content
-        analysis = domain_analysis_service.analyze_content(content, role)
+        analysis = domain_analysis_service.analyze_content(request.content, role)
         
         return analysis
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
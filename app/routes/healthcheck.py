@@ -1,12 +1,22 @@
-from fastapi import APIRouter, Depends
+import orjson
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import Response
 from app.config import settings
 
 router = APIRouter()
 
+# The payload never changes, so it is encoded once
+_HEALTH_BYTES = orjson.dumps({
+    "status": "ok",
+    "version": settings.app_version
+})
+
 @router.get("/health", summary="Health check endpoint")
 async def health_check():
     """Check if the server is running"""
-    return {
-        "status": "ok",
-        "version": settings.app_version
-    }
+    return Response(content=_HEALTH_BYTES, media_type="application/json")
+
+@router.get("/health/llm", summary="LLM request counters")
+async def llm_health(request: Request):
+    """Report provider request counters (requests, queued, in_flight) and the concurrency cap"""
+    return {"max_concurrency": settings.llm_max_concurrency, **request.app.state.ai_processor.llm_stats}
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, Request, HTTPException, Query
+from fastapi import APIRouter, Depends, Request, HTTPException
 from typing import List, Optional, Literal
-from app.models.memory import Memory, MemoryCreate, MemoryResponse, MemoriesResponse, ClearMemoriesResponse
+from app.models.memory import Memory, MemoryCreate, MemoryResponse, MemoriesResponse, ClearMemoriesResponse, EmbeddingFormat
 from app.services.memory_service import MemoryService
 from app.services.ai_processor import AIProcessor
+from app.config import settings
+from app.utils.query import CommaSeparatedList
 
 router = APIRouter(prefix="/memories")
 
@@ -15,10 +17,12 @@ async def get_ai_processor(request: Request) -> AIProcessor:
     return request.app.state.ai_processor
 
 # Define additional response models for new endpoints
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 class SemanticSearchRequest(BaseModel):
     """Request model for semantic memory search"""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     query: str = Field(..., description="Query to search for")
     role_id: str = Field(..., description="ID of the role to search memories for")
     limit: int = Field(5, description="Maximum number of memories to return")
@@ -36,20 +40,42 @@ async def store_memory(
 ):
     """Store a memory for a specific role"""
     # Create embedding for the memory content
-    embedding = await ai_processor.create_embedding(memory_create.content)
+    embedding = await ai_processor.create_embedding_cached(memory_create.content)
     
     # Store the memory
     memory = await memory_service.store_memory(memory_create, embedding)
     
-    return MemoryResponse(memory=memory)
+    return MemoryResponse.model_construct(memory=memory.to_model())
+
+@router.post("/batch", response_model=MemoriesResponse, status_code=201, summary="Store several memories at once")
+async def store_memories_batch(
+    memory_creates: List[MemoryCreate],
+    memory_service: MemoryService = Depends(get_memory_service),
+    ai_processor: AIProcessor = Depends(get_ai_processor)
+):
+    """Store several memories, embedding their contents with batched API calls"""
+    if len(memory_creates) > settings.memory_batch_limit:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many memories in one batch (maximum {settings.memory_batch_limit})"
+        )
+    
+    # Create embeddings for all memory contents
+    embeddings = await ai_processor.create_embeddings([m.content for m in memory_creates])
+    
+    # Store the memories
+    memories = await memory_service.store_memories_bulk(memory_creates, embeddings)
+    
+    return MemoriesResponse.model_construct(memories=[memory.to_model() for memory in memories])
 
 @router.get("/{role_id}", response_model=MemoriesResponse, summary="Get memories for a specific role")
 async def get_memories(
     role_id: str, 
     memory_type: Optional[Literal["session", "user", "knowledge"]] = None,
     category: Optional[str] = None,
-    tags: Optional[List[str]] = Query(None),
+    tags: CommaSeparatedList = None,
     include_shared: bool = True,
+    embedding_format: EmbeddingFormat = "float",
     memory_service: MemoryService = Depends(get_memory_service)
 ):
     """Get memories for a specific role
@@ -60,6 +86,7 @@ async def get_memories(
         category: Optional category to filter by
         tags: Optional list of tags to filter by
         include_shared: Whether to include memories shared from other roles
+        embedding_format: Return embeddings as float lists or base64-encoded float32
     """
     memories = await memory_service.get_memories_by_role_id(
         role_id, 
@@ -69,14 +96,14 @@ async def get_memories(
         include_shared=include_shared
     )
     
-    return MemoriesResponse(memories=memories)
+    return MemoriesResponse.model_construct(memories=[memory.to_model(embedding_format) for memory in memories])
 
 @router.delete("/{role_id}", response_model=ClearMemoriesResponse, summary="Clear memories for a specific role")
 async def clear_memories(
     role_id: str, 
     memory_type: Optional[Literal["session", "user", "knowledge"]] = None,
     category: Optional[str] = None,
-    tags: Optional[List[str]] = Query(None),
+    tags: CommaSeparatedList = None,
     shared_only: bool = False,
     memory_service: MemoryService = Depends(get_memory_service)
 ):
@@ -105,6 +132,8 @@ async def clear_memories(
 @router.post("/semantic-search", response_model=MemoriesResponse, summary="Search memories semantically across roles")
 async def semantic_search(
     search_request: SemanticSearchRequest,
+    embedding_format: EmbeddingFormat = "float",
+    exact: bool = False,
     memory_service: MemoryService = Depends(get_memory_service),
     ai_processor: AIProcessor = Depends(get_ai_processor)
 ):
@@ -115,9 +144,11 @@ async def semantic_search(
     
     Args:
         search_request: The search parameters including query and filters
+        embedding_format: Return embeddings as float lists or base64-encoded float32
+        exact: Bypass the cache that reuses results of near-identical recent queries
     """
     # Create embedding for the query
-    embedding = await ai_processor.create_embedding(search_request.query)
+    embedding = await ai_processor.create_embedding_cached(search_request.query)
     
     # Get relevant memories
     memories = await memory_service.get_relevant_memories(
@@ -129,10 +160,11 @@ async def semantic_search(
         tags=search_request.tags,
         include_shared=search_request.include_shared,
         cross_role=search_request.cross_role,
-        related_role_ids=search_request.related_role_ids
+        related_role_ids=search_request.related_role_ids,
+        exact=exact
     )
     
-    return MemoriesResponse(memories=memories)
+    return MemoriesResponse.model_construct(memories=[memory.to_model(embedding_format) for memory in memories])
 
 @router.post("/{role_id}/share", response_model=MemoryResponse, summary="Share a memory with other roles")
 async def share_memory(
@@ -148,17 +180,14 @@ async def share_memory(
         memory_id: ID of the memory to share
         target_role_ids: List of role IDs to share the memory with
     """
-    # Get all memories for the role
-    memories = await memory_service.get_memories_by_role_id(role_id)
-    
-    # Find the specific memory
-    memory_to_share = next((m for m in memories if m.id == memory_id), None)
+    # Look up the specific memory
+    memory_to_share = await memory_service.get_memory_by_id(memory_id, role_id=role_id)
     
     if not memory_to_share:
         raise HTTPException(status_code=404, detail="Memory not found")
     
-    # Update the memory's shared_with list
-    memory_to_share.shared_with.extend([rid for rid in target_role_ids if rid not in memory_to_share.shared_with])
+    # Add the target roles to the memory's shared_with set
+    shared_with = memory_to_share.shared_with.union(target_role_ids)
     
     # Re-store the memory to trigger sharing logic
     memory_create = MemoryCreate(
@@ -166,31 +195,30 @@ async def share_memory(
         content=memory_to_share.content,
         type=memory_to_share.type,
         importance=memory_to_share.importance,
-        tags=memory_to_share.tags,
+        tags=sorted(memory_to_share.tags),
         category=memory_to_share.category,
-        shared_with=memory_to_share.shared_with,
+        shared_with=sorted(shared_with),
         parent_memory_id=memory_to_share.parent_memory_id
     )
     
     # Store with existing embedding
     updated_memory = await memory_service.store_memory(memory_create, memory_to_share.embedding)
     
-    return MemoryResponse(memory=updated_memory)
+    return MemoryResponse.model_construct(memory=updated_memory.to_model())
 
 @router.get("/shared/{role_id}", response_model=MemoriesResponse, summary="Get memories shared with a role")
 async def get_shared_memories(
     role_id: str,
+    embedding_format: EmbeddingFormat = "float",
     memory_service: MemoryService = Depends(get_memory_service)
 ):
     """Get memories that have been shared with a specific role
     
     Args:
         role_id: ID of the role to get shared memories for
+        embedding_format: Return embeddings as float lists or base64-encoded float32
     """
-    # Get all memories for the role
-    all_memories = await memory_service.get_memories_by_role_id(role_id)
-    
-    # Filter to only include shared memories (those with a parent_memory_id)
-    shared_memories = [m for m in all_memories if m.parent_memory_id]
+    # Get only the shared memories (those with a parent_memory_id)
+    shared_memories = await memory_service.get_shared_memories_by_role_id(role_id)
     
-    return MemoriesResponse(memories=shared_memories)
+    return MemoriesResponse.model_construct(memories=[memory.to_model(embedding_format) for memory in shared_memories])
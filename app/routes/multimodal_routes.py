@@ -1,13 +1,30 @@
+import asyncio
+import orjson
 from fastapi import APIRouter, Depends, Request, HTTPException, Response, File, UploadFile, Form
 from typing import List, Optional, AsyncGenerator, Dict, Any
 from fastapi.responses import StreamingResponse
-import base64
 from app.models.multimodal import MultiModalContent, MultiModalProcessRequest, MultiModalProcessResponse
 from app.services.multimodal_processor import MultiModalProcessor
 from app.services.role_service import RoleService
+from app.config import settings
+from app.utils.sse import SSE_DONE, SSE_HEADERS, coalesce_frames, sse_frame
+
+# Import pybase64 (SIMD-accelerated, same API) with a fallback to the standard library
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
 
 router = APIRouter(prefix="/multimodal")
 
+# Upload read size; a multiple of 3 so every chunk but the last base64-encodes without padding
+UPLOAD_CHUNK_SIZE = 3 * (1 << 18)
+
+def is_allowed_upload_type(content_type: str) -> bool:
+    """Check a content type against the configured upload allowlist"""
+    family = content_type.split("/", 1)[0] + "/*"
+    return content_type in settings.upload_allowed_types or family in settings.upload_allowed_types
+
 async def get_multimodal_processor(request: Request) -> MultiModalProcessor:
     """Dependency for getting the multi-modal processor"""
     return request.app.state.multimodal_processor
@@ -62,7 +79,7 @@ async def generate_multimodal_stream_response(
     provider_name: Optional[str],
     multimodal_processor: MultiModalProcessor,
     role_service: RoleService
-) -> AsyncGenerator[str, None]:
+) -> AsyncGenerator[bytes, None]:
     """Generate a streaming response for multi-modal content"""
     # Get the role to use its system prompt
     role = await role_service.get_role(role_id)
@@ -74,8 +91,8 @@ async def generate_multimodal_stream_response(
     
     # Process the multi-modal content with streaming
     async for chunk in multimodal_processor.process_multimodal_content_stream(system_prompt, content, provider_name):
-        yield f"data: {chunk}\n\n"
-    yield "data: [DONE]\n\n"
+        yield sse_frame(chunk)
+    yield SSE_DONE
 
 @router.post("/process/stream", summary="Process multi-modal content using a specific role with streaming response")
 async def process_multimodal_content_stream(
@@ -85,42 +102,63 @@ async def process_multimodal_content_stream(
 ):
     """Process multi-modal content using a specific role with streaming response"""
     return StreamingResponse(
-        generate_multimodal_stream_response(
+        coalesce_frames(generate_multimodal_stream_response(
             request.role_id,
             request.content,
             request.custom_instructions,
             request.provider_name,
             multimodal_processor,
             role_service
-        ),
-        media_type="text/event-stream"
+        )),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
     )
 
+async def generate_upload_response(header: bytes, encoded_chunks: List[bytes]) -> AsyncGenerator[bytes, None]:
+    """Stream the upload response JSON around the already-encoded base64 chunks"""
+    # Reopen the header object to append base64_data as its last field
+    yield header[:-1] + b',"base64_data":"'
+    for chunk in encoded_chunks:
+        yield chunk
+    yield b'"}'
+
 @router.post("/upload", summary="Upload a file for multi-modal processing")
 async def upload_file(
     file: UploadFile = File(...),
     description: str = Form(None)
 ):
     """Upload a file for multi-modal processing"""
+    # Reject unsupported and oversized files before reading any of the content
+    content_type = file.content_type or "application/octet-stream"
+    if not is_allowed_upload_type(content_type):
+        raise HTTPException(status_code=415, detail=f"Unsupported file type: {content_type}")
+    if file.size is not None and file.size > settings.upload_max_bytes:
+        raise HTTPException(status_code=413, detail=f"File too large (maximum {settings.upload_max_bytes} bytes)")
+    
     try:
-        # Read the file content
-        file_content = await file.read()
-        
-        # Encode the file content as base64
-        base64_content = base64.b64encode(file_content).decode("utf-8")
+        # Read and encode the file a chunk at a time, so the raw content is never held in full
+        encoded_chunks = []
+        size = 0
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > settings.upload_max_bytes:
+                raise HTTPException(status_code=413, detail=f"File too large (maximum {settings.upload_max_bytes} bytes)")
+            # Encode off the event loop so large files don't stall other requests
+            encoded_chunks.append(await asyncio.to_thread(base64.b64encode, chunk))
         
-        # Determine the file type
-        content_type = file.content_type or "application/octet-stream"
-        
-        return {
+        header = orjson.dumps({
             "filename": file.filename,
             "content_type": content_type,
-            "size": len(file_content),
-            "base64_data": base64_content,
+            "size": size,
             "description": description
-        }
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error uploading file: {str(e)}")
+    
+    # Stream the chunks instead of joining them into one string for the JSON encoder
+    return StreamingResponse(generate_upload_response(header, encoded_chunks), media_type="application/json")
 
 @router.get("/providers", summary="Get available LLM providers for multi-modal processing")
 async def get_available_providers(
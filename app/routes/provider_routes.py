@@ -3,6 +3,7 @@ from typing import Dict, List, Optional
 from app.services.ai_processor import AIProcessor
 from app.models.request_models import GenerateRequest, StreamGenerateRequest
 from fastapi.responses import StreamingResponse
+from app.utils.sse import SSE_HEADERS, coalesce_frames, sse_frame
 
 router = APIRouter()
 
@@ -65,10 +66,10 @@ async def generate_response_stream(request: Request, stream_request: StreamGener
                 stream_request.role_id,
                 stream_request.provider_name
             ):
-                yield f"data: {chunk}\n\n"
+                yield sse_frame(chunk)
         except ValueError as e:
-            yield f"data: Error: {str(e)}\n\n"
+            yield sse_frame(f"Error: {str(e)}")
         except Exception as e:
-            yield f"data: Error generating response: {str(e)}\n\n"
+            yield sse_frame(f"Error generating response: {str(e)}")
     
-    return StreamingResponse(generate_stream(), media_type="text/event-stream")
+    return StreamingResponse(coalesce_frames(generate_stream()), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends, Request, HTTPException, Response, Query
-from typing import List, Optional, AsyncGenerator
+import hashlib
+import secrets
+import orjson
+from fastapi import APIRouter, Depends, Request, HTTPException, Response
+from typing import Optional, AsyncGenerator
 from fastapi.responses import StreamingResponse
 from app.models.role import Role, RoleCreate, RoleUpdate, RoleResponse, RolesResponse, ProcessRequest, ProcessResponse
 from app.services.role_service import RoleService
 from app.config import TONE_PROFILES
+from app.utils.query import CommaSeparatedList
+from app.utils.sse import SSE_DATA_PREFIX, SSE_DONE, SSE_HEADERS, SSE_SEPARATOR, coalesce_frames, sse_frame
 
 router = APIRouter(prefix="/roles")
 
@@ -11,10 +16,43 @@ async def get_role_service(request: Request) -> RoleService:
     """Dependency for getting the role service"""
     return request.app.state.role_service
 
-@router.get("", response_model=RolesResponse, summary="Get all available roles with optional filtering")
+# Tone profiles are immutable, so the /tones payload and its ETag are computed once
+_TONES_BYTES = orjson.dumps({"tones": {name: profile.model_dump() for name, profile in TONE_PROFILES.items()}})
+_TONES_ETAG = f'"{hashlib.blake2b(_TONES_BYTES, digest_size=16).hexdigest()}"'
+_TONES_HEADERS = {"ETag": _TONES_ETAG, "Cache-Control": "public, max-age=3600, immutable"}
+
+# Role reads can be briefly reused, then revalidated against the roles version
+ROLES_CACHE_CONTROL = "private, max-age=5, stale-while-revalidate=30"
+# Differs per process, so a validator issued by another worker (or before a restart) never matches
+_ETAG_SALT = secrets.token_hex(4)
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check whether the client's cached copy (If-None-Match) is still current"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in tags or "*" in tags
+
+async def check_roles_etag(request: Request, response: Response, role_service: RoleService = Depends(get_role_service)):
+    """Dependency adding cache validators to role reads, answering 304 when the client's copy is current
+    
+    The ETag combines the roles version (bumped on every role change) with the path
+    and normalized query, so it changes exactly when the response could.
+    """
+    query = "&".join(sorted(f"{key}={value}" for key, value in request.query_params.multi_items()))
+    digest = hashlib.blake2b(f"{request.url.path}?{query}".encode(), digest_size=8).hexdigest()
+    etag = f'W/"{_ETAG_SALT}-{role_service.version}-{digest}"'
+    
+    headers = {"ETag": etag, "Cache-Control": ROLES_CACHE_CONTROL}
+    if etag_matches(request, etag):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+@router.get("", response_model=RolesResponse, dependencies=[Depends(check_roles_etag)], summary="Get all available roles with optional filtering")
 async def get_roles(
     search: Optional[str] = None,
-    domains: Optional[List[str]] = Query(None),
+    domains: CommaSeparatedList = None,
     tone: Optional[str] = None,
     role_service: RoleService = Depends(get_role_service)
 ):
@@ -25,25 +63,19 @@ async def get_roles(
     - **tone**: Optional tone to filter by
     """
     roles = await role_service.get_roles(search_query=search, domains=domains, tone=tone)
-    return RolesResponse(roles=roles)
-
-@router.get("/{role_id}", response_model=RoleResponse, summary="Get a specific role by ID")
-async def get_role(role_id: str, role_service: RoleService = Depends(get_role_service)):
-    """Get a specific role by ID"""
-    role = await role_service.get_role(role_id)
-    return RoleResponse(role=role)
+    return RolesResponse.model_construct(roles=roles)
 
 @router.post("", response_model=RoleResponse, status_code=201, summary="Create a new custom role")
 async def create_role(role_create: RoleCreate, role_service: RoleService = Depends(get_role_service)):
     """Create a new custom role"""
     role = await role_service.create_role(role_create)
-    return RoleResponse(role=role)
+    return RoleResponse.model_construct(role=role)
 
 @router.patch("/{role_id}", response_model=RoleResponse, summary="Update an existing role")
 async def update_role(role_id: str, role_update: RoleUpdate, role_service: RoleService = Depends(get_role_service)):
     """Update an existing role"""
     role = await role_service.update_role(role_id, role_update)
-    return RoleResponse(role=role)
+    return RoleResponse.model_construct(role=role)
 
 @router.delete("/{role_id}", summary="Delete a custom role")
 async def delete_role(role_id: str, role_service: RoleService = Depends(get_role_service)):
@@ -54,11 +86,17 @@ async def delete_role(role_id: str, role_service: RoleService = Depends(get_role
 @router.post("/process", response_model=ProcessResponse, summary="Process a query using a specific role")
 async def process_query(request: ProcessRequest, role_service: RoleService = Depends(get_role_service)):
     """Process a query using a specific role"""
-    response = await role_service.process_query(
-        request.role_id,
-        request.query,
-        request.custom_instructions
-    )
+    try:
+        response = await role_service.process_query(
+            request.role_id,
+            request.query,
+            request.custom_instructions
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        # The LLM provider failed; report it as an upstream error
+        raise HTTPException(status_code=502, detail=f"Error generating response: {str(e)}")
     
     return ProcessResponse(
         role_id=request.role_id,
@@ -66,57 +104,70 @@ async def process_query(request: ProcessRequest, role_service: RoleService = Dep
         response=response
     )
 
-async def generate_stream_response(role_id: str, query: str, custom_instructions: Optional[str], role_service: RoleService) -> AsyncGenerator[str, None]:
+async def generate_stream_response(role_id: str, query: str, custom_instructions: Optional[str], role_service: RoleService) -> AsyncGenerator[bytes, None]:
     """Generate a streaming response for a query"""
-    async for chunk in role_service.process_query_stream(role_id, query, custom_instructions):
-        yield f"data: {chunk}\n\n"
-    yield "data: [DONE]\n\n"
+    try:
+        async for chunk in role_service.process_query_stream(role_id, query, custom_instructions):
+            yield sse_frame(chunk)
+        yield SSE_DONE
+    except Exception as e:
+        # Serialize the error properly so quotes in the message cannot break the JSON
+        yield SSE_DATA_PREFIX + orjson.dumps({"error": str(e)}) + SSE_SEPARATOR
+        yield SSE_DONE
 
 @router.post("/process/stream", summary="Process a query using a specific role with streaming response")
 async def process_query_stream(request: ProcessRequest, role_service: RoleService = Depends(get_role_service)):
     """Process a query using a specific role with streaming response"""
     return StreamingResponse(
-        generate_stream_response(
+        coalesce_frames(generate_stream_response(
             request.role_id,
             request.query,
             request.custom_instructions,
             role_service
-        ),
-        media_type="text/event-stream"
+        )),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
     )
 
 @router.get("/tones", summary="Get all available tone profiles")
-async def get_tones():
+async def get_tones(request: Request):
     """Get all available tone profiles"""
-    return {"tones": TONE_PROFILES}
+    # Let clients revalidate their cached copy without resending the body
+    if etag_matches(request, _TONES_ETAG):
+        return Response(status_code=304, headers=_TONES_HEADERS)
+    
+    return Response(content=_TONES_BYTES, media_type="application/json", headers=_TONES_HEADERS)
 
-@router.get("/search", response_model=RolesResponse, summary="Search for roles")
+@router.get("/search", response_model=RolesResponse, dependencies=[Depends(check_roles_etag)], summary="Search for roles")
 async def search_roles(
     query: str,
-    domains: Optional[List[str]] = Query(None),
+    domains: CommaSeparatedList = None,
     tone: Optional[str] = None,
     role_service: RoleService = Depends(get_role_service)
 ):
     """Search for roles based on query text, domains, and tone
     
+    Alias of GET /roles with a required search text.
+    
     - **query**: Text to search in name, description, and instructions
     - **domains**: Optional list of domains to filter by
     - **tone**: Optional tone to filter by
     """
-    roles = await role_service.get_roles(search_query=query, domains=domains, tone=tone)
-    return RolesResponse(roles=roles)
+    return await get_roles(search=query, domains=domains, tone=tone, role_service=role_service)
 
-@router.get("/domains", summary="Get all unique domains across roles")
+@router.get("/domains", dependencies=[Depends(check_roles_etag)], summary="Get all unique domains across roles")
 async def get_domains(role_service: RoleService = Depends(get_role_service)):
     """Get all unique domains used across all roles"""
-    roles = await role_service.get_roles()
-    # Extract all domains from all roles and create a unique set
-    all_domains = set()
-    for role in roles:
-        all_domains.update(role.domains)
-    return {"domains": sorted(list(all_domains))}
-
-@router.get("/{role_id}/inheritance-chain", response_model=RolesResponse, summary="Get the inheritance chain for a role")
+    return {"domains": await role_service.get_all_domains()}
+
+# Declared after the static paths above, which it would otherwise shadow
+@router.get("/{role_id}", response_model=RoleResponse, dependencies=[Depends(check_roles_etag)], summary="Get a specific role by ID")
+async def get_role(role_id: str, role_service: RoleService = Depends(get_role_service)):
+    """Get a specific role by ID"""
+    role = await role_service.get_role(role_id)
+    return RoleResponse.model_construct(role=role)
+
+@router.get("/{role_id}/inheritance-chain", response_model=RolesResponse, dependencies=[Depends(check_roles_etag)], summary="Get the inheritance chain for a role")
 async def get_inheritance_chain(
     role_id: str, 
     role_service: RoleService = Depends(get_role_service)
@@ -132,7 +183,7 @@ async def get_inheritance_chain(
     # Get the inheritance chain
     roles = await memory_service.get_role_inheritance_chain(role_id, role_service)
     
-    return RolesResponse(roles=roles)
+    return RolesResponse.model_construct(roles=roles)
 
 @router.get("/{role_id}/related-roles", response_model=RolesResponse, summary="Get roles related to a specific role")
 async def get_related_roles(
@@ -150,20 +201,16 @@ async def get_related_roles(
     related_role_ids = await memory_service.get_related_roles(role_id, role_service)
     
     # Get the actual role objects
-    related_roles = []
-    for related_id in related_role_ids:
-        role = await role_service.get_role(related_id)
-        if role:
-            related_roles.append(role)
+    related_roles = await role_service.get_roles_by_ids(related_role_ids)
     
-    return RolesResponse(roles=related_roles)
+    return RolesResponse.model_construct(roles=related_roles)
 
 @router.patch("/{role_id}/memory-access", response_model=RoleResponse, summary="Update memory access settings for a role")
 async def update_memory_access(
     role_id: str,
     inherit_memories: Optional[bool] = None,
     memory_access_level: Optional[str] = None,
-    memory_categories: Optional[List[str]] = Query(None),
+    memory_categories: CommaSeparatedList = None,
     role_service: RoleService = Depends(get_role_service)
 ):
     """Update memory access settings for a role
@@ -183,13 +230,14 @@ async def update_memory_access(
     if memory_categories is not None:
         update_data["memory_categories"] = memory_categories
     
-    # Create a RoleUpdate object with the update data
-    role_update = RoleUpdate(**update_data)
+    # Create a RoleUpdate object with the update data (the query parameters are already
+    # typed, and update_role validates the merged role, so skip validating it twice)
+    role_update = RoleUpdate.model_construct(**update_data)
     
     # Update the role
     role = await role_service.update_role(role_id, role_update)
     
-    return RoleResponse(role=role)
+    return RoleResponse.model_construct(role=role)
 
 @router.patch("/{role_id}/parent-role/{parent_id}", response_model=RoleResponse, summary="Set the parent role for inheritance")
 async def set_parent_role(
@@ -203,24 +251,23 @@ async def set_parent_role(
         role_id: ID of the role to update
         parent_id: ID of the parent role
     """
-    # Check if the parent role exists
-    parent_role = await role_service.get_role(parent_id)
-    if not parent_role:
+    # The parent's (cached) inheritance chain starts with the parent itself, so it
+    # answers both whether the parent exists and whether the link would be circular
+    inheritance_chain = await role_service.get_inheritance_chain(parent_id)
+    if not inheritance_chain:
         raise HTTPException(status_code=404, detail="Parent role not found")
     
     # Check for circular inheritance
-    memory_service = role_service.memory_service
-    inheritance_chain = await memory_service.get_role_inheritance_chain(parent_id, role_service)
-    if any(role.id == role_id for role in inheritance_chain):
+    if role_id in {role.id for role in inheritance_chain}:
         raise HTTPException(status_code=400, detail="Circular inheritance detected")
     
     # Create a RoleUpdate object with the parent role ID
-    role_update = RoleUpdate(parent_role_id=parent_id)
+    role_update = RoleUpdate.model_construct(parent_role_id=parent_id)
     
     # Update the role
     role = await role_service.update_role(role_id, role_update)
     
-    return RoleResponse(role=role)
+    return RoleResponse.model_construct(role=role)
 
 @router.delete("/{role_id}/parent-role", response_model=RoleResponse, summary="Remove the parent role inheritance")
 async def remove_parent_role(
@@ -233,9 +280,9 @@ async def remove_parent_role(
         role_id: ID of the role to update
     """
     # Create a RoleUpdate object with null parent role ID
-    role_update = RoleUpdate(parent_role_id=None, inherit_memories=False)
+    role_update = RoleUpdate.model_construct(parent_role_id=None, inherit_memories=False)
     
     # Update the role
     role = await role_service.update_role(role_id, role_update)
     
-    return RoleResponse(role=role)
+    return RoleResponse.model_construct(role=role)
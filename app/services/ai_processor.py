@@ -1,15 +1,65 @@
 import asyncio
+import hashlib
 import json
-from typing import List, Dict, Any, Optional, AsyncGenerator
+import logging
+import re
+import time
+import orjson
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional, AsyncGenerator, Awaitable, Callable, Tuple, Sequence, Set, TYPE_CHECKING
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 from app.config import settings
-from app.services.web_browser.browser_integration import BrowserIntegration
+from app.models.memory import compact_embedding
 from app.services.llm_providers.provider_factory import LLMProviderFactory
 from app.services.llm_providers.base_provider import BaseLLMProvider
+from app.services.llm_cache import LLMCache, MemoryBackend, RedisBackend, REDIS_AVAILABLE
+from app.utils.similarity_cache import SimilarityCache
+
+if TYPE_CHECKING:
+    from app.services.web_browser.browser_integration import BrowserIntegration
+
+logger = logging.getLogger(__name__)
+
+# Number of texts sent to the embeddings API in a single call
+EMBEDDING_BATCH_SIZE = 96
+# Seconds single embedding requests wait for others to share their API call
+EMBEDDING_BATCH_WINDOW = 0.01
+
+# Browser commands embedded in user prompts, e.g. [SEARCH_WEB: query]
+BROWSER_COMMAND_PATTERN = re.compile(r"\[(SEARCH_WEB|BROWSE_URL|CLICK_ELEMENT|EXTRACT_ELEMENT|FILL_FORM):([^\]]*)\]")
+
+# Content extraction modes accepted by [BROWSE_URL: url|mode]
+BROWSE_EXTRACT_MODES = ('auto', 'article', 'full', 'structured')
+
+# Commands that act on whatever page the previous command loaded
+PAGE_COMMANDS = frozenset(("CLICK_ELEMENT", "EXTRACT_ELEMENT", "FILL_FORM"))
+
+# Query parameters that only track the visitor (plus any utm_* parameter)
+TRACKING_PARAMS = frozenset(("fbclid", "gclid", "mc_cid", "mc_eid"))
+
+def normalize_url(url: str) -> str:
+    """Normalize a URL for use as a cache key
+    
+    Lower-cases the scheme and host, and drops the fragment and tracking parameters.
+    
+    Args:
+        url: The URL to normalize
+        
+    Returns:
+        The normalized URL
+    """
+    parts = urlsplit(url)
+    query = [
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name not in TRACKING_PARAMS and not name.startswith("utm_")
+    ]
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(query), ""))
 
 class AIProcessor:
     """Service for processing AI requests using various LLM providers"""
     
-    def __init__(self, browser_integration: Optional[BrowserIntegration] = None):
+    def __init__(self, browser_integration: Optional["BrowserIntegration"] = None):
         """Initialize the AI processor
         
         Args:
@@ -18,43 +68,96 @@ class AIProcessor:
         self.default_provider_name = settings.default_provider
         self.browser_integration = browser_integration
         
-        # Initialize providers based on available API keys
-        self.providers = {}
+        # Browser command handlers by command name (see BROWSER_COMMAND_PATTERN)
+        self._browser_command_handlers: Dict[str, Callable[[str, str, bool], Awaitable[Optional[str]]]] = {
+            "SEARCH_WEB": self._search_web_command,
+            "BROWSE_URL": self._browse_url_command,
+            "CLICK_ELEMENT": self._click_element_command,
+            "EXTRACT_ELEMENT": self._extract_element_command,
+            "FILL_FORM": self._fill_form_command,
+        }
         
-        # Initialize OpenAI provider if API key is available
+        # Register providers based on available API keys; each provider (and its SDK)
+        # is only loaded the first time it is used
+        # Format: {provider_name: (api_key, model)}
+        self.provider_configs: Dict[str, Tuple[str, Optional[str]]] = {}
+        self.providers: Dict[str, BaseLLMProvider] = {}
+        
+        # Register OpenAI provider if API key is available
         if settings.openai_api_key:
-            self.providers["openai"] = LLMProviderFactory.create_provider(
-                "openai", 
-                settings.openai_api_key, 
-                settings.openai_model
-            )
+            self.provider_configs["openai"] = (settings.openai_api_key, settings.openai_model)
         
-        # Initialize Anthropic provider if API key is available
+        # Register Anthropic provider if API key is available
         if settings.anthropic_api_key:
-            self.providers["anthropic"] = LLMProviderFactory.create_provider(
-                "anthropic", 
-                settings.anthropic_api_key, 
-                settings.anthropic_model
-            )
+            self.provider_configs["anthropic"] = (settings.anthropic_api_key, settings.anthropic_model)
         
-        # Initialize Gemini provider if API key is available
+        # Register Gemini provider if API key is available
         if settings.gemini_api_key:
-            self.providers["gemini"] = LLMProviderFactory.create_provider(
-                "gemini", 
-                settings.gemini_api_key, 
-                settings.gemini_model
-            )
+            self.provider_configs["gemini"] = (settings.gemini_api_key, settings.gemini_model)
         
         # Ensure we have at least one provider available
-        if not self.providers:
+        if not self.provider_configs:
             raise ValueError("No LLM providers available. Please configure at least one provider API key.")
         
         # Use the default provider if available, otherwise use the first available provider
-        if self.default_provider_name in self.providers:
-            self.default_provider = self.providers[self.default_provider_name]
-        else:
-            self.default_provider_name = next(iter(self.providers.keys()))
-            self.default_provider = self.providers[self.default_provider_name]
+        if self.default_provider_name not in self.provider_configs:
+            self.default_provider_name = next(iter(self.provider_configs.keys()))
+        
+        # LRU cache of embeddings keyed by a digest of the text, plus the requests in flight
+        # Format: {text_digest: (expires_at, embedding)}
+        self._embedding_cache: "OrderedDict[bytes, Tuple[float, Sequence[float]]]" = OrderedDict()
+        self._embedding_requests: Dict[bytes, "asyncio.Task[Sequence[float]]"] = {}
+        
+        # Single embedding requests waiting to be sent together, the timer that sends
+        # them, and the batches being sent
+        self._embedding_batch: List[Tuple[str, "asyncio.Future[List[float]]"]] = []
+        self._embedding_flush: Optional[asyncio.TimerHandle] = None
+        self._embedding_tasks: Set[asyncio.Task] = set()
+        
+        # Completion requests in flight, by request key (LLMCache.cache_key)
+        self._completion_requests: Dict[str, "asyncio.Task[str]"] = {}
+        
+        # Recent search and page results (without screenshots), reused by prompts that don't
+        # interact with the page afterwards
+        # Format: {(role_id, command, normalized_argument): (expires_at, result)}
+        self._browser_cache: "OrderedDict[Tuple[str, str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        
+        # Caps concurrent provider requests, so a burst queues here instead of
+        # tripping provider rate limits
+        self._llm_semaphore = asyncio.Semaphore(settings.llm_max_concurrency)
+        # Counters for the requests through the semaphore (requests that had to wait are queued)
+        self.llm_stats: Dict[str, int] = {"requests": 0, "queued": 0, "in_flight": 0}
+        
+        # Exact-match cache of completions (None when disabled)
+        self.cache: Optional[LLMCache] = None
+        if settings.llm_cache_enabled:
+            if settings.use_redis and REDIS_AVAILABLE:
+                backend = RedisBackend(settings.redis_url)
+            else:
+                backend = MemoryBackend(maxsize=settings.llm_cache_size)
+            self.cache = LLMCache(backend, ttl_seconds=settings.llm_cache_ttl)
+        
+        # Completions matched by prompt embedding similarity (None when disabled)
+        self.semantic_cache: Optional[SimilarityCache[str]] = None
+        if settings.llm_semantic_cache_enabled:
+            self.semantic_cache = SimilarityCache(
+                settings.llm_semantic_cache_size,
+                settings.llm_semantic_cache_similarity,
+                settings.llm_cache_ttl
+            )
+    
+    @asynccontextmanager
+    async def _llm_slot(self):
+        """Hold one of the concurrent provider request slots, updating llm_stats"""
+        self.llm_stats["requests"] += 1
+        if self._llm_semaphore.locked():
+            self.llm_stats["queued"] += 1
+        async with self._llm_semaphore:
+            self.llm_stats["in_flight"] += 1
+            try:
+                yield
+            finally:
+                self.llm_stats["in_flight"] -= 1
     
     async def generate_response(self, system_prompt: str, user_prompt: str, role_id: Optional[str] = None, provider_name: Optional[str] = None) -> str:
         """Generate a response using the configured LLM provider
@@ -71,149 +174,260 @@ class AIProcessor:
         try:
             # Get the provider to use
             provider = self.get_provider(provider_name)
+            original_prompt = user_prompt
             
-            # Check if the user prompt contains a web browsing request
-            web_result = None
+            # Replace any browser commands with their results
             if self.browser_integration and role_id:
-                # Handle search web command
-                if "[SEARCH_WEB:" in user_prompt:
-                    # Extract search query
-                    search_start = user_prompt.find("[SEARCH_WEB:")
-                    search_end = user_prompt.find("]", search_start)
-                    if search_end > search_start:
-                        search_query = user_prompt[search_start + 12:search_end].strip()
-                        web_result = await self.browser_integration.search_web(role_id, search_query)
-                        # Add the search results to the user prompt
-                        web_info = f"\n\n[WEB_SEARCH_RESULTS]\nQuery: {search_query}\n"
-                        if web_result["success"]:
-                            web_info += f"Title: {web_result['title']}\nURL: {web_result['url']}\n\nResults:\n"
-                            for i, result in enumerate(web_result.get('results', []), 1):
-                                web_info += f"{i}. {result.get('title', 'No title')}\n   URL: {result.get('url', 'No URL')}\n   {result.get('snippet', 'No snippet')}\n\n"
-                        else:
-                            web_info += f"Error: {web_result.get('error', 'Unknown error')}\n"
-                        web_info += "[/WEB_SEARCH_RESULTS]"
-                        user_prompt = user_prompt.replace(user_prompt[search_start:search_end+1], web_info)
-                
-                # Handle browse URL command with different extraction modes
-                elif "[BROWSE_URL:" in user_prompt:
-                    # Extract URL and optional extraction mode
-                    url_start = user_prompt.find("[BROWSE_URL:")
-                    url_end = user_prompt.find("]", url_start)
-                    if url_end > url_start:
-                        url_params = user_prompt[url_start + 12:url_end].strip()
-                        
-                        # Check if extraction mode is specified
-                        extract_mode = 'auto'  # default
-                        if '|' in url_params:
-                            url, extract_mode = url_params.split('|', 1)
-                            url = url.strip()
-                            extract_mode = extract_mode.strip().lower()
-                            # Validate extract_mode
-                            if extract_mode not in ['auto', 'article', 'full', 'structured']:
-                                extract_mode = 'auto'
-                        else:
-                            url = url_params
-                        
-                        web_result = await self.browser_integration.browse_url(role_id, url, extract_mode)
-                        
-                        # Add the webpage content to the user prompt
-                        web_info = f"\n\n[WEB_PAGE_CONTENT]\nURL: {url}\n"
-                        if web_result["success"]:
-                            web_info += f"Title: {web_result['title']}\n"
-                            
-                            # Add metadata if available
-                            if web_result.get('metadata') and extract_mode in ['structured', 'full']:
-                                meta = web_result['metadata']
-                                if meta.get('description'):
-                                    web_info += f"Description: {meta.get('description')}\n"
-                                if meta.get('keywords'):
-                                    web_info += f"Keywords: {meta.get('keywords')}\n"
-                            
-                            # Add summary if available
-                            if web_result.get('summary'):
-                                web_info += f"\nSummary:\n{web_result.get('summary')}\n\n"
-                            
-                            # Add content
-                            web_info += f"\nContent:\n{web_result.get('content', 'No content extracted')}\n"
-                        else:
-                            web_info += f"Error: {web_result.get('error', 'Unknown error')}\n"
-                        web_info += "[/WEB_PAGE_CONTENT]"
-                        user_prompt = user_prompt.replace(user_prompt[url_start:url_end+1], web_info)
-                
-                # Handle click element command
-                elif "[CLICK_ELEMENT:" in user_prompt:
-                    selector_start = user_prompt.find("[CLICK_ELEMENT:")
-                    selector_end = user_prompt.find("]", selector_start)
-                    if selector_end > selector_start:
-                        selector = user_prompt[selector_start + 15:selector_end].strip()
-                        click_result = await self.browser_integration.click_element(role_id, selector)
-                        
-                        # Add the click result to the user prompt
-                        click_info = f"\n\n[ELEMENT_INTERACTION]\n"
-                        if click_result["success"]:
-                            click_info += f"Successfully clicked element: {selector}\n"
-                        else:
-                            click_info += f"Failed to click element: {selector}\nError: {click_result.get('error', 'Unknown error')}\n"
-                        click_info += "[/ELEMENT_INTERACTION]"
-                        user_prompt = user_prompt.replace(user_prompt[selector_start:selector_end+1], click_info)
-                
-                # Handle extract element text command
-                elif "[EXTRACT_ELEMENT:" in user_prompt:
-                    selector_start = user_prompt.find("[EXTRACT_ELEMENT:")
-                    selector_end = user_prompt.find("]", selector_start)
-                    if selector_end > selector_start:
-                        selector = user_prompt[selector_start + 17:selector_end].strip()
-                        extract_result = await self.browser_integration.extract_element_text(role_id, selector)
-                        
-                        # Add the extraction result to the user prompt
-                        extract_info = f"\n\n[ELEMENT_CONTENT]\nSelector: {selector}\n"
-                        if extract_result["success"]:
-                            extract_info += f"Content:\n{extract_result.get('text', 'No content')}\n"
-                        else:
-                            extract_info += f"Error: {extract_result.get('error', 'Element not found')}\n"
-                        extract_info += "[/ELEMENT_CONTENT]"
-                        user_prompt = user_prompt.replace(user_prompt[selector_start:selector_end+1], extract_info)
-                
-                # Handle fill form command
-                elif "[FILL_FORM:" in user_prompt:
-                    form_start = user_prompt.find("[FILL_FORM:")
-                    form_end = user_prompt.find("]", form_start)
-                    if form_end > form_start:
-                        form_data_str = user_prompt[form_start + 11:form_end].strip()
-                        try:
-                            # Parse form data in format: selector1=value1,selector2=value2
-                            form_data = {}
-                            for item in form_data_str.split(','):
-                                if '=' in item:
-                                    selector, value = item.split('=', 1)
-                                    form_data[selector.strip()] = value.strip()
-                            
-                            if form_data:
-                                fill_result = await self.browser_integration.fill_form(role_id, form_data)
-                                
-                                # Add the form fill result to the user prompt
-                                form_info = f"\n\n[FORM_INTERACTION]\n"
-                                if fill_result["success"]:
-                                    form_info += f"Successfully filled form with {len(form_data)} fields\n"
-                                else:
-                                    form_info += f"Partially filled form with {len(form_data)} fields\n"
-                                    for result in fill_result.get('results', []):
-                                        if not result["success"]:
-                                            form_info += f"- Failed to fill {result['selector']}: {result.get('error', 'Unknown error')}\n"
-                                form_info += "[/FORM_INTERACTION]"
-                                user_prompt = user_prompt.replace(user_prompt[form_start:form_end+1], form_info)
-                        except Exception as e:
-                            # Handle parsing errors
-                            form_info = f"\n\n[FORM_INTERACTION]\nFailed to parse form data: {str(e)}\n[/FORM_INTERACTION]"
-                            user_prompt = user_prompt.replace(user_prompt[form_start:form_end+1], form_info)
+                user_prompt = await self._process_browser_commands(user_prompt, role_id)
             
-            # Generate the response using the selected provider
-            provider = self.get_provider(provider_name)
-            return await provider.generate_completion(system_prompt, user_prompt)
+            # Key of the request, used to merge concurrent identical calls whether or not
+            # the response cache is enabled; repeated prompts are served from the cache
+            cache_key = LLMCache.cache_key(provider.provider_name, provider.model, system_prompt, user_prompt)
+            if self.cache is not None:
+                cached = await self.cache.get(cache_key)
+                if cached is not None:
+                    return cached
+            
+            # Then look for a paraphrase of the prompt; prompts with expanded browser
+            # commands carry live page content, so they only ever match exactly
+            semantic_group = prompt_vector = None
+            if self.semantic_cache is not None and user_prompt == original_prompt:
+                prompt_vector = SimilarityCache.normalize(await self.create_embedding_cached(user_prompt))
+                if prompt_vector is not None:
+                    semantic_group = (
+                        provider.provider_name,
+                        provider.model,
+                        hashlib.blake2b(system_prompt.encode(), digest_size=16).digest()
+                    )
+                    cached = self.semantic_cache.get(semantic_group, prompt_vector)
+                    if cached is not None:
+                        return cached
+            
+            response = await self._generate_completion_shared(provider, system_prompt, user_prompt, cache_key)
+            
+            if response:
+                if self.cache is not None:
+                    await self.cache.set(cache_key, response)
+                if prompt_vector is not None:
+                    self.semantic_cache.put(semantic_group, prompt_vector, response)
+            return response
+        except Exception:
+            # Let callers see the failure (and map it to an error status) instead of
+            # returning an apology that looks like a successful completion
+            logger.exception("Error generating response")
+            raise
+    
+    async def _process_browser_commands(self, user_prompt: str, role_id: str) -> str:
+        """Replace the browser commands in a user prompt with their results
+        
+        Commands run one at a time in the order they appear, since clicks and form
+        fills act on the same page; repeated identical commands run once.
+        
+        Args:
+            user_prompt: The user prompt containing browser commands
+            role_id: The role whose browser session runs the commands
+            
+        Returns:
+            The user prompt with each command replaced by its result
+        """
+        matches = list(BROWSER_COMMAND_PATTERN.finditer(user_prompt))
+        # Cached results skip navigation, so they're only safe when no command needs the page
+        use_cache = not any(match.group(1) in PAGE_COMMANDS for match in matches)
+        
+        results: Dict[str, str] = {}
+        for match in matches:
+            command = match.group(0)
+            if command not in results:
+                handler = self._browser_command_handlers[match.group(1)]
+                results[command] = await handler(match.group(2).strip(), role_id, use_cache) or command
+        
+        if not results:
+            return user_prompt
+        # Splice the results in with a single pass over the prompt
+        return BROWSER_COMMAND_PATTERN.sub(lambda match: results[match.group(0)], user_prompt)
+    
+    # Each handler takes (argument, role_id, use_cache) and returns the result block to put
+    # in the prompt, or None to leave the command as written
+    
+    async def _search_web_command(self, argument: str, role_id: str, use_cache: bool) -> Optional[str]:
+        """Run [SEARCH_WEB: query]"""
+        web_result = await self._cached_browser_result(
+            (role_id, "SEARCH_WEB", " ".join(argument.casefold().split())),
+            lambda: self.browser_integration.search_web(role_id, argument),
+            use_cache
+        )
+        # Result blocks are built as a list of parts and joined once
+        parts = [f"\n\n[WEB_SEARCH_RESULTS]\nQuery: {argument}\n"]
+        if web_result["success"]:
+            parts.append(f"Title: {web_result['title']}\nURL: {web_result['url']}\n\nResults:\n")
+            for i, result in enumerate(web_result.get('results', []), 1):
+                parts.append(f"{i}. {result.get('title', 'No title')}\n   URL: {result.get('url', 'No URL')}\n   {result.get('snippet', 'No snippet')}\n\n")
+        else:
+            parts.append(f"Error: {web_result.get('error', 'Unknown error')}\n")
+        parts.append("[/WEB_SEARCH_RESULTS]")
+        return "".join(parts)
+    
+    async def _browse_url_command(self, argument: str, role_id: str, use_cache: bool) -> Optional[str]:
+        """Run [BROWSE_URL: url|mode]"""
+        # An extraction mode may follow the URL: [BROWSE_URL: url|mode]
+        url, _, extract_mode = argument.partition('|')
+        url = url.strip()
+        extract_mode = extract_mode.strip().lower()
+        if extract_mode not in BROWSE_EXTRACT_MODES:
+            extract_mode = 'auto'
+        
+        web_result = await self._cached_browser_result(
+            (role_id, "BROWSE_URL", f"{normalize_url(url)}|{extract_mode}"),
+            lambda: self.browser_integration.browse_url(role_id, url, extract_mode),
+            use_cache
+        )
+        parts = [f"\n\n[WEB_PAGE_CONTENT]\nURL: {url}\n"]
+        if web_result["success"]:
+            parts.append(f"Title: {web_result['title']}\n")
+            
+            # Add metadata if available
+            if web_result.get('metadata') and extract_mode in ['structured', 'full']:
+                meta = web_result['metadata']
+                if meta.get('description'):
+                    parts.append(f"Description: {meta.get('description')}\n")
+                if meta.get('keywords'):
+                    parts.append(f"Keywords: {meta.get('keywords')}\n")
+            
+            # Add summary if available
+            if web_result.get('summary'):
+                parts.append(f"\nSummary:\n{web_result.get('summary')}\n\n")
+            
+            parts.append(f"\nContent:\n{web_result.get('content', 'No content extracted')}\n")
+        else:
+            parts.append(f"Error: {web_result.get('error', 'Unknown error')}\n")
+        parts.append("[/WEB_PAGE_CONTENT]")
+        return "".join(parts)
+    
+    async def _click_element_command(self, argument: str, role_id: str, use_cache: bool) -> Optional[str]:
+        """Run [CLICK_ELEMENT: selector]"""
+        click_result = await self.browser_integration.click_element(role_id, argument)
+        click_info = "\n\n[ELEMENT_INTERACTION]\n"
+        if click_result["success"]:
+            click_info += f"Successfully clicked element: {argument}\n"
+        else:
+            click_info += f"Failed to click element: {argument}\nError: {click_result.get('error', 'Unknown error')}\n"
+        return click_info + "[/ELEMENT_INTERACTION]"
+    
+    async def _extract_element_command(self, argument: str, role_id: str, use_cache: bool) -> Optional[str]:
+        """Run [EXTRACT_ELEMENT: selector]"""
+        extract_result = await self.browser_integration.extract_element_text(role_id, argument)
+        extract_info = f"\n\n[ELEMENT_CONTENT]\nSelector: {argument}\n"
+        if extract_result["success"]:
+            extract_info += f"Content:\n{extract_result.get('text', 'No content')}\n"
+        else:
+            extract_info += f"Error: {extract_result.get('error', 'Element not found')}\n"
+        return extract_info + "[/ELEMENT_CONTENT]"
+    
+    async def _fill_form_command(self, argument: str, role_id: str, use_cache: bool) -> Optional[str]:
+        """Run [FILL_FORM: {"selector1": "value1"}] or [FILL_FORM: selector1=value1,selector2=value2]"""
+        try:
+            if argument.startswith("{"):
+                # A JSON object, for values containing commas or equals signs
+                parsed = orjson.loads(argument)
+                if not isinstance(parsed, dict):
+                    raise ValueError("form data must be a JSON object")
+                form_data = {
+                    str(selector).strip(): value if isinstance(value, str) else json.dumps(value)
+                    for selector, value in parsed.items()
+                }
+            else:
+                # Parse form data in format: selector1=value1,selector2=value2
+                form_data = {}
+                for item in argument.split(','):
+                    if '=' in item:
+                        selector, value = item.split('=', 1)
+                        form_data[selector.strip()] = value.strip()
+            
+            if not form_data:
+                return None
+            
+            fill_result = await self.browser_integration.fill_form(role_id, form_data)
+            parts = ["\n\n[FORM_INTERACTION]\n"]
+            if fill_result["success"]:
+                parts.append(f"Successfully filled form with {len(form_data)} fields\n")
+            else:
+                parts.append(f"Partially filled form with {len(form_data)} fields\n")
+                for result in fill_result.get('results', []):
+                    if not result["success"]:
+                        parts.append(f"- Failed to fill {result['selector']}: {result.get('error', 'Unknown error')}\n")
+            parts.append("[/FORM_INTERACTION]")
+            return "".join(parts)
         except Exception as e:
-            # In a production environment, add proper error handling and logging
-            print(f"Error generating response: {e}")
-            return f"I'm sorry, I encountered an error: {str(e)}"
+            return f"\n\n[FORM_INTERACTION]\nFailed to parse form data: {str(e)}\n[/FORM_INTERACTION]"
+    
+    async def _cached_browser_result(self, key: Tuple[str, str, str], fetch: Callable[[], Awaitable[Dict[str, Any]]], use_cache: bool) -> Dict[str, Any]:
+        """Get a search or page result, reusing a recent one for the same role and argument
+        
+        Args:
+            key: (role_id, command, normalized_argument)
+            fetch: Runs the command in the browser
+            use_cache: Whether a cached result may be returned
+            
+        Returns:
+            The command result
+        """
+        if use_cache:
+            cached = self._browser_cache.get(key)
+            if cached is not None:
+                expires_at, result = cached
+                if expires_at > time.monotonic():
+                    self._browser_cache.move_to_end(key)
+                    return result
+                del self._browser_cache[key]
+        
+        result = await fetch()
+        
+        # Only successful results are cached; screenshots aren't used in prompts
+        if result.get("success"):
+            result = {name: value for name, value in result.items() if name != "screenshot"}
+            self._browser_cache[key] = (time.monotonic() + settings.browser_cache_ttl, result)
+            self._browser_cache.move_to_end(key)
+            if len(self._browser_cache) > settings.browser_cache_size:
+                self._browser_cache.popitem(last=False)
+        
+        return result
+    
+    async def _generate_completion_shared(self, provider: BaseLLMProvider, system_prompt: str, user_prompt: str, request_key: str) -> str:
+        """Generate a completion, sharing one API call between concurrent identical requests
+        
+        Args:
+            provider: The provider to use
+            system_prompt: The system prompt to use
+            user_prompt: The user prompt to use
+            request_key: Key of the provider, model and prompts (see LLMCache.cache_key)
+            
+        Returns:
+            The generated completion
+        """
+        # Join the call that is already in flight for the same prompt, or start one in its
+        # own task. Every caller, including the one that started it, waits through a shield,
+        # so a caller going away doesn't cancel the call for the others
+        task = self._completion_requests.get(request_key)
+        if task is None:
+            task = asyncio.ensure_future(self._generate_completion_limited(provider, system_prompt, user_prompt))
+            self._completion_requests[request_key] = task
+            task.add_done_callback(lambda _: self._completion_requests.pop(request_key, None))
+        
+        return await asyncio.shield(task)
+    
+    async def _generate_completion_limited(self, provider: BaseLLMProvider, system_prompt: str, user_prompt: str) -> str:
+        """Generate a completion once a concurrent LLM request slot is free
+        
+        Args:
+            provider: The provider to use
+            system_prompt: The system prompt to use
+            user_prompt: The user prompt to use
+            
+        Returns:
+            The generated completion
+        """
+        async with self._llm_slot():
+            return await provider.generate_completion(system_prompt, user_prompt)
     
     async def generate_response_stream(self, system_prompt: str, user_prompt: str, role_id: Optional[str] = None, provider_name: Optional[str] = None) -> AsyncGenerator[str, None]:
         """Generate a streaming response using the configured LLM provider
@@ -228,172 +442,178 @@ class AIProcessor:
             Chunks of the generated response
         """
         try:
-            # Process the user prompt with browser commands
-            # This code is duplicated from generate_response to ensure consistency
-            # In a production environment, refactor this into a shared method
+            # Replace any browser commands with their results
             if self.browser_integration and role_id:
-                # Handle search web command
-                if "[SEARCH_WEB:" in user_prompt:
-                    search_start = user_prompt.find("[SEARCH_WEB:")
-                    search_end = user_prompt.find("]", search_start)
-                    if search_end > search_start:
-                        search_query = user_prompt[search_start + 12:search_end].strip()
-                        web_result = await self.browser_integration.search_web(role_id, search_query)
-                        web_info = f"\n\n[WEB_SEARCH_RESULTS]\nQuery: {search_query}\n"
-                        if web_result["success"]:
-                            web_info += f"Title: {web_result['title']}\nURL: {web_result['url']}\n\nResults:\n"
-                            for i, result in enumerate(web_result.get('results', []), 1):
-                                web_info += f"{i}. {result.get('title', 'No title')}\n   URL: {result.get('url', 'No URL')}\n   {result.get('snippet', 'No snippet')}\n\n"
-                        else:
-                            web_info += f"Error: {web_result.get('error', 'Unknown error')}\n"
-                        web_info += "[/WEB_SEARCH_RESULTS]"
-                        user_prompt = user_prompt.replace(user_prompt[search_start:search_end+1], web_info)
-                
-                # Handle browse URL command with different extraction modes
-                elif "[BROWSE_URL:" in user_prompt:
-                    url_start = user_prompt.find("[BROWSE_URL:")
-                    url_end = user_prompt.find("]", url_start)
-                    if url_end > url_start:
-                        url_params = user_prompt[url_start + 12:url_end].strip()
-                        
-                        # Check if extraction mode is specified
-                        extract_mode = 'auto'  # default
-                        if '|' in url_params:
-                            url, extract_mode = url_params.split('|', 1)
-                            url = url.strip()
-                            extract_mode = extract_mode.strip().lower()
-                            if extract_mode not in ['auto', 'article', 'full', 'structured']:
-                                extract_mode = 'auto'
-                        else:
-                            url = url_params
-                        
-                        web_result = await self.browser_integration.browse_url(role_id, url, extract_mode)
-                        
-                        web_info = f"\n\n[WEB_PAGE_CONTENT]\nURL: {url}\n"
-                        if web_result["success"]:
-                            web_info += f"Title: {web_result['title']}\n"
-                            
-                            # Add metadata if available
-                            if web_result.get('metadata') and extract_mode in ['structured', 'full']:
-                                meta = web_result['metadata']
-                                if meta.get('description'):
-                                    web_info += f"Description: {meta.get('description')}\n"
-                                if meta.get('keywords'):
-                                    web_info += f"Keywords: {meta.get('keywords')}\n"
-                            
-                            # Add summary if available
-                            if web_result.get('summary'):
-                                web_info += f"\nSummary:\n{web_result.get('summary')}\n\n"
-                            
-                            # Add content
-                            web_info += f"\nContent:\n{web_result.get('content', 'No content extracted')}\n"
-                        else:
-                            web_info += f"Error: {web_result.get('error', 'Unknown error')}\n"
-                        web_info += "[/WEB_PAGE_CONTENT]"
-                        user_prompt = user_prompt.replace(user_prompt[url_start:url_end+1], web_info)
-                
-                # Handle click element command
-                elif "[CLICK_ELEMENT:" in user_prompt:
-                    selector_start = user_prompt.find("[CLICK_ELEMENT:")
-                    selector_end = user_prompt.find("]", selector_start)
-                    if selector_end > selector_start:
-                        selector = user_prompt[selector_start + 15:selector_end].strip()
-                        click_result = await self.browser_integration.click_element(role_id, selector)
-                        
-                        click_info = f"\n\n[ELEMENT_INTERACTION]\n"
-                        if click_result["success"]:
-                            click_info += f"Successfully clicked element: {selector}\n"
-                        else:
-                            click_info += f"Failed to click element: {selector}\nError: {click_result.get('error', 'Unknown error')}\n"
-                        click_info += "[/ELEMENT_INTERACTION]"
-                        user_prompt = user_prompt.replace(user_prompt[selector_start:selector_end+1], click_info)
-                
-                # Handle extract element text command
-                elif "[EXTRACT_ELEMENT:" in user_prompt:
-                    selector_start = user_prompt.find("[EXTRACT_ELEMENT:")
-                    selector_end = user_prompt.find("]", selector_start)
-                    if selector_end > selector_start:
-                        selector = user_prompt[selector_start + 17:selector_end].strip()
-                        extract_result = await self.browser_integration.extract_element_text(role_id, selector)
-                        
-                        extract_info = f"\n\n[ELEMENT_CONTENT]\nSelector: {selector}\n"
-                        if extract_result["success"]:
-                            extract_info += f"Content:\n{extract_result.get('text', 'No content')}\n"
-                        else:
-                            extract_info += f"Error: {extract_result.get('error', 'Element not found')}\n"
-                        extract_info += "[/ELEMENT_CONTENT]"
-                        user_prompt = user_prompt.replace(user_prompt[selector_start:selector_end+1], extract_info)
-                
-                # Handle fill form command
-                elif "[FILL_FORM:" in user_prompt:
-                    form_start = user_prompt.find("[FILL_FORM:")
-                    form_end = user_prompt.find("]", form_start)
-                    if form_end > form_start:
-                        form_data_str = user_prompt[form_start + 11:form_end].strip()
-                        try:
-                            # Parse form data in format: selector1=value1,selector2=value2
-                            form_data = {}
-                            for item in form_data_str.split(','):
-                                if '=' in item:
-                                    selector, value = item.split('=', 1)
-                                    form_data[selector.strip()] = value.strip()
-                            
-                            if form_data:
-                                fill_result = await self.browser_integration.fill_form(role_id, form_data)
-                                
-                                form_info = f"\n\n[FORM_INTERACTION]\n"
-                                if fill_result["success"]:
-                                    form_info += f"Successfully filled form with {len(form_data)} fields\n"
-                                else:
-                                    form_info += f"Partially filled form with {len(form_data)} fields\n"
-                                    for result in fill_result.get('results', []):
-                                        if not result["success"]:
-                                            form_info += f"- Failed to fill {result['selector']}: {result.get('error', 'Unknown error')}\n"
-                                form_info += "[/FORM_INTERACTION]"
-                                user_prompt = user_prompt.replace(user_prompt[form_start:form_end+1], form_info)
-                        except Exception as e:
-                            # Handle parsing errors
-                            form_info = f"\n\n[FORM_INTERACTION]\nFailed to parse form data: {str(e)}\n[/FORM_INTERACTION]"
-                            user_prompt = user_prompt.replace(user_prompt[form_start:form_end+1], form_info)
+                user_prompt = await self._process_browser_commands(user_prompt, role_id)
             
             # Generate the streaming response using the selected provider
             provider = self.get_provider(provider_name)
-            async for chunk in provider.generate_completion_stream(system_prompt, user_prompt):
-                yield chunk
-        except Exception as e:
-            # In a production environment, add proper error handling and logging
-            print(f"Error generating streaming response: {e}")
-            yield f"I'm sorry, I encountered an error: {str(e)}"
+            async with self._llm_slot():
+                async for chunk in provider.generate_completion_stream(system_prompt, user_prompt):
+                    yield chunk
+        except Exception:
+            # Headers are already sent once streaming starts, so the route reports the
+            # error in-band in its own framing
+            logger.exception("Error generating streaming response")
+            raise
     
     async def create_embedding(self, text: str, provider_name: Optional[str] = None) -> List[float]:
         """Create an embedding vector for the given text
         
+        Concurrent calls are collected for up to EMBEDDING_BATCH_WINDOW seconds and
+        sent to the embeddings API together.
+        
         Args:
             text: The text to embed
             provider_name: Optional provider name to use (defaults to the default provider)
             
         Returns:
-            The embedding vector
+            The embedding vector (empty if it could not be created)
+        """
+        # Currently only OpenAI supports embeddings in our implementation
+        # In the future, other providers can be added with their own embedding methods
+        if "openai" not in self.provider_configs:
+            logger.error("Error creating embedding: OpenAI provider is required for embeddings")
+            return []
+        
+        future = asyncio.get_running_loop().create_future()
+        self._embedding_batch.append((text, future))
+        if len(self._embedding_batch) >= EMBEDDING_BATCH_SIZE:
+            self._flush_embedding_batch()
+        elif self._embedding_flush is None:
+            self._embedding_flush = asyncio.get_running_loop().call_later(EMBEDDING_BATCH_WINDOW, self._flush_embedding_batch)
+        
+        # Shielded so a caller going away doesn't cancel the result for the batch
+        return await asyncio.shield(future)
+    
+    def _flush_embedding_batch(self) -> None:
+        """Send the embedding requests collected so far as one API call"""
+        if self._embedding_flush is not None:
+            self._embedding_flush.cancel()
+            self._embedding_flush = None
+        
+        batch, self._embedding_batch = self._embedding_batch, []
+        if batch:
+            # Keep a reference so the task isn't garbage collected while it runs
+            task = asyncio.create_task(self._resolve_embedding_batch(batch))
+            self._embedding_tasks.add(task)
+            task.add_done_callback(self._embedding_tasks.discard)
+    
+    async def _resolve_embedding_batch(self, batch: List[Tuple[str, "asyncio.Future[List[float]]"]]) -> None:
+        """Embed a collected batch and hand each caller its vector
+        
+        Args:
+            batch: (text, future) pairs of the waiting callers
+        """
+        try:
+            embeddings = await self._embed_batch([text for text, _ in batch])
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+        finally:
+            # Don't leave callers waiting if the batch was cancelled
+            for _, future in batch:
+                if not future.done():
+                    future.set_result([])
+    
+    async def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        """Embed several texts with a single API call
+        
+        Args:
+            batch: The texts to embed (at most EMBEDDING_BATCH_SIZE)
+            
+        Returns:
+            The embedding vectors, aligned with batch (all empty if the call failed)
         """
         try:
-            # Currently only OpenAI supports embeddings in our implementation
-            # In the future, other providers can be added with their own embedding methods
-            openai_provider = self.providers.get("openai")
-            if not openai_provider:
-                raise ValueError("OpenAI provider is required for embeddings")
-                
             # Use the OpenAI client directly for embeddings
             # This is a temporary solution until we implement embeddings in each provider
-            response = await openai_provider.client.embeddings.create(
-                model="text-embedding-ada-002",
-                input=text
-            )
+            openai_provider = self.get_provider("openai")
+            async with self._llm_slot():
+                response = await openai_provider.client.embeddings.create(
+                    model=settings.embedding_model,
+                    input=batch
+                )
+            # The API may return items out of order, so place them by index
+            embeddings = [[] for _ in batch]
+            for item in response.data:
+                embeddings[item.index] = item.embedding
+            return embeddings
+        except Exception:
+            logger.exception("Error creating embeddings")
+            return [[] for _ in batch]
+    
+    async def create_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Create embedding vectors for several texts with batched API calls
+        
+        Args:
+            texts: The texts to embed
             
-            return response.data[0].embedding
-        except Exception as e:
-            # In a production environment, add proper error handling and logging
-            print(f"Error creating embedding: {e}")
-            return []
+        Returns:
+            The embedding vectors, aligned with texts (empty for any batch that failed)
+        """
+        if "openai" not in self.provider_configs:
+            logger.error("Error creating embeddings: OpenAI provider is required for embeddings")
+            return [[] for _ in texts]
+        
+        # Send the batches concurrently
+        batches = [texts[i:i + EMBEDDING_BATCH_SIZE] for i in range(0, len(texts), EMBEDDING_BATCH_SIZE)]
+        results = await asyncio.gather(*(self._embed_batch(batch) for batch in batches))
+        return [embedding for batch_embeddings in results for embedding in batch_embeddings]
+    
+    async def create_embedding_cached(self, text: str) -> Sequence[float]:
+        """Create an embedding vector for the given text, reusing recent results
+        
+        Identical texts (ignoring surrounding whitespace) share one cache entry, and
+        concurrent requests for the same text wait on a single API call.
+        
+        Args:
+            text: The text to embed
+            
+        Returns:
+            The embedding as a packed float32 array (empty if it could not be created)
+        """
+        key = hashlib.blake2b(text.strip().encode(), digest_size=16).digest()
+        
+        # Serve from the cache while the entry is fresh
+        cached = self._embedding_cache.get(key)
+        if cached is not None:
+            expires_at, embedding = cached
+            if expires_at > time.monotonic():
+                self._embedding_cache.move_to_end(key)
+                return embedding
+            del self._embedding_cache[key]
+        
+        # Join the request that is already in flight for the same text, or start one in
+        # its own task; shielded so a caller going away doesn't cancel it for the others
+        task = self._embedding_requests.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._create_and_cache_embedding(key, text))
+            self._embedding_requests[key] = task
+            task.add_done_callback(lambda _: self._embedding_requests.pop(key, None))
+        
+        return await asyncio.shield(task)
+    
+    async def _create_and_cache_embedding(self, key: bytes, text: str) -> Sequence[float]:
+        """Create an embedding vector and add it to the embedding cache
+        
+        Args:
+            key: Digest of the stripped text
+            text: The text to embed
+            
+        Returns:
+            The embedding as a packed float32 array (empty if it could not be created)
+        """
+        # Cached and shared embeddings are kept packed (4 bytes per dimension)
+        embedding = compact_embedding(await self.create_embedding(text)) or []
+        
+        # Only successful embeddings are cached, so failures are retried
+        if embedding:
+            self._embedding_cache[key] = (time.monotonic() + settings.embedding_cache_ttl, embedding)
+            if len(self._embedding_cache) > settings.embedding_cache_size:
+                self._embedding_cache.popitem(last=False)
+        
+        return embedding
     
     def _extract_json_from_response(self, response_text: str) -> Dict[str, Any]:
         """Extract JSON from a response text
@@ -414,8 +634,8 @@ class AIProcessor:
                 return json.loads(json_str)
             else:
                 return {}
-        except Exception as e:
-            print(f"Error extracting JSON: {str(e)}")
+        except Exception:
+            logger.exception("Error extracting JSON")
             return {}
     
     def get_provider(self, provider_name: Optional[str] = None) -> BaseLLMProvider:
@@ -431,14 +651,18 @@ class AIProcessor:
             ValueError: If the provider is not available
         """
         # Use the default provider if none specified
-        if not provider_name:
-            return self.default_provider
+        name = provider_name.lower() if provider_name else self.default_provider_name
         
-        # Get the requested provider
-        provider = self.providers.get(provider_name.lower())
+        # Get the requested provider, creating it on first use
+        provider = self.providers.get(name)
         if not provider:
-            available = ", ".join(self.providers.keys())
-            raise ValueError(f"Provider '{provider_name}' not available. Available providers: {available}")
+            if name not in self.provider_configs:
+                available = ", ".join(self.provider_configs.keys())
+                raise ValueError(f"Provider '{provider_name}' not available. Available providers: {available}")
+            
+            api_key, model = self.provider_configs[name]
+            provider = LLMProviderFactory.create_provider(name, api_key, model)
+            self.providers[name] = provider
         
         return provider
     
@@ -448,4 +672,9 @@ class AIProcessor:
         Returns:
             Dictionary of provider names to model names
         """
-        return {name: provider.default_model for name, provider in self.providers.items()}
+        return {name: self.get_provider(name).default_model for name in self.provider_configs}
+    
+    async def close(self):
+        """Clean up resources"""
+        if self.cache is not None:
+            await self.cache.close()
@@ -1,8 +1,12 @@
+import asyncio
+from collections import deque
 from typing import Dict, List, Any, Optional, Tuple
+from app.config import settings
 from app.services.trigger_service import TriggerService
 from app.services.role_service import RoleService
 from app.models.role import Role
 from app.models.memory import Memory, MemoryCreate
+from app.models.context import ContextSwitchEvent
 
 class ContextSwitchingService:
     """Service for managing context switching between roles"""
@@ -18,14 +22,28 @@ class ContextSwitchingService:
         self.trigger_service = trigger_service
         
         # Track active sessions
-        # Format: {session_id: {"current_role_id": str, "history": List[Dict]}}
+        # Format: {session_id: {"current_role_id": str, "history": Deque[ContextSwitchEvent], "switch_count": int}}
         self.active_sessions: Dict[str, Dict[str, Any]] = {}
+        
+        # Role triggers are registered on first use rather than at startup
+        self._roles_initialized = asyncio.Event()
+        self._roles_lock = asyncio.Lock()
     
     async def initialize_roles(self) -> None:
         """Initialize triggers for all roles"""
         roles = await self.role_service.get_roles()
         for role in roles:
             await self.trigger_service.register_role_triggers(role)
+        self._roles_initialized.set()
+    
+    async def _ensure_roles_initialized(self) -> None:
+        """Initialize role triggers once, on the first query that needs them"""
+        if self._roles_initialized.is_set():
+            return
+        
+        async with self._roles_lock:
+            if not self._roles_initialized.is_set():
+                await self.initialize_roles()
     
     async def create_session(self, session_id: str, initial_role_id: str) -> Dict[str, Any]:
         """Create a new session
@@ -43,7 +61,9 @@ class ContextSwitchingService:
         # Create the session
         self.active_sessions[session_id] = {
             "current_role_id": initial_role_id,
-            "history": [],
+            # Bounded so long-running sessions don't grow without limit
+            "history": deque(maxlen=settings.context_history_limit),
+            "switch_count": 0,
             "last_switch_reason": "Initial role selection"
         }
         
@@ -91,6 +111,7 @@ class ContextSwitchingService:
         new_role_id = current_role_id
         
         if not force_role_id:
+            await self._ensure_roles_initialized()
             detected_role_id = await self.trigger_service.get_best_role_for_query(query, current_role_id)
             
             # If we detected a different role and it's not the current one, switch
@@ -112,13 +133,7 @@ class ContextSwitchingService:
             new_role = await self.role_service.get_role(new_role_id)
             
             # Record the switch in session history
-            session["history"].append({
-                "timestamp": "now",  # In a real implementation, use actual timestamp
-                "from_role_id": current_role_id,
-                "to_role_id": new_role_id,
-                "reason": switch_reason,
-                "query": query
-            })
+            self._record_switch(session, current_role_id, new_role_id, switch_reason, query, automatic=not force_role_id)
             
             # Update the current role
             session["current_role_id"] = new_role_id
@@ -184,6 +199,7 @@ class ContextSwitchingService:
         new_role_id = current_role_id
         
         if not force_role_id:
+            await self._ensure_roles_initialized()
             detected_role_id = await self.trigger_service.get_best_role_for_query(query, current_role_id)
             
             # If we detected a different role and it's not the current one, switch
@@ -205,13 +221,7 @@ class ContextSwitchingService:
             new_role = await self.role_service.get_role(new_role_id)
             
             # Record the switch in session history
-            session["history"].append({
-                "timestamp": "now",  # In a real implementation, use actual timestamp
-                "from_role_id": current_role_id,
-                "to_role_id": new_role_id,
-                "reason": switch_reason,
-                "query": query
-            })
+            self._record_switch(session, current_role_id, new_role_id, switch_reason, query, automatic=not force_role_id)
             
             # Update the current role
             session["current_role_id"] = new_role_id
@@ -283,13 +293,7 @@ class ContextSwitchingService:
         new_role = await self.role_service.get_role(new_role_id)
         
         # Record the switch in session history
-        session["history"].append({
-            "timestamp": "now",  # In a real implementation, use actual timestamp
-            "from_role_id": current_role_id,
-            "to_role_id": new_role_id,
-            "reason": reason,
-            "query": None  # No query associated with this switch
-        })
+        self._record_switch(session, current_role_id, new_role_id, reason)
         
         # Update the current role
         session["current_role_id"] = new_role_id
@@ -297,20 +301,48 @@ class ContextSwitchingService:
         
         return session
     
-    async def get_context_switch_history(self, session_id: str) -> List[Dict[str, Any]]:
+    async def get_context_switch_history(self, session_id: str) -> List[ContextSwitchEvent]:
         """Get the context switch history for a session
         
         Args:
             session_id: ID of the session to get history for
             
         Returns:
-            List of context switches
+            List of context switches (the most recent ones, up to the history limit)
         """
         # Check if the session exists
         if session_id not in self.active_sessions:
             raise ValueError(f"Session {session_id} does not exist")
         
-        return self.active_sessions[session_id]["history"]
+        return list(self.active_sessions[session_id]["history"])
+    
+    def _record_switch(
+        self,
+        session: Dict[str, Any],
+        from_role_id: str,
+        to_role_id: str,
+        reason: str,
+        query: Optional[str] = None,
+        automatic: bool = False
+    ) -> None:
+        """Record a context switch in the session history
+        
+        Args:
+            session: The session to record the switch in
+            from_role_id: ID of the role switched from
+            to_role_id: ID of the role switched to
+            reason: Reason for the switch
+            query: Query that triggered the switch, if any
+            automatic: Whether the switch was detected from triggers
+        """
+        session["history"].append(ContextSwitchEvent(
+            from_role_id=from_role_id,
+            to_role_id=to_role_id,
+            reason=reason,
+            query=query,
+            automatic=automatic
+        ))
+        session["switch_count"] += 1
     
     async def close_session(self, session_id: str) -> bool:
         """Close a session
@@ -1,8 +1,37 @@
 import json
-from typing import Dict, List, Any, Optional
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
 from app.models.role import Role
 from app.services.llm_providers.base_provider import BaseLLMProvider
 
+# Import pyahocorasick with error handling
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+@lru_cache(maxsize=None)
+def _lowered_patterns(patterns: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Lower-case a template's extraction patterns once"""
+    return tuple(pattern.lower() for pattern in patterns)
+
+@lru_cache(maxsize=None)
+def _pattern_automaton(patterns: Tuple[str, ...]):
+    """Build an Aho-Corasick automaton over a template's extraction patterns
+    
+    Each keyword maps to the indices of the patterns it came from, so matches
+    can be reported in template order.
+    """
+    automaton = ahocorasick.Automaton()
+    for index, pattern in enumerate(_lowered_patterns(patterns)):
+        if pattern in automaton:
+            automaton.get(pattern).append(index)
+        else:
+            automaton.add_word(pattern, [index])
+    automaton.make_automaton()
+    return automaton
+
 class DomainAnalysisService:
     """Service for domain-specific contextual analysis
     
@@ -229,11 +258,20 @@ class DomainAnalysisService:
         Returns:
             List of extracted patterns
         """
-        extracted = []
+        if not patterns:
+            return []
+        
+        key = tuple(patterns)
         content_lower = content.lower()
         
-        for pattern in patterns:
-            if pattern.lower() in content_lower:
-                extracted.append(pattern)
+        # Single pass over the content; overlapping terms are all reported
+        if AHOCORASICK_AVAILABLE:
+            found = set()
+            for _, indices in _pattern_automaton(key).iter(content_lower):
+                found.update(indices)
+            return [patterns[index] for index in sorted(found)]
         
-        return extracted
+        return [
+            pattern for pattern, pattern_lower in zip(patterns, _lowered_patterns(key))
+            if pattern_lower in content_lower
+        ]
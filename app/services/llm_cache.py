@@ -0,0 +1,139 @@
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional, Protocol, Tuple
+
+# Import redis with error handling (optional shared cache backend)
+try:
+    import redis.asyncio as redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+class CacheBackend(Protocol):
+    """Storage used by the LLM response cache"""
+    
+    async def get(self, key: str) -> Optional[str]:
+        """Get a cached value, or None if it is missing or expired"""
+        ...
+    
+    async def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        """Store a value for ttl_seconds"""
+        ...
+    
+    async def close(self) -> None:
+        """Release any connections held by the backend"""
+        ...
+
+class MemoryBackend:
+    """In-process LRU backend with per-entry expiry"""
+    
+    def __init__(self, maxsize: int = 10_000):
+        """Initialize the backend
+        
+        Args:
+            maxsize: Maximum number of cached values (least recently used are evicted first)
+        """
+        self.maxsize = maxsize
+        # Format: {key: (expires_at, value)}
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+    
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        
+        self._entries.move_to_end(key)
+        return value
+    
+    async def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        self._entries[key] = (time.monotonic() + ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+    
+    async def close(self) -> None:
+        self._entries.clear()
+
+class RedisBackend:
+    """Redis backend, so every worker process shares one cache"""
+    
+    def __init__(self, url: str, prefix: str = "llm:"):
+        """Initialize the backend
+        
+        Args:
+            url: Redis connection URL
+            prefix: Prefix for the cache keys
+        """
+        self.client = redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+    
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            return await self.client.get(self.prefix + key)
+        except Exception:
+            # An unreachable cache only costs the API call it would have saved
+            logger.exception("Error reading from the LLM cache")
+            return None
+    
+    async def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        try:
+            await self.client.set(self.prefix + key, value, ex=ttl_seconds)
+        except Exception:
+            logger.exception("Error writing to the LLM cache")
+    
+    async def close(self) -> None:
+        await self.client.aclose()
+
+class LLMCache:
+    """Exact-match cache of LLM completions"""
+    
+    def __init__(self, backend: CacheBackend, ttl_seconds: int = 3600):
+        """Initialize the cache
+        
+        Args:
+            backend: Storage for the cached completions
+            ttl_seconds: How long a completion is reused
+        """
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+    
+    @staticmethod
+    def cache_key(provider_name: str, model: str, system_prompt: str, user_prompt: str) -> str:
+        """Build the cache key for a completion request
+        
+        Args:
+            provider_name: Name of the provider serving the request
+            model: Model used by the provider
+            system_prompt: The system prompt
+            user_prompt: The user prompt
+            
+        Returns:
+            Hex SHA-256 digest of the request
+        """
+        payload = json.dumps(
+            {"provider": provider_name, "model": model, "system": system_prompt, "user": user_prompt},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    async def get(self, key: str) -> Optional[str]:
+        """Get a cached completion, or None on a miss"""
+        return await self.backend.get(key)
+    
+    async def set(self, key: str, completion: str) -> None:
+        """Cache a completion"""
+        await self.backend.set(key, completion, self.ttl_seconds)
+    
+    async def close(self) -> None:
+        """Release the backend's resources"""
+        await self.backend.close()
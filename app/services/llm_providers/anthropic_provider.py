@@ -1,7 +1,25 @@
+import logging
 import anthropic
 from typing import List, Dict, Any, Optional, AsyncGenerator
+from app.config import settings
 from app.services.llm_providers.base_provider import BaseLLMProvider
 
+logger = logging.getLogger(__name__)
+
+# Process-wide clients by API key
+_clients: Dict[str, anthropic.AsyncAnthropic] = {}
+
+def get_client(api_key: str) -> anthropic.AsyncAnthropic:
+    """Get the process-wide client for an API key
+    
+    Every provider instance shares one client, and so one HTTP connection pool,
+    instead of opening its own connections.
+    """
+    client = _clients.get(api_key)
+    if client is None:
+        client = _clients[api_key] = anthropic.AsyncAnthropic(api_key=api_key, max_retries=settings.llm_max_retries)
+    return client
+
 class AnthropicProvider(BaseLLMProvider):
     """Anthropic LLM provider implementation"""
     
@@ -12,7 +30,7 @@ class AnthropicProvider(BaseLLMProvider):
             api_key: Anthropic API key
             model: Model to use (defaults to claude-3-haiku-20240307 if None)
         """
-        self.client = anthropic.AsyncAnthropic(api_key=api_key)
+        self.client = get_client(api_key)
         self.model = model or self.default_model
     
     async def generate_completion(self, system_prompt: str, user_prompt: str, **kwargs) -> str:
@@ -39,9 +57,9 @@ class AnthropicProvider(BaseLLMProvider):
             )
             return response.content[0].text
         except Exception as e:
-            # Log the error and return a friendly message
-            print(f"Anthropic API error: {str(e)}")
-            return f"I apologize, but I encountered an error while processing your request. Error: {str(e)}"
+            # Log the error and let the caller decide how to report it
+            logger.error("Anthropic API error: %s", e)
+            raise
     
     async def generate_completion_stream(self, system_prompt: str, user_prompt: str, **kwargs) -> AsyncGenerator[str, None]:
         """Generate a streaming completion using Anthropic
@@ -67,13 +85,18 @@ class AnthropicProvider(BaseLLMProvider):
                 stream=True
             )
             
-            async for chunk in stream:
-                if chunk.type == "content_block_delta" and chunk.delta.text:
-                    yield chunk.delta.text
+            try:
+                async for chunk in stream:
+                    if chunk.type == "content_block_delta" and chunk.delta.text:
+                        yield chunk.delta.text
+            finally:
+                # Release the HTTP response (and stop generation) as soon as the
+                # consumer stops, e.g. when the client disconnects mid-stream
+                await stream.close()
         except Exception as e:
-            # Log the error and yield a friendly message
-            print(f"Anthropic API error: {str(e)}")
-            yield f"I apologize, but I encountered an error while processing your request. Error: {str(e)}"
+            # Log the error and let the caller decide how to report it
+            logger.error("Anthropic API error: %s", e)
+            raise
     
     async def generate_multimodal_completion(self, system_prompt: str, user_prompt: str, image_urls: List[str], **kwargs) -> str:
         """Generate a completion using Anthropic with image inputs
@@ -116,9 +139,17 @@ class AnthropicProvider(BaseLLMProvider):
             )
             return response.content[0].text
         except Exception as e:
-            # Log the error and return a friendly message
-            print(f"Anthropic API error: {str(e)}")
-            return f"I apologize, but I encountered an error while processing your request. Error: {str(e)}"
+            # Log the error and let the caller decide how to report it
+            logger.error("Anthropic API error: %s", e)
+            raise
+    
+    @classmethod
+    async def close_clients(cls) -> None:
+        """Close the shared clients and their connection pools"""
+        clients = list(_clients.values())
+        _clients.clear()
+        for client in clients:
+            await client.close()
     
     @property
     def provider_name(self) -> str:
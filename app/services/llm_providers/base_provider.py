@@ -47,6 +47,11 @@ class BaseLLMProvider(ABC):
         """
         pass
     
+    @classmethod
+    async def close_clients(cls) -> None:
+        """Close any API clients shared by this provider's instances (on shutdown)"""
+        pass
+    
     @property
     @abstractmethod
     def provider_name(self) -> str:
@@ -1,8 +1,11 @@
+import logging
 import google.generativeai as genai
 from typing import List, Dict, Any, Optional, AsyncGenerator
 from app.services.llm_providers.base_provider import BaseLLMProvider
 import asyncio
 
+logger = logging.getLogger(__name__)
+
 class GeminiProvider(BaseLLMProvider):
     """Google Gemini LLM provider implementation"""
     
@@ -49,9 +52,9 @@ class GeminiProvider(BaseLLMProvider):
             
             return response.text
         except Exception as e:
-            # Log the error and return a friendly message
-            print(f"Gemini API error: {str(e)}")
-            return f"I apologize, but I encountered an error while processing your request. Error: {str(e)}"
+            # Log the error and let the caller decide how to report it
+            logger.error("Gemini API error: %s", e)
+            raise
     
     async def generate_completion_stream(self, system_prompt: str, user_prompt: str, **kwargs) -> AsyncGenerator[str, None]:
         """Generate a streaming completion using Gemini
@@ -91,9 +94,9 @@ class GeminiProvider(BaseLLMProvider):
                     if hasattr(part, 'text') and part.text:
                         yield part.text
         except Exception as e:
-            # Log the error and yield a friendly message
-            print(f"Gemini API error: {str(e)}")
-            yield f"I apologize, but I encountered an error while processing your request. Error: {str(e)}"
+            # Log the error and let the caller decide how to report it
+            logger.error("Gemini API error: %s", e)
+            raise
     
     async def generate_multimodal_completion(self, system_prompt: str, user_prompt: str, image_urls: List[str], **kwargs) -> str:
         """Generate a completion using Gemini with image inputs
@@ -145,9 +148,9 @@ class GeminiProvider(BaseLLMProvider):
             
             return response.text
         except Exception as e:
-            # Log the error and return a friendly message
-            print(f"Gemini API error: {str(e)}")
-            return f"I apologize, but I encountered an error while processing your request. Error: {str(e)}"
+            # Log the error and let the caller decide how to report it
+            logger.error("Gemini API error: %s", e)
+            raise
     
     @property
     def provider_name(self) -> str:
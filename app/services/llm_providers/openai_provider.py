@@ -1,7 +1,35 @@
-from openai import AsyncOpenAI
+import logging
+import httpx
+import orjson
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 from typing import List, Dict, Any, Optional, AsyncGenerator
+from app.config import settings
 from app.services.llm_providers.base_provider import BaseLLMProvider
 
+logger = logging.getLogger(__name__)
+
+# Process-wide clients by API key
+_clients: Dict[str, AsyncOpenAI] = {}
+
+def get_client(api_key: str) -> AsyncOpenAI:
+    """Get the process-wide client for an API key
+    
+    Every provider instance (chat, vision, embeddings) shares one client, and so
+    one HTTP connection pool, instead of opening its own connections. The pool
+    speaks HTTP/2, so concurrent requests and streams are multiplexed over a
+    few connections.
+    """
+    client = _clients.get(api_key)
+    if client is None:
+        # Keep every pooled connection alive between bursts, so requests skip the TLS handshake
+        limits = httpx.Limits(
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_connections
+        )
+        http_client = DefaultAsyncHttpxClient(limits=limits, http2=True)
+        client = _clients[api_key] = AsyncOpenAI(api_key=api_key, http_client=http_client, max_retries=settings.llm_max_retries)
+    return client
+
 class OpenAIProvider(BaseLLMProvider):
     """OpenAI LLM provider implementation"""
     
@@ -12,7 +40,7 @@ class OpenAIProvider(BaseLLMProvider):
             api_key: OpenAI API key
             model: Model to use (defaults to gpt-4o-mini if None)
         """
-        self.client = AsyncOpenAI(api_key=api_key)
+        self.client = get_client(api_key)
         self.model = model or self.default_model
     
     async def generate_completion(self, system_prompt: str, user_prompt: str, **kwargs) -> str:
@@ -41,9 +69,9 @@ class OpenAIProvider(BaseLLMProvider):
             )
             return response.choices[0].message.content
         except Exception as e:
-            # Log the error and return a friendly message
-            print(f"OpenAI API error: {str(e)}")
-            return f"I apologize, but I encountered an error while processing your request. Error: {str(e)}"
+            # Log the error and let the caller decide how to report it
+            logger.error("OpenAI API error: %s", e)
+            raise
     
     async def generate_completion_stream(self, system_prompt: str, user_prompt: str, **kwargs) -> AsyncGenerator[str, None]:
         """Generate a streaming completion using OpenAI
@@ -57,7 +85,11 @@ class OpenAIProvider(BaseLLMProvider):
             An async generator yielding completion chunks
         """
         try:
-            stream = await self.client.chat.completions.create(
+            # Read the raw event stream and take the deltas straight from the JSON, skipping
+            # the SDK's per-chunk model construction; leaving the block releases the HTTP
+            # response (and stops generation) as soon as the consumer stops, e.g. when the
+            # client disconnects mid-stream
+            async with self.client.chat.completions.with_streaming_response.create(
                 model=kwargs.get('model', self.model),
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -69,16 +101,27 @@ class OpenAIProvider(BaseLLMProvider):
                 frequency_penalty=kwargs.get('frequency_penalty', 0.0),
                 presence_penalty=kwargs.get('presence_penalty', 0.0),
                 stream=True
-            )
-            
-            async for chunk in stream:
-                content = chunk.choices[0].delta.content
-                if content is not None:
-                    yield content
+            ) as response:
+                async for line in response.iter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    
+                    chunk = orjson.loads(data)
+                    error = chunk.get("error")
+                    if error:
+                        raise RuntimeError(error.get("message", "An error occurred during streaming") if isinstance(error, dict) else str(error))
+                    choices = chunk.get("choices")
+                    if choices:
+                        content = choices[0]["delta"].get("content")
+                        if content:
+                            yield content
         except Exception as e:
-            # Log the error and yield a friendly message
-            print(f"OpenAI API error: {str(e)}")
-            yield f"I apologize, but I encountered an error while processing your request. Error: {str(e)}"
+            # Log the error and let the caller decide how to report it
+            logger.error("OpenAI API error: %s", e)
+            raise
     
     async def generate_multimodal_completion(self, system_prompt: str, user_prompt: str, image_urls: List[str], **kwargs) -> str:
         """Generate a completion using OpenAI with image inputs
@@ -120,9 +163,17 @@ class OpenAIProvider(BaseLLMProvider):
             )
             return response.choices[0].message.content
         except Exception as e:
-            # Log the error and return a friendly message
-            print(f"OpenAI API error: {str(e)}")
-            return f"I apologize, but I encountered an error while processing your request. Error: {str(e)}"
+            # Log the error and let the caller decide how to report it
+            logger.error("OpenAI API error: %s", e)
+            raise
+    
+    @classmethod
+    async def close_clients(cls) -> None:
+        """Close the shared clients and their connection pools"""
+        clients = list(_clients.values())
+        _clients.clear()
+        for client in clients:
+            await client.close()
     
     @property
     def provider_name(self) -> str:
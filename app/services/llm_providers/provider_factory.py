@@ -1,19 +1,21 @@
+import importlib
 from typing import Dict, Optional, Type
 from app.services.llm_providers.base_provider import BaseLLMProvider
-from app.services.llm_providers.openai_provider import OpenAIProvider
-from app.services.llm_providers.anthropic_provider import AnthropicProvider
-from app.services.llm_providers.gemini_provider import GeminiProvider
 
 class LLMProviderFactory:
     """Factory for creating LLM provider instances"""
     
-    # Registry of provider classes
-    _providers: Dict[str, Type[BaseLLMProvider]] = {
-        "openai": OpenAIProvider,
-        "anthropic": AnthropicProvider,
-        "gemini": GeminiProvider
+    # Registry of built-in provider classes as "module:class" paths, so each SDK is
+    # only imported when its provider is first created
+    _provider_paths: Dict[str, str] = {
+        "openai": "app.services.llm_providers.openai_provider:OpenAIProvider",
+        "anthropic": "app.services.llm_providers.anthropic_provider:AnthropicProvider",
+        "gemini": "app.services.llm_providers.gemini_provider:GeminiProvider"
     }
     
+    # Registry of loaded (or explicitly registered) provider classes
+    _providers: Dict[str, Type[BaseLLMProvider]] = {}
+    
     @classmethod
     def create_provider(cls, provider_name: str, api_key: str, model: Optional[str] = None) -> BaseLLMProvider:
         """Create a provider instance
@@ -29,9 +31,9 @@ class LLMProviderFactory:
         Raises:
             ValueError: If the provider is not supported
         """
-        provider_class = cls._providers.get(provider_name.lower())
+        provider_class = cls._load_provider(provider_name.lower())
         if not provider_class:
-            supported = ", ".join(cls._providers.keys())
+            supported = ", ".join({**cls._provider_paths, **cls._providers}.keys())
             raise ValueError(f"Unsupported provider: {provider_name}. Supported providers: {supported}")
         
         return provider_class(api_key=api_key, model=model)
@@ -53,4 +55,29 @@ class LLMProviderFactory:
         Returns:
             Dictionary of provider names to provider classes
         """
+        for name in cls._provider_paths:
+            cls._load_provider(name)
         return cls._providers.copy()
+    
+    @classmethod
+    async def close_clients(cls) -> None:
+        """Close the shared API clients of every provider that has been loaded"""
+        for provider_class in cls._providers.values():
+            await provider_class.close_clients()
+    
+    @classmethod
+    def _load_provider(cls, name: str) -> Optional[Type[BaseLLMProvider]]:
+        """Get a provider class, importing its module on first use
+        
+        Args:
+            name: Lower-cased name of the provider
+            
+        Returns:
+            The provider class, or None if the provider is unknown
+        """
+        provider_class = cls._providers.get(name)
+        if provider_class is None and name in cls._provider_paths:
+            module_name, class_name = cls._provider_paths[name].split(":")
+            provider_class = getattr(importlib.import_module(module_name), class_name)
+            cls._providers[name] = provider_class
+        return provider_class
@@ -1,11 +1,203 @@
 import asyncio
 import json
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Literal, Set
+import sys
+from datetime import timedelta
+from typing import List, Dict, Any, Optional, Literal, Set, Tuple, Iterable, FrozenSet, Sequence
 import numpy as np
-from app.models.memory import Memory, MemoryCreate
+from app.models.memory import MemoryRecord, MemoryCreate, compact_embedding
+from app.models._time import utcnow
 from app.models.role import Role
 from app.config import settings
+from app.utils.similarity_cache import SimilarityCache
+
+# Import hnswlib with error handling (optional approximate nearest-neighbor index)
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    HNSWLIB_AVAILABLE = False
+
+# Searches with at least this many candidates use the approximate index when available
+ANN_MIN_CANDIDATES = 2048
+# Nearest neighbors fetched per requested result, leaving room for the score re-ranking
+ANN_OVERSAMPLE = 4
+
+class EmbeddingMatrix:
+    """Contiguous int8 matrix of quantized, L2-normalized memory embeddings
+    
+    Rows are stored structure-of-arrays style (one row per memory ID, with a
+    per-row float32 scale) so that similarity search is a single matrix-vector
+    product instead of a Python loop.
+    """
+    
+    def __init__(self, initial_capacity: int = 64):
+        """Initialize an empty matrix
+        
+        Args:
+            initial_capacity: Number of rows to allocate once the dimension is known
+        """
+        self.initial_capacity = initial_capacity
+        self.matrix: Optional[np.ndarray] = None
+        self.scales: Optional[np.ndarray] = None
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        
+        # Optional HNSW index over the same vectors; labels are stable per memory,
+        # unlike rows, which move when a memory is removed
+        self.ann_index = None
+        self.labels: Dict[str, int] = {}
+        self.label_ids: Dict[int, str] = {}
+        self._next_label = 0
+        self._free_slots = 0
+    
+    @property
+    def dimension(self) -> Optional[int]:
+        """Embedding dimension, or None if nothing has been stored yet"""
+        return None if self.matrix is None else self.matrix.shape[1]
+    
+    def normalize(self, embedding: Sequence[float]) -> Optional[np.ndarray]:
+        """Convert an embedding to a unit-length float32 vector
+        
+        Args:
+            embedding: The embedding to convert
+            
+        Returns:
+            The normalized vector, or None if it is empty, zero, or the wrong dimension
+        """
+        vector = np.asarray(embedding, dtype=np.float32)
+        if vector.ndim != 1 or vector.size == 0:
+            return None
+        if self.dimension is not None and vector.shape[0] != self.dimension:
+            return None
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return None
+        return vector / norm
+    
+    def add(self, memory_id: str, embedding: Sequence[float]) -> None:
+        """Add (or replace) the embedding for a memory
+        
+        Args:
+            memory_id: The ID of the memory
+            embedding: The embedding of the memory content
+        """
+        vector = self.normalize(embedding)
+        if vector is None:
+            return
+        
+        # Symmetric int8 quantization with a per-vector scale
+        scale = np.abs(vector).max() / 127.0
+        quantized = np.round(vector / scale).astype(np.int8)
+        
+        if HNSWLIB_AVAILABLE:
+            self._index_vector(memory_id, vector)
+        
+        if memory_id in self.rows:
+            row = self.rows[memory_id]
+            self.matrix[row] = quantized
+            self.scales[row] = scale
+            return
+        
+        if self.matrix is None:
+            self.matrix = np.empty((self.initial_capacity, vector.shape[0]), dtype=np.int8)
+            self.scales = np.empty(self.initial_capacity, dtype=np.float32)
+        elif len(self.ids) == self.matrix.shape[0]:
+            # Grow geometrically so appends are amortized O(1)
+            grown = np.empty((self.matrix.shape[0] * 2, self.matrix.shape[1]), dtype=np.int8)
+            grown[:len(self.ids)] = self.matrix[:len(self.ids)]
+            self.matrix = grown
+            grown_scales = np.empty(self.scales.shape[0] * 2, dtype=np.float32)
+            grown_scales[:len(self.ids)] = self.scales[:len(self.ids)]
+            self.scales = grown_scales
+        
+        row = len(self.ids)
+        self.rows[memory_id] = row
+        self.matrix[row] = quantized
+        self.scales[row] = scale
+        self.ids.append(memory_id)
+    
+    def remove(self, memory_id: str) -> None:
+        """Remove the embedding for a memory, if present
+        
+        Args:
+            memory_id: The ID of the memory
+        """
+        row = self.rows.pop(memory_id, None)
+        if row is None:
+            return
+        
+        label = self.labels.pop(memory_id, None)
+        if label is not None:
+            del self.label_ids[label]
+            self.ann_index.mark_deleted(label)
+            self._free_slots += 1
+        
+        # Move the last row into the freed slot to keep the matrix dense
+        last_row = len(self.ids) - 1
+        last_id = self.ids.pop()
+        if row != last_row:
+            self.matrix[row] = self.matrix[last_row]
+            self.scales[row] = self.scales[last_row]
+            self.ids[row] = last_id
+            self.rows[last_id] = row
+    
+    def similarities(self, memory_ids: List[str], query: np.ndarray) -> np.ndarray:
+        """Compute cosine similarities between a normalized query and stored memories
+        
+        Args:
+            memory_ids: IDs of memories to score (all must have stored embeddings)
+            query: The normalized query vector
+            
+        Returns:
+            Array of similarities, aligned with memory_ids
+        """
+        rows = np.fromiter((self.rows[memory_id] for memory_id in memory_ids), dtype=np.intp, count=len(memory_ids))
+        # The query stays float32; only the gathered int8 rows are widened for the product
+        return (self.matrix[rows].astype(np.float32) @ query) * self.scales[rows]
+    
+    def nearest(self, memory_ids: List[str], query: np.ndarray, k: int) -> Tuple[List[str], np.ndarray]:
+        """Find the memories most similar to a normalized query using the HNSW index
+        
+        Args:
+            memory_ids: IDs of the candidate memories (all must have stored embeddings)
+            query: The normalized query vector
+            k: Maximum number of memories to return
+            
+        Returns:
+            The IDs of the nearest candidates and their cosine similarities
+        """
+        allowed = {self.labels[memory_id] for memory_id in memory_ids}
+        k = min(k, len(allowed))
+        self.ann_index.set_ef(max(k, 64))
+        labels, distances = self.ann_index.knn_query(query, k=k, filter=allowed.__contains__)
+        # Inner-product distance on unit vectors is 1 - cosine similarity
+        return [self.label_ids[label] for label in labels[0]], 1.0 - distances[0]
+    
+    def _index_vector(self, memory_id: str, vector: np.ndarray) -> None:
+        """Add (or replace) a normalized vector in the HNSW index
+        
+        Args:
+            memory_id: The ID of the memory
+            vector: The normalized embedding
+        """
+        if self.ann_index is None:
+            self.ann_index = hnswlib.Index(space="ip", dim=vector.shape[0])
+            self.ann_index.init_index(max_elements=self.initial_capacity, ef_construction=64, M=16, allow_replace_deleted=True)
+        
+        label = self.labels.get(memory_id)
+        if label is None:
+            label = self._next_label
+            self._next_label += 1
+            self.labels[memory_id] = label
+            self.label_ids[label] = memory_id
+            
+            # Deleted slots are reused first; grow geometrically once none are left
+            if self._free_slots:
+                self._free_slots -= 1
+            elif self.ann_index.get_current_count() >= self.ann_index.get_max_elements():
+                self.ann_index.resize_index(self.ann_index.get_max_elements() * 2)
+        
+        self.ann_index.add_items(vector.reshape(1, -1), np.array([label]), replace_deleted=True)
 
 class MemoryService:
     """Service for managing memory storage and retrieval"""
@@ -14,9 +206,23 @@ class MemoryService:
         """Initialize the memory service"""
         # In-memory storage for memories
         # For production, this would be replaced with a proper database
-        self.memories: Dict[str, List[Memory]] = {}
+        self.memories: Dict[str, List[MemoryRecord]] = {}
+        
+        # Index of every stored memory (including shared copies) by memory ID
+        self.memories_by_id: Dict[str, MemoryRecord] = {}
+        
+        # Normalized embeddings for similarity search, keyed by memory ID
+        self.embeddings = EmbeddingMatrix()
+        
+        # Results of recent semantic searches, reused for near-identical queries
+        # Format: value = (searched_role_ids, results); searched_role_ids is None for searches across all roles
+        self.search_cache: SimilarityCache[Tuple[Optional[FrozenSet[str]], Tuple[MemoryRecord, ...]]] = SimilarityCache(
+            settings.search_cache_size,
+            settings.search_cache_similarity,
+            settings.search_cache_ttl
+        )
     
-    async def store_memory(self, memory_create: MemoryCreate, embedding: Optional[List[float]] = None) -> Memory:
+    async def store_memory(self, memory_create: MemoryCreate, embedding: Optional[Sequence[float]] = None) -> MemoryRecord:
         """Store a new memory
         
         Args:
@@ -26,26 +232,29 @@ class MemoryService:
         Returns:
             The stored memory
         """
+        embedding = compact_embedding(embedding)
+        
         # Calculate expiration time based on memory type
         expires_at = None
         if memory_create.type == "session":
-            expires_at = datetime.now() + timedelta(seconds=settings.memory_ttl_session)
+            expires_at = utcnow() + timedelta(seconds=settings.memory_ttl_session)
         elif memory_create.type == "user":
-            expires_at = datetime.now() + timedelta(seconds=settings.memory_ttl_user)
+            expires_at = utcnow() + timedelta(seconds=settings.memory_ttl_user)
         elif memory_create.type == "knowledge":
-            expires_at = datetime.now() + timedelta(seconds=settings.memory_ttl_knowledge)
+            expires_at = utcnow() + timedelta(seconds=settings.memory_ttl_knowledge)
         
-        # Create the memory object
-        memory = Memory(
-            role_id=memory_create.role_id,
+        # Create the memory record (the short, highly repeated strings are interned
+        # so every record shares one copy of each)
+        memory = MemoryRecord(
+            role_id=sys.intern(memory_create.role_id),
             content=memory_create.content,
-            type=memory_create.type,
-            importance=memory_create.importance,
+            type=sys.intern(memory_create.type),
+            importance=sys.intern(memory_create.importance),
             embedding=embedding,
             expires_at=expires_at,
-            tags=memory_create.tags,
-            category=memory_create.category,
-            shared_with=memory_create.shared_with,
+            tags=frozenset(sys.intern(tag) for tag in memory_create.tags),
+            category=sys.intern(memory_create.category) if memory_create.category else memory_create.category,
+            shared_with=frozenset(sys.intern(role_id) for role_id in memory_create.shared_with),
             parent_memory_id=memory_create.parent_memory_id
         )
         
@@ -55,6 +264,9 @@ class MemoryService:
         
         # Add memory to storage
         self.memories[memory.role_id].append(memory)
+        self.memories_by_id[memory.id] = memory
+        if embedding:
+            self.embeddings.add(memory.id, embedding)
         
         # If this memory is shared with other roles, add references to their memory collections
         for shared_role_id in memory.shared_with:
@@ -62,7 +274,7 @@ class MemoryService:
                 self.memories[shared_role_id] = []
             
             # Create a shared copy with the parent memory ID reference
-            shared_memory = Memory(
+            shared_memory = MemoryRecord(
                 role_id=shared_role_id,
                 content=memory.content,
                 type=memory.type,
@@ -71,14 +283,38 @@ class MemoryService:
                 expires_at=memory.expires_at,
                 tags=memory.tags,
                 category=memory.category,
-                shared_with=[],  # Don't propagate sharing further
+                shared_with=frozenset(),  # Don't propagate sharing further
                 parent_memory_id=memory.id  # Reference the original memory
             )
             
             self.memories[shared_role_id].append(shared_memory)
+            self.memories_by_id[shared_memory.id] = shared_memory
+            if shared_memory.embedding:
+                self.embeddings.add(shared_memory.id, shared_memory.embedding)
+        
+        self._invalidate_searches(memory.shared_with | {memory.role_id})
         
         return memory
     
+    async def store_memories_bulk(
+        self,
+        memory_creates: List[MemoryCreate],
+        embeddings: List[Optional[Sequence[float]]]
+    ) -> List[MemoryRecord]:
+        """Store several new memories
+        
+        Args:
+            memory_creates: The memory data to store
+            embeddings: Vector embeddings of the memory contents, aligned with memory_creates
+            
+        Returns:
+            The stored memories, in the same order
+        """
+        return [
+            await self.store_memory(memory_create, embedding)
+            for memory_create, embedding in zip(memory_creates, embeddings)
+        ]
+    
     async def get_memories_by_role_id(
         self, 
         role_id: str, 
@@ -88,7 +324,7 @@ class MemoryService:
         include_shared: bool = True,
         include_inherited: bool = True,
         role: Optional[Role] = None
-    ) -> List[Memory]:
+    ) -> List[MemoryRecord]:
         """Get memories for a specific role
         
         Args:
@@ -103,20 +339,8 @@ class MemoryService:
         Returns:
             List of memories for the role
         """
-        # Initialize result list
-        all_memories = []
-        
-        # Check if role has any memories
-        if role_id in self.memories:
-            # Filter expired memories
-            now = datetime.now()
-            valid_memories = [m for m in self.memories[role_id] if not m.expires_at or m.expires_at > now]
-            
-            # Update the memories list to remove expired memories
-            self.memories[role_id] = valid_memories
-            
-            # Add to result list
-            all_memories.extend(valid_memories)
+        # Initialize result list with the role's own unexpired memories
+        all_memories = list(self._valid_memories(role_id))
         
         # Include inherited memories if requested and role has a parent
         if include_inherited and role and role.inherit_memories and role.parent_role_id:
@@ -149,45 +373,73 @@ class MemoryService:
             # Add inherited memories to result
             all_memories.extend(parent_memories)
         
-        # Apply filters to all collected memories
-        filtered_memories = all_memories
-        
-        # Filter by type if specified
-        if memory_type:
-            filtered_memories = [m for m in filtered_memories if m.type == memory_type]
-        
-        # Filter by category if specified
-        if category:
-            filtered_memories = [m for m in filtered_memories if m.category == category]
-        
-        # Filter by tags if specified
-        if tags and len(tags) > 0:
-            filtered_memories = [m for m in filtered_memories if any(tag in m.tags for tag in tags)]
-        
-        # Filter out shared memories if not requested
-        if not include_shared:
-            filtered_memories = [m for m in filtered_memories if not m.parent_memory_id]
-        
-        # Remove duplicates (in case of multiple inheritance paths)
+        # Apply all filters in a single pass, removing duplicates (in case of
+        # multiple inheritance paths) as we go
+        tag_set = frozenset(tags) if tags else None
         unique_memories = {}
-        for memory in filtered_memories:
+        for memory in all_memories:
+            # Filter by type if specified
+            if memory_type and memory.type != memory_type:
+                continue
+            
+            # Filter by category if specified
+            if category and memory.category != category:
+                continue
+            
+            # Filter by tags if specified (set-to-set disjointness checks the smaller side)
+            if tag_set and memory.tags.isdisjoint(tag_set):
+                continue
+            
+            # Filter out shared memories if not requested
+            if not include_shared and memory.parent_memory_id:
+                continue
+            
             if memory.id not in unique_memories:
                 unique_memories[memory.id] = memory
         
         return list(unique_memories.values())
     
+    async def get_memory_by_id(self, memory_id: str, role_id: Optional[str] = None) -> Optional[MemoryRecord]:
+        """Get a single memory by ID
+        
+        Args:
+            memory_id: The ID of the memory
+            role_id: Optional ID of the role the memory must belong to
+            
+        Returns:
+            The memory, or None if it doesn't exist, has expired, or belongs to another role
+        """
+        memory = self.memories_by_id.get(memory_id)
+        if memory is None or (role_id is not None and memory.role_id != role_id):
+            return None
+        if memory.expires_at and memory.expires_at <= utcnow():
+            return None
+        return memory
+    
+    async def get_shared_memories_by_role_id(self, role_id: str) -> List[MemoryRecord]:
+        """Get the memories that other roles have shared with a role
+        
+        Args:
+            role_id: The ID of the role to get shared memories for
+            
+        Returns:
+            List of shared memories (those with a parent memory)
+        """
+        return [m for m in self._valid_memories(role_id) if m.parent_memory_id]
+    
     async def get_relevant_memories(
         self, 
         role_id: str, 
         query: str, 
-        embedding: List[float], 
+        embedding: Sequence[float], 
         limit: int = 5,
         category: Optional[str] = None,
         tags: Optional[List[str]] = None,
         include_shared: bool = True,
         cross_role: bool = False,
-        related_role_ids: Optional[List[str]] = None
-    ) -> List[Memory]:
+        related_role_ids: Optional[List[str]] = None,
+        exact: bool = False
+    ) -> List[MemoryRecord]:
         """Get memories relevant to a query using vector similarity
         
         Args:
@@ -200,6 +452,7 @@ class MemoryService:
             include_shared: Whether to include memories shared from other roles
             cross_role: Whether to search across all roles (for admin/supervisor roles)
             related_role_ids: Optional list of specific role IDs to include in the search
+            exact: Skip the similarity cache, always scoring the query itself
             
         Returns:
             List of relevant memories
@@ -207,6 +460,20 @@ class MemoryService:
         if not embedding:
             return []
         
+        query_embedding = self.embeddings.normalize(embedding)
+        if query_embedding is None:
+            return []
+        
+        # Reuse the results of a near-identical recent query with the same filters
+        filters = (
+            role_id, limit, category, tuple(tags or ()), include_shared,
+            cross_role, tuple(related_role_ids or ())
+        )
+        if not exact:
+            cached = self.search_cache.get(filters, query_embedding)
+            if cached is not None:
+                return list(cached[1])
+        
         # Determine which roles to search
         roles_to_search = []
         
@@ -236,39 +503,37 @@ class MemoryService:
             )
             all_memories.extend(role_memories)
         
-        # Filter memories that have embeddings
-        memories_with_embeddings = [m for m in all_memories if m.embedding]
+        # Filter memories that have stored embeddings
+        memories_with_embeddings = [m for m in all_memories if m.id in self.embeddings.rows]
         
         if not memories_with_embeddings:
             return []
         
-        # Calculate similarity scores
-        # In a production environment, this would use a proper vector database
-        scores = []
-        for memory in memories_with_embeddings:
-            # Skip memories without embeddings
-            if not memory.embedding:
-                continue
-                
-            # Convert embeddings to numpy arrays for calculation
-            memory_embedding = np.array(memory.embedding)
-            query_embedding = np.array(embedding)
-            
-            # Calculate cosine similarity
-            similarity = np.dot(memory_embedding, query_embedding) / (
-                np.linalg.norm(memory_embedding) * np.linalg.norm(query_embedding)
-            )
-            
-            # Adjust score by importance
-            importance_multiplier = {
-                "low": 0.8,
-                "medium": 1.0,
-                "high": 1.2
-            }.get(memory.importance, 1.0)
+        if self.embeddings.ann_index is not None and len(memories_with_embeddings) >= ANN_MIN_CANDIDATES:
+            # Narrow large candidate sets with the HNSW index before re-ranking; the
+            # oversampling leaves room for importance/recency/tags to reorder the top hits
+            by_id = {m.id: m for m in memories_with_embeddings}
+            nearest_ids, similarities = self.embeddings.nearest(list(by_id), query_embedding, limit * ANN_OVERSAMPLE)
+            memories_with_embeddings = [by_id[memory_id] for memory_id in nearest_ids]
+        else:
+            # Calculate cosine similarity for all candidates with one matrix-vector product
+            similarities = self.embeddings.similarities([m.id for m in memories_with_embeddings], query_embedding)
+        
+        # Adjust score by importance
+        importance_multipliers = {
+            "low": 0.8,
+            "medium": 1.0,
+            "high": 1.2
+        }
+        
+        # Adjust score by recency (newer memories get higher scores), decaying over 30 days
+        now = utcnow()
+        factors = np.empty(len(memories_with_embeddings), dtype=np.float32)
+        for i, memory in enumerate(memories_with_embeddings):
+            importance_multiplier = importance_multipliers.get(memory.importance, 1.0)
             
-            # Adjust score by recency (newer memories get higher scores)
-            time_diff = (datetime.now() - memory.created_at).total_seconds()
-            recency_factor = max(0.8, 1.0 - (time_diff / (30 * 24 * 60 * 60)) * 0.2)  # Decay over 30 days
+            time_diff = (now - memory.created_at).total_seconds()
+            recency_factor = max(0.8, 1.0 - (time_diff / (30 * 24 * 60 * 60)) * 0.2)
             
             # Adjust score by tag relevance if tags are provided
             tag_factor = 1.0
@@ -276,16 +541,23 @@ class MemoryService:
                 matching_tags = sum(1 for tag in tags if tag in memory.tags)
                 tag_factor = 1.0 + (matching_tags / len(tags)) * 0.2  # Up to 20% boost for matching tags
             
-            # Calculate final score
-            adjusted_score = similarity * importance_multiplier * recency_factor * tag_factor
-            
-            scores.append((memory, adjusted_score))
+            factors[i] = importance_multiplier * recency_factor * tag_factor
         
-        # Sort by similarity score
-        scores.sort(key=lambda x: x[1], reverse=True)
+        # Calculate final scores
+        scores = similarities * factors
+        
+        # Select the top memories without sorting every score
+        if limit < len(scores):
+            top = np.argpartition(-scores, limit)[:limit]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
         
         # Return top memories
-        return [m[0] for m in scores[:limit]]
+        results = [memories_with_embeddings[i] for i in top]
+        self.search_cache.put(filters, query_embedding, (None if cross_role else frozenset(roles_to_search), tuple(results)))
+        
+        return results
     
     async def clear_memories_by_role_id(
         self, 
@@ -321,12 +593,13 @@ class MemoryService:
             memories = [m for m in memories if m.category != category]
         
         if tags and len(tags) > 0:
-            memories = [m for m in memories if not any(tag in m.tags for tag in tags)]
+            memories = [m for m in memories if m.tags.isdisjoint(tags)]
         
         if shared_only:
             memories = [m for m in memories if not m.parent_memory_id]
         
         # Update the memories list
+        self._forget_memories(self.memories[role_id], memories)
         self.memories[role_id] = memories
         
         return True
@@ -341,30 +614,8 @@ class MemoryService:
         Returns:
             List of roles in the inheritance chain, starting with the specified role
         """
-        # Initialize result list and visited set to prevent cycles
-        inheritance_chain = []
-        visited_roles = set()
-        
-        # Start with the specified role
-        current_role_id = role_id
-        
-        # Follow the inheritance chain
-        while current_role_id and current_role_id not in visited_roles:
-            # Mark as visited to prevent cycles
-            visited_roles.add(current_role_id)
-            
-            # Get the role
-            role = await role_service.get_role_by_id(current_role_id)
-            if not role:
-                break
-                
-            # Add to inheritance chain
-            inheritance_chain.append(role)
-            
-            # Move to parent role
-            current_role_id = role.parent_role_id if role.inherit_memories else None
-        
-        return inheritance_chain
+        # Chains depend only on roles, so the role service walks and caches them
+        return list(await role_service.get_inheritance_chain(role_id))
     
     async def get_related_roles(self, role_id: str, role_service) -> List[str]:
         """Get related roles (roles that share memories or have inheritance relationships)
@@ -387,11 +638,8 @@ class MemoryService:
         if role.inherit_memories and role.parent_role_id:
             related_roles.add(role.parent_role_id)
             
-        # Add child roles (roles that inherit from this role)
-        all_roles = await role_service.get_roles()
-        for other_role in all_roles:
-            if other_role.parent_role_id == role_id and other_role.inherit_memories:
-                related_roles.add(other_role.id)
+        # Add child roles (roles that inherit from this role), indexed by the role service
+        related_roles.update(await role_service.get_child_role_ids(role_id))
                 
         # Add roles that this role has shared memories with
         if role_id in self.memories:
@@ -413,6 +661,58 @@ class MemoryService:
             
         return list(related_roles)
     
+    def _valid_memories(self, role_id: str) -> List[MemoryRecord]:
+        """Get a role's own memories, dropping any that have expired
+        
+        Args:
+            role_id: The ID of the role
+            
+        Returns:
+            The role's unexpired memories
+        """
+        if role_id not in self.memories:
+            return []
+        
+        # Filter expired memories
+        now = utcnow()
+        valid_memories = [m for m in self.memories[role_id] if not m.expires_at or m.expires_at > now]
+        
+        # Update the memories list to remove expired memories
+        if len(valid_memories) != len(self.memories[role_id]):
+            self._forget_memories(self.memories[role_id], valid_memories)
+            self.memories[role_id] = valid_memories
+        
+        return valid_memories
+    
+    def _forget_memories(self, old_memories: List[MemoryRecord], kept_memories: List[MemoryRecord]) -> None:
+        """Drop the ID index entries, stored embeddings, and cached searches of memories that are no longer kept
+        
+        Args:
+            old_memories: The memories before filtering
+            kept_memories: The memories that remain
+        """
+        kept_ids = {m.id for m in kept_memories}
+        forgotten_role_ids = set()
+        for memory in old_memories:
+            if memory.id not in kept_ids:
+                self.memories_by_id.pop(memory.id, None)
+                self.embeddings.remove(memory.id)
+                forgotten_role_ids.add(memory.role_id)
+        
+        if forgotten_role_ids:
+            self._invalidate_searches(forgotten_role_ids)
+    
+    def _invalidate_searches(self, role_ids: Iterable[str]) -> None:
+        """Drop cached searches that covered any of the given roles
+        
+        Args:
+            role_ids: The roles whose memories changed
+        """
+        role_ids = frozenset(role_ids)
+        self.search_cache.discard(
+            lambda cached: cached[0] is None or not cached[0].isdisjoint(role_ids)
+        )
+    
     async def close(self):
         """Clean up resources"""
         # In a production environment, this would clean up database connections
@@ -1,4 +1,3 @@
-import base64
 import os
 import asyncio
 from typing import List, Dict, Any, Optional, AsyncGenerator, Tuple
@@ -12,44 +11,32 @@ class MultiModalProcessor:
     
     def __init__(self):
         """Initialize the multi-modal processor"""
-        # Initialize providers based on available API keys
-        self.providers = {}
+        # Register providers based on available API keys; each provider (and its SDK)
+        # is only loaded the first time it is used
+        # Format: {provider_name: (api_key, model)}
+        self.provider_configs: Dict[str, Tuple[str, Optional[str]]] = {}
+        self.providers: Dict[str, BaseLLMProvider] = {}
         
-        # Initialize OpenAI provider if API key is available
+        # Register OpenAI provider if API key is available
         if settings.openai_api_key:
-            self.providers["openai"] = LLMProviderFactory.create_provider(
-                "openai", 
-                settings.openai_api_key, 
-                settings.openai_model
-            )
+            self.provider_configs["openai"] = (settings.openai_api_key, settings.openai_model)
         
-        # Initialize Anthropic provider if API key is available
+        # Register Anthropic provider if API key is available
         if settings.anthropic_api_key:
-            self.providers["anthropic"] = LLMProviderFactory.create_provider(
-                "anthropic", 
-                settings.anthropic_api_key, 
-                settings.anthropic_model
-            )
+            self.provider_configs["anthropic"] = (settings.anthropic_api_key, settings.anthropic_model)
         
-        # Initialize Gemini provider if API key is available
+        # Register Gemini provider if API key is available
         if settings.gemini_api_key:
-            self.providers["gemini"] = LLMProviderFactory.create_provider(
-                "gemini", 
-                settings.gemini_api_key, 
-                settings.gemini_model
-            )
+            self.provider_configs["gemini"] = (settings.gemini_api_key, settings.gemini_model)
         
         # Ensure we have at least one provider available
-        if not self.providers:
+        if not self.provider_configs:
             raise ValueError("No LLM providers available. Please configure at least one provider API key.")
         
         # Use the default provider if available, otherwise use the first available provider
         self.default_provider_name = settings.default_provider
-        if self.default_provider_name in self.providers:
-            self.default_provider = self.providers[self.default_provider_name]
-        else:
-            self.default_provider_name = next(iter(self.providers.keys()))
-            self.default_provider = self.providers[self.default_provider_name]
+        if self.default_provider_name not in self.provider_configs:
+            self.default_provider_name = next(iter(self.provider_configs.keys()))
     
     async def process_multimodal_content(self, system_prompt: str, content: MultiModalContent, provider_name: Optional[str] = None) -> str:
         """Process multi-modal content and generate a response
@@ -95,7 +82,7 @@ class MultiModalProcessor:
                     )
                 else:
                     # Fall back to OpenAI if the provider doesn't support multi-modal
-                    fallback_provider = self.providers.get("openai")
+                    fallback_provider = self.get_provider("openai") if "openai" in self.provider_configs else None
                     if not fallback_provider:
                         raise ValueError("No provider with multi-modal capabilities is available")
                     
@@ -189,8 +176,8 @@ class MultiModalProcessor:
                             image_content["image_url"] = {"url": media.base64_data}
                     
                     # Add detail level if specified in metadata
-                    if media.metadata and "detail" in media.metadata:
-                        image_content["image_url"]["detail"] = media.metadata["detail"]
+                    if media.metadata and media.metadata.detail is not None:
+                        image_content["image_url"]["detail"] = media.metadata.detail
                     
                     message_content.append(image_content)
                 
@@ -223,14 +210,18 @@ class MultiModalProcessor:
             ValueError: If the provider is not available
         """
         # Use the default provider if none specified
-        if not provider_name:
-            return self.default_provider
+        name = provider_name.lower() if provider_name else self.default_provider_name
         
-        # Get the requested provider
-        provider = self.providers.get(provider_name.lower())
+        # Get the requested provider, creating it on first use
+        provider = self.providers.get(name)
         if not provider:
-            available = ", ".join(self.providers.keys())
-            raise ValueError(f"Provider '{provider_name}' not available. Available providers: {available}")
+            if name not in self.provider_configs:
+                available = ", ".join(self.provider_configs.keys())
+                raise ValueError(f"Provider '{provider_name}' not available. Available providers: {available}")
+            
+            api_key, model = self.provider_configs[name]
+            provider = LLMProviderFactory.create_provider(name, api_key, model)
+            self.providers[name] = provider
         
         return provider
     
@@ -240,7 +231,7 @@ class MultiModalProcessor:
         Returns:
             Dictionary of provider names to model names
         """
-        return {name: provider.default_model for name, provider in self.providers.items()}
+        return {name: self.get_provider(name).default_model for name in self.provider_configs}
     
     async def analyze_image(self, image_data: str, prompt: str, provider_name: Optional[str] = None) -> str:
         """Analyze an image using the vision model
@@ -276,7 +267,7 @@ class MultiModalProcessor:
                 return await provider.generate_multimodal_completion("You are a helpful assistant.", prompt, media_urls)
             else:
                 # Fall back to OpenAI if the provider doesn't support multi-modal
-                fallback_provider = self.providers.get("openai")
+                fallback_provider = self.get_provider("openai") if "openai" in self.provider_configs else None
                 if not fallback_provider:
                     raise ValueError("No provider with multi-modal capabilities is available")
                 
@@ -1,12 +1,16 @@
 import json
-from typing import List, Dict, Any, Optional, AsyncGenerator
+import hashlib
+from typing import List, Dict, Any, Optional, AsyncGenerator, Tuple, Set, FrozenSet
 from fastapi import HTTPException
 from app.models.role import Role, RoleCreate, RoleUpdate
 from app.models.memory import Memory, MemoryCreate
 from app.services.memory_service import MemoryService
 from app.services.ai_processor import AIProcessor
 from app.services.domain_analysis_service import DomainAnalysisService
-from app.config import DEFAULT_ROLES, TONE_PROFILES
+from app.config import DEFAULT_ROLES, TONE_PROFILES, get_tone_guidance
+
+# Maximum number of assembled system prompts kept in memory
+PROMPT_CACHE_SIZE = 512
 
 class RoleService:
     """Service for managing roles and processing queries"""
@@ -26,10 +30,39 @@ class RoleService:
         # For production, this would be replaced with a proper database
         self.roles: Dict[str, Role] = {}
         
-        # Initialize default roles
-        for role_data in DEFAULT_ROLES:
-            role = Role(**role_data)
+        # Initialize default roles (pre-validated, immutable instances)
+        for role in DEFAULT_ROLES:
             self.roles[role.id] = role
+        
+        # Cache of assembled system prompts (without memories)
+        # Format: {(role.prompt_hash, custom_instructions_hash): prompt}
+        self._prompt_cache: Dict[Tuple[bytes, bytes], str] = {}
+        
+        # Sorted union of all role domains, rebuilt after roles change
+        self._all_domains: Optional[List[str]] = None
+        
+        # Inheritance chains by starting role ID, cleared after roles change
+        self._inheritance_chains: Dict[str, Tuple[Role, ...]] = {}
+        
+        # Trigram index for text search: lower-cased (name, description, instructions)
+        # per role ID, and the IDs of roles containing each trigram; rebuilt after roles change
+        self._search_texts: Optional[Dict[str, Tuple[str, str, str]]] = None
+        self._search_index: Optional[Dict[str, Set[str]]] = None
+        
+        # IDs of the roles inheriting memories from each parent role, rebuilt after roles change
+        self._children_by_parent: Optional[Dict[str, FrozenSet[str]]] = None
+        
+        # Incremented on every role change (used for HTTP cache validators)
+        self.version = 0
+    
+    def _roles_changed(self) -> None:
+        """Drop the data derived from the role set and bump the version after a role changes"""
+        self._all_domains = None
+        self._inheritance_chains.clear()
+        self._search_texts = None
+        self._search_index = None
+        self._children_by_parent = None
+        self.version += 1
     
     async def get_roles(self, search_query: Optional[str] = None, domains: Optional[List[str]] = None, tone: Optional[str] = None) -> List[Role]:
         """Get all available roles with optional filtering
@@ -47,12 +80,15 @@ class RoleService:
         # Apply filters if provided
         if search_query:
             search_query = search_query.lower()
+            search_texts = self._get_search_texts()
+            
+            # Narrow to roles containing every trigram of the query, then confirm the substring
+            candidates = self._search_candidates(search_query)
+            if candidates is not None:
+                roles = [role for role in roles if role.id in candidates]
             roles = [
-                role for role in roles if (
-                    search_query in role.name.lower() or
-                    search_query in role.description.lower() or
-                    search_query in role.instructions.lower()
-                )
+                role for role in roles
+                if any(search_query in text for text in search_texts[role.id])
             ]
         
         if domains:
@@ -66,6 +102,59 @@ class RoleService:
         
         return roles
     
+    def _get_search_texts(self) -> Dict[str, Tuple[str, str, str]]:
+        """Get the lower-cased searchable text of every role, building the trigram index if needed
+        
+        Returns:
+            Mapping of role ID to lower-cased (name, description, instructions)
+        """
+        if self._search_texts is None:
+            search_texts = {}
+            search_index: Dict[str, Set[str]] = {}
+            for role in self.roles.values():
+                texts = (role.name.lower(), role.description.lower(), role.instructions.lower())
+                search_texts[role.id] = texts
+                for text in texts:
+                    for i in range(len(text) - 2):
+                        search_index.setdefault(text[i:i + 3], set()).add(role.id)
+            self._search_texts = search_texts
+            self._search_index = search_index
+        
+        return self._search_texts
+    
+    def _search_candidates(self, search_query: str) -> Optional[Set[str]]:
+        """Get the IDs of roles that may contain a lower-cased query
+        
+        Args:
+            search_query: The lower-cased search text
+            
+        Returns:
+            Candidate role IDs, or None if the query is too short to use the index
+        """
+        if len(search_query) < 3:
+            return None
+        
+        # Intersect the smallest posting sets first
+        postings = sorted(
+            (self._search_index.get(search_query[i:i + 3], set()) for i in range(len(search_query) - 2)),
+            key=len
+        )
+        return postings[0].intersection(*postings[1:])
+    
+    async def get_all_domains(self) -> List[str]:
+        """Get all unique domains used across all roles
+        
+        Returns:
+            Sorted list of domains
+        """
+        if self._all_domains is None:
+            all_domains = set()
+            for role in self.roles.values():
+                all_domains.update(role.domains)
+            self._all_domains = sorted(all_domains)
+        
+        return self._all_domains
+    
     async def get_role(self, role_id: str) -> Role:
         """Get a specific role by ID
         
@@ -78,10 +167,86 @@ class RoleService:
         Raises:
             HTTPException: If the role doesn't exist
         """
-        if role_id not in self.roles:
+        role = self.roles.get(role_id)
+        if role is None:
             raise HTTPException(status_code=404, detail="Role not found")
         
-        return self.roles[role_id]
+        return role
+    
+    async def get_role_by_id(self, role_id: str) -> Optional[Role]:
+        """Get a specific role by ID, without raising if it doesn't exist
+        
+        Args:
+            role_id: The ID of the role to retrieve
+            
+        Returns:
+            The role, or None if it doesn't exist
+        """
+        return self.roles.get(role_id)
+    
+    async def get_roles_by_ids(self, role_ids: List[str]) -> List[Role]:
+        """Get several roles by ID in one lookup
+        
+        Args:
+            role_ids: The IDs of the roles to retrieve
+            
+        Returns:
+            The roles that exist, in the order of role_ids
+        """
+        roles = self.roles
+        return [roles[role_id] for role_id in role_ids if role_id in roles]
+    
+    async def get_inheritance_chain(self, role_id: str) -> Tuple[Role, ...]:
+        """Get the inheritance chain for a role
+        
+        Args:
+            role_id: The ID of the role to get the inheritance chain for
+            
+        Returns:
+            Roles in the inheritance chain, starting with the specified role
+        """
+        chain = self._inheritance_chains.get(role_id)
+        if chain is not None:
+            return chain
+        
+        # Follow parent links, tracking visited roles to stop at cycles
+        inheritance_chain = []
+        visited_roles = set()
+        current_role_id = role_id
+        while current_role_id and current_role_id not in visited_roles:
+            visited_roles.add(current_role_id)
+            
+            role = self.roles.get(current_role_id)
+            if role is None:
+                break
+            
+            inheritance_chain.append(role)
+            current_role_id = role.parent_role_id if role.inherit_memories else None
+        
+        chain = tuple(inheritance_chain)
+        self._inheritance_chains[role_id] = chain
+        
+        return chain
+    
+    async def get_child_role_ids(self, role_id: str) -> FrozenSet[str]:
+        """Get the IDs of the roles that inherit memories from a role
+        
+        Args:
+            role_id: The ID of the parent role
+            
+        Returns:
+            IDs of the child roles (empty if there are none)
+        """
+        if self._children_by_parent is None:
+            children: Dict[str, Set[str]] = {}
+            for role in self.roles.values():
+                if role.parent_role_id and role.inherit_memories:
+                    children.setdefault(role.parent_role_id, set()).add(role.id)
+            self._children_by_parent = {
+                parent_id: frozenset(child_ids) for parent_id, child_ids in children.items()
+            }
+        
+        return self._children_by_parent.get(role_id, frozenset())
     
     async def create_role(self, role_create: RoleCreate) -> Role:
         """Create a new custom role
@@ -105,6 +270,7 @@ class RoleService:
         # Create the role
         role = Role(**role_create.dict(), is_default=False)
         self.roles[role.id] = role
+        self._roles_changed()
         
         return role
     
@@ -134,12 +300,12 @@ class RoleService:
         if role_update.tone and role_update.tone not in TONE_PROFILES:
             raise HTTPException(status_code=400, detail=f"Invalid tone. Valid options: {list(TONE_PROFILES.keys())}")
         
-        # Update the role
-        update_data = role_update.dict(exclude_unset=True)
-        for key, value in update_data.items():
-            setattr(role, key, value)
+        # Update the role (roles are immutable, so store a revalidated replacement)
+        update_data = role_update.model_dump(exclude_unset=True)
+        role = Role.model_validate({**role.model_dump(), **update_data})
         
         self.roles[role_id] = role
+        self._roles_changed()
         
         return role
     
@@ -166,6 +332,7 @@ class RoleService:
         
         # Delete the role
         del self.roles[role_id]
+        self._roles_changed()
         
         # Clear memories for the role
         await self.memory_service.clear_memories_by_role_id(role_id)
@@ -184,17 +351,41 @@ class RoleService:
         """
         role = await self.get_role(role_id)
         
-        # Get tone profile
-        tone_profile = TONE_PROFILES.get(role.tone, TONE_PROFILES["strategic"])
-        
         # Get relevant memories
         memories = await self.memory_service.get_memories_by_role_id(role_id)
         memory_text = "\n\n".join([f"Memory: {memory.content}" for memory in memories[:10]]) if memories else ""
         
         # Build the complete prompt
+        prompt = self._build_system_prompt(role, custom_instructions)
+        
+        # Add memories if available
+        if memory_text:
+            prompt += f"\n\n\nRelevant context from previous interactions:\n{memory_text}"
+        
+        return prompt
+    
+    def _build_system_prompt(self, role: Role, custom_instructions: Optional[str] = None) -> str:
+        """Build the memory-independent part of a role's system prompt, with caching
+        
+        Args:
+            role: The role to build the prompt for
+            custom_instructions: Optional custom instructions to include
+            
+        Returns:
+            The system prompt
+        """
+        # Key on short digests so long prompts and custom instructions aren't held twice;
+        # an updated role has a new prompt hash, so stale entries are simply never hit again
+        custom_hash = hashlib.blake2b(custom_instructions.encode(), digest_size=8).digest() if custom_instructions else b""
+        key = (role.prompt_hash, custom_hash)
+        
+        prompt = self._prompt_cache.get(key)
+        if prompt is not None:
+            return prompt
+        
         prompt_parts = [
             role.system_prompt,
-            f"\n\nTone: {role.tone} - {tone_profile['description']}\nTone Guidance: {tone_profile['modifiers']}",
+            f"\n\n{get_tone_guidance(role.tone)}",
             f"\n\nDomains of expertise: {', '.join(role.domains)}",
             f"\n\nInstructions: {role.instructions}"
         ]
@@ -203,11 +394,14 @@ class RoleService:
         if custom_instructions:
             prompt_parts.append(f"\n\nAdditional Instructions: {custom_instructions}")
         
-        # Add memories if available
-        if memory_text:
-            prompt_parts.append(f"\n\nRelevant context from previous interactions:\n{memory_text}")
+        prompt = "\n".join(prompt_parts)
+        
+        # Evict the oldest entry once the cache is full
+        if len(self._prompt_cache) >= PROMPT_CACHE_SIZE:
+            del self._prompt_cache[next(iter(self._prompt_cache))]
+        self._prompt_cache[key] = prompt
         
-        return "\n".join(prompt_parts)
+        return prompt
     
     async def process_query(self, role_id: str, query: str, custom_instructions: Optional[str] = None) -> str:
         """Process a query using a specific role
@@ -224,7 +418,7 @@ class RoleService:
         role = await self.get_role(role_id)
         
         # Generate query embedding for memory retrieval
-        embedding = await self.ai_processor.create_embedding(query)
+        embedding = await self.ai_processor.create_embedding_cached(query)
         
         # Get relevant memories
         relevant_memories = await self.memory_service.get_relevant_memories(
@@ -288,7 +482,7 @@ class RoleService:
         role = await self.get_role(role_id)
         
         # Generate query embedding for memory retrieval
-        embedding = await self.ai_processor.create_embedding(query)
+        embedding = await self.ai_processor.create_embedding_cached(query)
         
         # Get relevant memories
         relevant_memories = await self.memory_service.get_relevant_memories(
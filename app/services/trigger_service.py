@@ -1,6 +1,28 @@
 import re
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Optional, Tuple
 from app.models.role import Role
+from app.models.context import ContextTrigger
+
+# Import pyahocorasick with error handling
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+def _keyword_pattern(keywords: Tuple[str, ...]) -> str:
+    """Build a whole-word regex pattern matching any of the keywords"""
+    return r"\b(?:" + "|".join(re.escape(keyword) for keyword in keywords) + r")\b"
+
+def _is_word_char(char: str) -> bool:
+    """Check whether a character counts as a word character for regex \\b"""
+    return char.isalnum() or char == "_"
+
+def _is_word_boundary(text: str, index: int) -> bool:
+    """Check whether there is a regex-style word boundary before text[index]"""
+    before = index > 0 and _is_word_char(text[index - 1])
+    after = index < len(text) and _is_word_char(text[index])
+    return before != after
 
 class TriggerService:
     """Service for detecting triggers and managing context switching"""
@@ -8,38 +30,47 @@ class TriggerService:
     def __init__(self):
         """Initialize the trigger service"""
         # Dictionary to store role triggers
-        # Format: {role_id: [{"pattern": regex_pattern, "priority": int}]}
-        self.role_triggers: Dict[str, List[Dict[str, Any]]] = {}
+        # Format: {role_id: [ContextTrigger]} (patterns are compiled on creation)
+        self.role_triggers: Dict[str, List[ContextTrigger]] = {}
         
-        # Default trigger patterns for common domains
+        # Keywords behind keyword-based triggers, by trigger ID
+        self.trigger_keywords: Dict[str, Tuple[str, ...]] = {}
+        
+        # Multi-pattern index over all keyword triggers, rebuilt whenever triggers change
+        # Format: {keyword: [ContextTrigger]}
+        self._keyword_index: Dict[str, List[ContextTrigger]] = {}
+        self._regex_triggers: List[ContextTrigger] = []
+        self._automaton = None
+        
+        # Default trigger keywords for common domains (each tuple is one trigger)
         self.default_domain_triggers = {
             "finance": [
-                r"\b(?:finance|financial|money|budget|invest|stock|market|economy)\b",
-                r"\b(?:roi|revenue|profit|loss|balance sheet|income statement)\b"
+                ("finance", "financial", "money", "budget", "invest", "stock", "market", "economy"),
+                ("roi", "revenue", "profit", "loss", "balance sheet", "income statement")
             ],
             "technology": [
-                r"\b(?:tech|technology|software|hardware|code|program|app|application)\b",
-                r"\b(?:algorithm|database|server|cloud|api|interface|frontend|backend)\b"
+                ("tech", "technology", "software", "hardware", "code", "program", "app", "application"),
+                ("algorithm", "database", "server", "cloud", "api", "interface", "frontend", "backend")
             ],
             "healthcare": [
-                r"\b(?:health|medical|doctor|patient|disease|treatment|medicine|drug)\b",
-                r"\b(?:symptom|diagnosis|therapy|hospital|clinic|prescription)\b"
+                ("health", "medical", "doctor", "patient", "disease", "treatment", "medicine", "drug"),
+                ("symptom", "diagnosis", "therapy", "hospital", "clinic", "prescription")
             ],
             "marketing": [
-                r"\b(?:marketing|advertise|campaign|brand|customer|audience|market)\b",
-                r"\b(?:seo|ppc|conversion|lead|funnel|engagement|retention)\b"
+                ("marketing", "advertise", "campaign", "brand", "customer", "audience", "market"),
+                ("seo", "ppc", "conversion", "lead", "funnel", "engagement", "retention")
             ],
             "legal": [
-                r"\b(?:legal|law|contract|agreement|compliance|regulation|policy)\b",
-                r"\b(?:liability|lawsuit|attorney|court|judge|plaintiff|defendant)\b"
+                ("legal", "law", "contract", "agreement", "compliance", "regulation", "policy"),
+                ("liability", "lawsuit", "attorney", "court", "judge", "plaintiff", "defendant")
             ],
             "education": [
-                r"\b(?:education|school|teach|learn|student|course|curriculum)\b",
-                r"\b(?:lesson|assignment|exam|test|grade|professor|instructor)\b"
+                ("education", "school", "teach", "learn", "student", "course", "curriculum"),
+                ("lesson", "assignment", "exam", "test", "grade", "professor", "instructor")
             ],
             "creative": [
-                r"\b(?:creative|design|art|artist|write|writer|create|craft)\b",
-                r"\b(?:story|novel|poem|script|character|plot|theme|setting)\b"
+                ("creative", "design", "art", "artist", "write", "writer", "create", "craft"),
+                ("story", "novel", "poem", "script", "character", "plot", "theme", "setting")
             ]
         }
     
@@ -51,6 +82,7 @@ class TriggerService:
             custom_triggers: Optional list of custom trigger patterns
         """
         # Initialize triggers list for this role
+        self._forget_triggers(role.id)
         self.role_triggers[role.id] = []
         
         # Add domain-based triggers
@@ -58,28 +90,37 @@ class TriggerService:
             domain_lower = domain.lower()
             # Check if we have default triggers for this domain
             if domain_lower in self.default_domain_triggers:
-                for pattern in self.default_domain_triggers[domain_lower]:
-                    self.role_triggers[role.id].append({
-                        "pattern": pattern,
-                        "priority": 1,  # Default priority
-                        "source": f"domain:{domain_lower}"
-                    })
+                for keywords in self.default_domain_triggers[domain_lower]:
+                    self._add_keyword_trigger(
+                        role.id,
+                        keywords,
+                        priority=1,  # Default priority
+                        description=f"Default triggers for the {domain_lower} domain",
+                        source=f"domain:{domain_lower}"
+                    )
         
         # Add name-based trigger
-        self.role_triggers[role.id].append({
-            "pattern": f"\\b{re.escape(role.name.lower())}\\b",
-            "priority": 2,  # Higher priority than domain triggers
-            "source": "name"
-        })
+        self._add_keyword_trigger(
+            role.id,
+            (role.name.lower(),),
+            priority=2,  # Higher priority than domain triggers
+            description=f"Mentions of {role.name}",
+            source="name"
+        )
         
         # Add custom triggers if provided
         if custom_triggers:
             for i, trigger in enumerate(custom_triggers):
-                self.role_triggers[role.id].append({
-                    "pattern": trigger,
-                    "priority": 3 + i,  # Highest priority, preserve order
-                    "source": "custom"
-                })
+                self.role_triggers[role.id].append(ContextTrigger(
+                    role_id=role.id,
+                    pattern=trigger,
+                    priority=3 + i,  # Highest priority, preserve order
+                    description="Custom trigger",
+                    is_regex=True,
+                    source="custom"
+                ))
+        
+        self._rebuild_index()
     
     async def unregister_role_triggers(self, role_id: str) -> None:
         """Unregister triggers for a role
@@ -88,7 +129,9 @@ class TriggerService:
             role_id: The ID of the role to unregister triggers for
         """
         if role_id in self.role_triggers:
+            self._forget_triggers(role_id)
             del self.role_triggers[role_id]
+            self._rebuild_index()
     
     async def detect_triggers(self, query: str) -> List[Tuple[str, int]]:
         """Detect triggers in a query
@@ -100,30 +143,28 @@ class TriggerService:
             List of tuples containing role_id and match score
         """
         query_lower = query.lower()
+        matched_triggers = self._match_triggers(query_lower)
         matches = []
         
-        # Check each role's triggers
-        for role_id, triggers in self.role_triggers.items():
+        # Score each role's matched triggers (in registration order, so ties are stable)
+        for role_id in self.role_triggers:
+            role_matches = matched_triggers.get(role_id)
+            if not role_matches:
+                continue
+            
             role_score = 0
             matched_priorities = set()
             
-            for trigger in triggers:
-                pattern = trigger["pattern"]
-                priority = trigger["priority"]
-                
-                # Check if the pattern matches the query
-                if re.search(pattern, query_lower, re.IGNORECASE):
-                    # Add the priority to the score
-                    role_score += priority
-                    matched_priorities.add(priority)
+            for trigger in role_matches.values():
+                # Add the priority to the score
+                role_score += trigger.priority
+                matched_priorities.add(trigger.priority)
+            
+            # Bonus for matching multiple trigger types (diversity bonus)
+            diversity_bonus = len(matched_priorities) * 2
+            final_score = role_score + diversity_bonus
             
-            # Only consider roles with at least one match
-            if role_score > 0:
-                # Bonus for matching multiple trigger types (diversity bonus)
-                diversity_bonus = len(matched_priorities) * 2
-                final_score = role_score + diversity_bonus
-                
-                matches.append((role_id, final_score))
+            matches.append((role_id, final_score))
         
         # Sort by score in descending order
         matches.sort(key=lambda x: x[1], reverse=True)
@@ -175,18 +216,22 @@ class TriggerService:
         if role_id not in self.role_triggers:
             self.role_triggers[role_id] = []
         
-        # Check if the pattern is valid regex
+        # Build the trigger; this compiles the pattern and rejects invalid regex
         try:
-            re.compile(trigger_pattern)
+            trigger = ContextTrigger(
+                role_id=role_id,
+                pattern=trigger_pattern,
+                priority=priority,
+                description="Custom trigger",
+                is_regex=True,
+                source="custom"
+            )
         except re.error:
             return False
         
         # Add the trigger
-        self.role_triggers[role_id].append({
-            "pattern": trigger_pattern,
-            "priority": priority,
-            "source": "custom"
-        })
+        self.role_triggers[role_id].append(trigger)
+        self._rebuild_index()
         
         return True
     
@@ -205,14 +250,15 @@ class TriggerService:
         
         # Find the trigger
         for i, trigger in enumerate(self.role_triggers[role_id]):
-            if trigger["pattern"] == trigger_pattern and trigger["source"] == "custom":
+            if trigger.pattern == trigger_pattern and trigger.source == "custom":
                 # Remove the trigger
                 self.role_triggers[role_id].pop(i)
+                self._rebuild_index()
                 return True
         
         return False
     
-    async def get_role_triggers(self, role_id: str) -> List[Dict[str, Any]]:
+    async def get_role_triggers(self, role_id: str) -> List[ContextTrigger]:
         """Get all triggers for a role
         
         Args:
@@ -225,3 +271,91 @@ class TriggerService:
             return []
         
         return self.role_triggers[role_id]
+    
+    def _add_keyword_trigger(self, role_id: str, keywords: Tuple[str, ...], priority: int, description: str, source: str) -> None:
+        """Add a trigger that matches any of a set of whole-word keywords
+        
+        Args:
+            role_id: The ID of the role to add the trigger for
+            keywords: Lower-cased keywords or phrases, any of which fires the trigger
+            priority: The priority of the trigger
+            description: Description of what the trigger matches
+            source: Where the trigger came from
+        """
+        trigger = ContextTrigger(
+            role_id=role_id,
+            pattern=_keyword_pattern(keywords),
+            priority=priority,
+            description=description,
+            is_regex=True,
+            source=source
+        )
+        self.role_triggers[role_id].append(trigger)
+        self.trigger_keywords[trigger.id] = keywords
+    
+    def _forget_triggers(self, role_id: str) -> None:
+        """Drop keyword bookkeeping for a role's triggers"""
+        for trigger in self.role_triggers.get(role_id, []):
+            self.trigger_keywords.pop(trigger.id, None)
+    
+    def _rebuild_index(self) -> None:
+        """Rebuild the keyword automaton and regex list after triggers change"""
+        keyword_index: Dict[str, List[ContextTrigger]] = {}
+        regex_triggers: List[ContextTrigger] = []
+        
+        for triggers in self.role_triggers.values():
+            for trigger in triggers:
+                keywords = self.trigger_keywords.get(trigger.id)
+                if keywords is None:
+                    regex_triggers.append(trigger)
+                    continue
+                for keyword in keywords:
+                    keyword_index.setdefault(keyword, []).append(trigger)
+        
+        automaton = None
+        if AHOCORASICK_AVAILABLE and keyword_index:
+            automaton = ahocorasick.Automaton()
+            for keyword in keyword_index:
+                automaton.add_word(keyword, keyword)
+            automaton.make_automaton()
+        
+        self._keyword_index = keyword_index
+        self._regex_triggers = regex_triggers
+        self._automaton = automaton
+    
+    def _match_triggers(self, query_lower: str) -> Dict[str, Dict[str, ContextTrigger]]:
+        """Find all enabled triggers matching a query
+        
+        Keyword triggers are matched in a single pass over the query with the
+        Aho-Corasick automaton; when pyahocorasick is not installed every trigger
+        is checked against its precompiled pattern instead.
+        
+        Args:
+            query_lower: The lower-cased query
+            
+        Returns:
+            Matched triggers grouped by role ID and keyed by trigger ID
+        """
+        matched: Dict[str, Dict[str, ContextTrigger]] = {}
+        
+        if self._automaton is None:
+            for triggers in self.role_triggers.values():
+                for trigger in triggers:
+                    if trigger.enabled and trigger.matches(query_lower):
+                        matched.setdefault(trigger.role_id, {})[trigger.id] = trigger
+            return matched
+        
+        for end, keyword in self._automaton.iter(query_lower):
+            start = end - len(keyword) + 1
+            # Only accept whole-word hits, mirroring the \b anchors of the patterns
+            if not (_is_word_boundary(query_lower, start) and _is_word_boundary(query_lower, end + 1)):
+                continue
+            for trigger in self._keyword_index[keyword]:
+                if trigger.enabled:
+                    matched.setdefault(trigger.role_id, {})[trigger.id] = trigger
+        
+        for trigger in self._regex_triggers:
+            if trigger.enabled and trigger.matches(query_lower):
+                matched.setdefault(trigger.role_id, {})[trigger.id] = trigger
+        
+        return matched
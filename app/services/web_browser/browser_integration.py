@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import json
 import re
@@ -45,12 +46,6 @@ class BrowserIntegration:
                 "error": result.get("error", "Failed to navigate to search engine")
             }
         
-        # Take a screenshot of the search results
-        screenshot = await self.browser_service.screenshot(session_id)
-        
-        # Get the page content
-        content = await self.browser_service.get_page_content(session_id)
-        
         # Extract search results using JavaScript
         extract_script = """
         function extractSearchResults() {
@@ -79,7 +74,11 @@ class BrowserIntegration:
         return extractSearchResults();
         """
         
-        js_result = await self.browser_service.evaluate(session_id, extract_script)
+        # Both only read the loaded page, so take the screenshot while the script runs
+        screenshot, js_result = await asyncio.gather(
+            self.browser_service.screenshot(session_id),
+            self.browser_service.evaluate(session_id, extract_script)
+        )
         
         return {
             "success": True,
@@ -112,48 +111,28 @@ class BrowserIntegration:
                 "error": result.get("error", "Failed to navigate to URL")
             }
         
-        # Take a screenshot
-        screenshot = await self.browser_service.screenshot(session_id)
-        
-        # Get the page content based on extraction mode
-        content = ""
-        metadata = {}
-        
-        if extract_mode == 'full':
-            # Get the full page content
-            page_content = await self.browser_service.get_page_content(session_id)
-            content = page_content.get("content", "")
-        elif extract_mode == 'structured':
-            # Extract structured data from the page
-            structured_data = await self._extract_structured_data(session_id)
-            content = json.dumps(structured_data, indent=2)
-            metadata = structured_data
-        else:  # 'auto' or 'article'
-            # Extract main content using JavaScript
-            extract_script = """
-            function extractMainContent() {
-                // Try to find the main content
-                const mainElement = document.querySelector('main') || 
-                                   document.querySelector('article') || 
-                                   document.querySelector('#content') || 
-                                   document.querySelector('.content');
-                
-                if (mainElement) {
-                    return mainElement.textContent.trim();
-                }
-                
-                // Fallback: get all paragraphs
-                const paragraphs = Array.from(document.querySelectorAll('p'));
-                return paragraphs.map(p => p.textContent.trim()).join('\n\n');
-            }
+        # Script for the main content ('auto' and 'article' modes)
+        extract_script = """
+        function extractMainContent() {
+            // Try to find the main content
+            const mainElement = document.querySelector('main') || 
+                               document.querySelector('article') || 
+                               document.querySelector('#content') || 
+                               document.querySelector('.content');
             
-            return extractMainContent();
-            """
+            if (mainElement) {
+                return mainElement.textContent.trim();
+            }
             
-            js_result = await self.browser_service.evaluate(session_id, extract_script)
-            content = js_result.get("result", "")
+            // Fallback: get all paragraphs
+            const paragraphs = Array.from(document.querySelectorAll('p'));
+            return paragraphs.map(p => p.textContent.trim()).join('\n\n');
+        }
         
-        # Get page metadata
+        return extractMainContent();
+        """
+        
+        # Script for the page metadata
         meta_script = """
         function getPageMetadata() {
             const metadata = {
@@ -189,7 +168,33 @@ class BrowserIntegration:
         return getPageMetadata();
         """
         
-        meta_result = await self.browser_service.evaluate(session_id, meta_script)
+        # The page is loaded and the screenshot, content and metadata only read it,
+        # so fetch them concurrently
+        if extract_mode == 'full':
+            # Get the full page content
+            content_call = self.browser_service.get_page_content(session_id)
+        elif extract_mode == 'structured':
+            # Extract structured data from the page
+            content_call = self._extract_structured_data(session_id)
+        else:  # 'auto' or 'article'
+            content_call = self.browser_service.evaluate(session_id, extract_script)
+        
+        screenshot, content_result, meta_result = await asyncio.gather(
+            self.browser_service.screenshot(session_id),
+            content_call,
+            self.browser_service.evaluate(session_id, meta_script)
+        )
+        
+        content = ""
+        metadata = {}
+        if extract_mode == 'full':
+            content = content_result.get("content", "")
+        elif extract_mode == 'structured':
+            content = json.dumps(content_result, indent=2)
+            metadata = content_result
+        else:
+            content = content_result.get("result", "")
+        
         if meta_result["success"]:
             metadata.update(meta_result.get("result", {}))
         
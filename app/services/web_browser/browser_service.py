@@ -1,20 +1,20 @@
 import asyncio
+import importlib.util
 import os
 import logging
 import sys
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, TYPE_CHECKING
 import json
 import time
 
-# Import pyppeteer with error handling
-try:
-    from pyppeteer import launch
+# Check for pyppeteer without importing it; it is only loaded when the browser launches
+PYPPETEER_AVAILABLE = importlib.util.find_spec("pyppeteer") is not None
+if not PYPPETEER_AVAILABLE:
+    logging.error("Failed to import pyppeteer: module not found")
+
+if TYPE_CHECKING:
     from pyppeteer.browser import Browser
     from pyppeteer.page import Page
-    PYPPETEER_AVAILABLE = True
-except ImportError as e:
-    logging.error(f"Failed to import pyppeteer: {e}")
-    PYPPETEER_AVAILABLE = False
     
 from fastapi import WebSocket
 
@@ -24,9 +24,12 @@ class BrowserService:
     """Service for controlling a headless browser using Pyppeteer (Python port of Puppeteer)"""
     
     def __init__(self):
-        self.browser: Optional[Browser] = None
-        self.page: Optional[Page] = None
+        self.browser: Optional["Browser"] = None
+        self.page: Optional["Page"] = None
         self.active_sessions: Dict[str, Dict[str, Any]] = {}
+        
+        # Guards the lazy browser launch so concurrent requests start only one browser
+        self._init_lock = asyncio.Lock()
     
     async def initialize(self, headless=True, executable_path=None):
         """Initialize the browser service
@@ -39,6 +42,12 @@ class BrowserService:
         if not PYPPETEER_AVAILABLE:
             logger.error("Pyppeteer is not available. Browser service cannot be initialized.")
             return False
+        
+        try:
+            from pyppeteer import launch
+        except ImportError as e:
+            logger.error(f"Failed to import pyppeteer: {e}")
+            return False
             
         # If browser is already initialized, don't do it again
         if self.browser is not None:
@@ -118,6 +127,39 @@ class BrowserService:
             self.browser = None
             return False
     
+    async def _ensure_initialized(self) -> bool:
+        """Launch the browser on first use, falling back through launch modes
+        
+        Returns:
+            True if the browser is available, False otherwise
+        """
+        if self.browser is not None:
+            return True
+        
+        async with self._init_lock:
+            # Another request may have launched the browser while we waited
+            if self.browser is not None:
+                return True
+            
+            # First try with headless mode
+            logger.info("Browser not initialized, initializing now with headless mode")
+            success = await self.initialize(headless=True)
+            
+            # If headless mode fails, try with non-headless mode
+            if not success:
+                logger.info("Headless mode failed, trying with non-headless mode")
+                success = await self.initialize(headless=False)
+                
+                # If that also fails, try with a specific Chrome path if on Mac
+                if not success and sys.platform == 'darwin':
+                    # Try with the default Mac Chrome location
+                    mac_chrome_path = '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome'
+                    if os.path.exists(mac_chrome_path):
+                        logger.info(f"Trying with specific Chrome path: {mac_chrome_path}")
+                        success = await self.initialize(headless=False, executable_path=mac_chrome_path)
+            
+            return success
+    
     async def close(self):
         """Close the browser and clean up resources"""
         if self.browser:
@@ -132,23 +174,7 @@ class BrowserService:
         
         # Check if browser is initialized, if not, initialize it
         try:
-            # First try with headless mode
-            if self.browser is None:
-                logger.info("Browser not initialized, initializing now with headless mode")
-                success = await self.initialize(headless=True)
-                
-                # If headless mode fails, try with non-headless mode
-                if not success:
-                    logger.info("Headless mode failed, trying with non-headless mode")
-                    success = await self.initialize(headless=False)
-                    
-                    # If that also fails, try with a specific Chrome path if on Mac
-                    if not success and sys.platform == 'darwin':
-                        # Try with the default Mac Chrome location
-                        mac_chrome_path = '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome'
-                        if os.path.exists(mac_chrome_path):
-                            logger.info(f"Trying with specific Chrome path: {mac_chrome_path}")
-                            success = await self.initialize(headless=False, executable_path=mac_chrome_path)
+            await self._ensure_initialized()
                 
             # Double-check browser is initialized after initialization attempts
             if self.browser is None:
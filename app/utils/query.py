@@ -0,0 +1,23 @@
+from typing import Annotated, List, Optional
+from fastapi import Query
+from pydantic import AfterValidator
+
+def split_commas(values: Optional[List[str]]) -> Optional[List[str]]:
+    """Flatten repeated and comma-separated query values into one list
+    
+    Args:
+        values: The raw values of a repeated query parameter
+        
+    Returns:
+        The individual values, or None if there are none
+    """
+    if not values:
+        return None
+    return [item for value in values for item in value.split(",") if item] or None
+
+# List query parameter accepting both ?tags=a&tags=b and the shorter ?tags=a,b
+CommaSeparatedList = Annotated[
+    Optional[List[str]],
+    AfterValidator(split_commas),
+    Query(description="Repeat the parameter or separate values with commas")
+]
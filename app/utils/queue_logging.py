@@ -0,0 +1,33 @@
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import List
+
+def start_queue_logging() -> QueueListener:
+    """Move the root logger's output onto a background thread
+    
+    The root handlers (or a stderr handler if there are none) are attached to a
+    QueueListener, and the root logger only enqueues records, so logging from a
+    coroutine never blocks the event loop on a write.
+    
+    Returns:
+        The started listener; pass it to stop_queue_logging on shutdown
+    """
+    root = logging.getLogger()
+    handlers: List[logging.Handler] = root.handlers[:] or [logging.StreamHandler()]
+    
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    root.handlers = [QueueHandler(log_queue)]
+    listener.start()
+    
+    return listener
+
+def stop_queue_logging(listener: QueueListener) -> None:
+    """Flush queued records and give the root logger its handlers back
+    
+    Args:
+        listener: The listener returned by start_queue_logging
+    """
+    listener.stop()
+    logging.getLogger().handlers = list(listener.handlers)
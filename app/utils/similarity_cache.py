@@ -0,0 +1,124 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Generic, Hashable, Optional, Sequence, Tuple, TypeVar
+import numpy as np
+
+V = TypeVar("V")
+
+class SimilarityCache(Generic[V]):
+    """LRU cache of values keyed by embedding similarity
+    
+    Entries are grouped by an exact-match key (e.g. the search filters or the
+    provider, model and system prompt). A lookup hits when a cached entry in the
+    same group has an embedding within the similarity threshold of the new one,
+    so paraphrases reuse a recent value. A capacity of 0 or less disables the cache.
+    """
+    
+    def __init__(self, capacity: int, threshold: float, ttl: float):
+        """Initialize an empty cache
+        
+        Args:
+            capacity: Maximum number of cached values
+            threshold: Minimum cosine similarity between embeddings for a hit
+            ttl: Seconds a cached value stays valid
+        """
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl = ttl
+        
+        # Format: {entry_id: (group, vector, value, inserted_at)}
+        self.entries: "OrderedDict[int, Tuple[Hashable, np.ndarray, V, float]]" = OrderedDict()
+        # Entry IDs by group, so a lookup only compares against matching entries
+        self.groups: Dict[Hashable, Dict[int, None]] = {}
+        self._next_id = 0
+    
+    @staticmethod
+    def normalize(embedding: Sequence[float]) -> Optional[np.ndarray]:
+        """Convert an embedding to a unit float32 vector
+        
+        Args:
+            embedding: The embedding to normalize
+        
+        Returns:
+            The normalized vector, or None if the embedding is empty or zero
+        """
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector) if vector.size else 0.0
+        if not norm:
+            return None
+        return vector / norm
+    
+    def get(self, group: Hashable, vector: np.ndarray) -> Optional[V]:
+        """Look up the value of a sufficiently similar cached entry
+        
+        Args:
+            group: The exact-match part of the key
+            vector: The normalized embedding
+        
+        Returns:
+            The cached value, or None on a miss
+        """
+        entry_ids = self.groups.get(group)
+        if not entry_ids:
+            return None
+        
+        entry_ids = list(entry_ids)
+        # One matrix-vector product against every cached entry in the group
+        keys = np.stack([self.entries[entry_id][1] for entry_id in entry_ids])
+        if keys.shape[1] != vector.shape[0]:
+            return None
+        similarities = keys @ vector
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+        
+        entry_id = entry_ids[best]
+        entry = self.entries[entry_id]
+        if time.monotonic() - entry[3] > self.ttl:
+            self._drop(entry_id)
+            return None
+        
+        self.entries.move_to_end(entry_id)
+        return entry[2]
+    
+    def put(self, group: Hashable, vector: np.ndarray, value: V) -> None:
+        """Cache a value
+        
+        Args:
+            group: The exact-match part of the key
+            vector: The normalized embedding
+            value: The value to reuse
+        """
+        if self.capacity <= 0:
+            return
+        
+        # Evict the least recently used entries once the cache is full
+        while len(self.entries) >= self.capacity:
+            self._drop(next(iter(self.entries)))
+        
+        entry_id = self._next_id
+        self._next_id += 1
+        self.entries[entry_id] = (group, vector, value, time.monotonic())
+        self.groups.setdefault(group, {})[entry_id] = None
+    
+    def discard(self, is_stale: Callable[[V], bool]) -> None:
+        """Drop every cached value the predicate marks as stale
+        
+        Args:
+            is_stale: Called with each cached value; True drops the entry
+        """
+        stale = [entry_id for entry_id, entry in self.entries.items() if is_stale(entry[2])]
+        for entry_id in stale:
+            self._drop(entry_id)
+    
+    def _drop(self, entry_id: int) -> None:
+        """Remove a cached entry
+        
+        Args:
+            entry_id: The ID of the entry to remove
+        """
+        group = self.entries.pop(entry_id)[0]
+        entry_ids = self.groups[group]
+        del entry_ids[entry_id]
+        if not entry_ids:
+            del self.groups[group]
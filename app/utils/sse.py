@@ -0,0 +1,91 @@
+import asyncio
+from typing import AsyncGenerator, AsyncIterable, Optional
+
+# Server-sent event framing, prebuilt as bytes so each chunk is encoded only once
+SSE_DATA_PREFIX = b"data: "
+SSE_SEPARATOR = b"\n\n"
+SSE_DONE = b"data: [DONE]\n\n"
+# Comment frame, ignored by EventSource clients, sent to keep idle connections open
+SSE_KEEPALIVE = b": ping\n\n"
+
+# Stop caches and reverse proxies (e.g. nginx) from holding back streamed frames
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+# Buffered frames are flushed once this many bytes are waiting...
+COALESCE_MAX_BYTES = 4096
+# ...or once the oldest buffered frame has waited this many seconds
+COALESCE_MAX_DELAY = 0.02
+
+# Seconds without a frame before a keep-alive is sent (proxies commonly time out at 30-60s)
+SSE_KEEPALIVE_INTERVAL = 15.0
+
+def sse_frame(chunk: str) -> bytes:
+    """Frame a text chunk as a server-sent event"""
+    return SSE_DATA_PREFIX + chunk.encode() + SSE_SEPARATOR
+
+async def coalesce_frames(
+    frames: AsyncIterable[bytes],
+    max_bytes: int = COALESCE_MAX_BYTES,
+    max_delay: float = COALESCE_MAX_DELAY,
+    keepalive: Optional[float] = SSE_KEEPALIVE_INTERVAL
+) -> AsyncGenerator[bytes, None]:
+    """Merge small frames into larger writes
+    
+    LLM streams produce a frame per token; sending each one separately costs a
+    write (and usually a TCP segment) per token. Frames are buffered until
+    max_bytes is reached or the oldest buffered frame is max_delay old, so a
+    pause in the stream never holds back text for longer than max_delay.
+    
+    Args:
+        frames: The frames to merge
+        max_bytes: Flush once at least this many bytes are buffered
+        max_delay: Flush once the oldest buffered frame has waited this long (seconds)
+        keepalive: Send a keep-alive comment after this many idle seconds (None to disable)
+    """
+    loop = asyncio.get_running_loop()
+    iterator = frames.__aiter__()
+    buffer = bytearray()
+    deadline = 0.0
+    pending: Optional[asyncio.Future] = None
+    
+    try:
+        while True:
+            # Keep one read outstanding across timeouts, so the source is never cancelled mid-frame
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            
+            if buffer:
+                done, _ = await asyncio.wait({pending}, timeout=max(deadline - loop.time(), 0))
+                if not done:
+                    yield bytes(buffer)
+                    buffer.clear()
+                    continue
+            else:
+                done, _ = await asyncio.wait({pending}, timeout=keepalive)
+                if not done:
+                    yield SSE_KEEPALIVE
+                    continue
+            
+            future, pending = pending, None
+            try:
+                frame = future.result()
+            except StopAsyncIteration:
+                break
+            
+            if not buffer:
+                deadline = loop.time() + max_delay
+            buffer += frame
+            if len(buffer) >= max_bytes:
+                yield bytes(buffer)
+                buffer.clear()
+        
+        if buffer:
+            yield bytes(buffer)
+    finally:
+        # The client went away (or the source failed): stop the outstanding read, or
+        # close the source now rather than when it is garbage collected, so an
+        # upstream API stream is released right away
+        if pending is not None:
+            pending.cancel()
+        elif hasattr(iterator, "aclose"):
+            await iterator.aclose()
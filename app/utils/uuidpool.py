@@ -0,0 +1,26 @@
+import os
+from typing import Iterator
+from uuid import UUID
+
+# Number of UUIDs drawn from the OS entropy source per read
+BATCH_SIZE = 1024
+
+def _uuid_stream() -> Iterator[str]:
+    """Yield UUID4 strings, reading random bytes in batches"""
+    while True:
+        buf = os.urandom(16 * BATCH_SIZE)
+        for i in range(0, len(buf), 16):
+            yield str(UUID(bytes=buf[i:i + 16], version=4))
+
+_stream = _uuid_stream()
+
+def next_uuid() -> str:
+    """Get the next UUID4 string from the pool
+    
+    Only called from the event loop thread, so the shared generator
+    is never advanced concurrently.
+    
+    Returns:
+        A random UUID4 in its canonical string form
+    """
+    return next(_stream)
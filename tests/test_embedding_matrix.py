@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from app.services.memory_service import EmbeddingMatrix
+
+def random_embedding(rng, dimension=32):
+    """Return a random float embedding"""
+    return rng.normal(size=dimension).tolist()
+
+
+def test_quantized_similarities_match_float():
+    """Test that int8 quantization keeps cosine similarities close to the float values"""
+    rng = np.random.default_rng(0)
+    matrix = EmbeddingMatrix()
+    embeddings = {f"m{i}": random_embedding(rng) for i in range(20)}
+    for memory_id, embedding in embeddings.items():
+        matrix.add(memory_id, embedding)
+    
+    assert matrix.matrix.dtype == np.int8
+    assert matrix.scales.dtype == np.float32
+    
+    query = matrix.normalize(random_embedding(rng))
+    memory_ids = list(embeddings)
+    expected = np.array([matrix.normalize(embeddings[memory_id]) @ query for memory_id in memory_ids])
+    np.testing.assert_allclose(matrix.similarities(memory_ids, query), expected, atol=0.02)
+
+def test_quantized_vector_uses_full_int8_range():
+    """Test that the largest component of each vector is quantized to +/-127"""
+    matrix = EmbeddingMatrix()
+    matrix.add("m", [0.0, 3.0, -4.0])
+    
+    row = matrix.matrix[matrix.rows["m"]]
+    assert np.abs(row).max() == 127
+    assert matrix.similarities(["m"], matrix.normalize([0.0, 3.0, -4.0]))[0] == pytest.approx(1.0, abs=0.01)
+
+def test_remove_moves_last_row_into_gap():
+    """Test that removing a memory swaps the last row into its slot"""
+    rng = np.random.default_rng(1)
+    matrix = EmbeddingMatrix()
+    embeddings = {memory_id: random_embedding(rng) for memory_id in ("a", "b", "c", "d")}
+    for memory_id, embedding in embeddings.items():
+        matrix.add(memory_id, embedding)
+    query = matrix.normalize(random_embedding(rng))
+    before = dict(zip(embeddings, matrix.similarities(list(embeddings), query)))
+    
+    matrix.remove("b")
+    
+    assert matrix.ids == ["a", "d", "c"]
+    assert matrix.rows == {"a": 0, "d": 1, "c": 2}
+    remaining = ["a", "c", "d"]
+    np.testing.assert_allclose(
+        matrix.similarities(remaining, query),
+        [before[memory_id] for memory_id in remaining],
+        rtol=1e-5
+    )
+
+def test_remove_last_and_missing_rows():
+    """Test removing the last row and an unknown memory"""
+    matrix = EmbeddingMatrix()
+    matrix.add("a", [1.0, 0.0])
+    matrix.add("b", [0.0, 1.0])
+    
+    matrix.remove("b")
+    matrix.remove("unknown")
+    
+    assert matrix.ids == ["a"]
+    assert matrix.rows == {"a": 0}
+
+def test_grows_past_initial_capacity():
+    """Test that the matrix grows and keeps earlier rows intact"""
+    rng = np.random.default_rng(2)
+    matrix = EmbeddingMatrix(initial_capacity=2)
+    embeddings = {f"m{i}": random_embedding(rng, 8) for i in range(5)}
+    for memory_id, embedding in embeddings.items():
+        matrix.add(memory_id, embedding)
+    
+    assert matrix.matrix.shape[0] >= 5
+    query = matrix.normalize(embeddings["m0"])
+    assert matrix.similarities(["m0"], query)[0] == pytest.approx(1.0, abs=0.01)
+
+def test_add_replaces_existing_embedding():
+    """Test that adding an existing memory updates its row in place"""
+    matrix = EmbeddingMatrix()
+    matrix.add("a", [1.0, 0.0])
+    matrix.add("a", [0.0, 1.0])
+    
+    assert matrix.ids == ["a"]
+    assert matrix.similarities(["a"], matrix.normalize([0.0, 1.0]))[0] == pytest.approx(1.0, abs=0.01)
+
+def test_rejects_invalid_embeddings():
+    """Test that empty, zero and wrong-dimension embeddings are not stored"""
+    matrix = EmbeddingMatrix()
+    matrix.add("a", [1.0, 0.0])
+    
+    matrix.add("empty", [])
+    matrix.add("zero", [0.0, 0.0])
+    matrix.add("wrong", [1.0, 0.0, 0.0])
+    
+    assert matrix.ids == ["a"]
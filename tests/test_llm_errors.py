@@ -0,0 +1,191 @@
+import asyncio
+import orjson
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.main import app
+from app.config import settings
+from app.services.ai_processor import AIProcessor
+from app.services.llm_providers.openai_provider import OpenAIProvider
+
+class FakeProvider:
+    """Provider that counts completion calls and can be made to fail"""
+    provider_name = "fake"
+    model = "fake-model"
+    
+    def __init__(self, error: Exception = None):
+        self.error = error
+        self.calls = 0
+    
+    async def generate_completion(self, system_prompt, user_prompt, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.error:
+            raise self.error
+        return f"answer to {user_prompt}"
+    
+    async def generate_completion_stream(self, system_prompt, user_prompt, **kwargs):
+        self.calls += 1
+        yield "partial"
+        if self.error:
+            raise self.error
+
+def make_processor(provider: FakeProvider) -> AIProcessor:
+    """Create an AI processor that sends every request to the given provider"""
+    processor = AIProcessor()
+    processor.get_provider = lambda provider_name=None: provider
+    processor.browser_integration = None
+    return processor
+
+
+@pytest.mark.asyncio
+async def test_provider_raises_api_errors():
+    """Test that provider API errors are raised instead of returned as a completion"""
+    provider = OpenAIProvider(api_key="sk-test")
+    with patch.object(provider.client.chat.completions, "create", AsyncMock(side_effect=RuntimeError("rate limited"))):
+        with pytest.raises(RuntimeError, match="rate limited"):
+            await provider.generate_completion("system", "user")
+
+def test_process_reports_provider_failure(client):
+    """Test that a failed completion is reported as a 502"""
+    app.state.role_service.process_query = AsyncMock(side_effect=RuntimeError("rate limited"))
+    
+    response = client.post(f"{settings.api_prefix}/roles/process", json={"role_id": "cfo-advisor", "query": "Hello"})
+    assert response.status_code == 502
+    assert "rate limited" in response.json()["detail"]
+
+@pytest.mark.asyncio
+async def test_generate_response_raises_and_caches_nothing(monkeypatch):
+    """Test that a provider failure propagates and is not cached"""
+    monkeypatch.setattr(settings, "llm_cache_enabled", True)
+    provider = FakeProvider(error=RuntimeError("timeout"))
+    processor = make_processor(provider)
+    
+    with pytest.raises(RuntimeError, match="timeout"):
+        await processor.generate_response("system", "user")
+    
+    provider.error = None
+    assert await processor.generate_response("system", "user") == "answer to user"
+    assert provider.calls == 2
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_share_one_call(monkeypatch):
+    """Test that identical in-flight requests are merged with the response cache disabled"""
+    monkeypatch.setattr(settings, "llm_cache_enabled", False)
+    provider = FakeProvider()
+    processor = make_processor(provider)
+    
+    responses = await asyncio.gather(
+        *(processor.generate_response("system", "user") for _ in range(5)),
+        processor.generate_response("system", "other")
+    )
+    
+    assert responses == ["answer to user"] * 5 + ["answer to other"]
+    assert provider.calls == 2
+    assert processor._completion_requests == {}
+
+@pytest.mark.asyncio
+async def test_shared_failure_reaches_every_waiter(monkeypatch):
+    """Test that every merged request sees the failure of the shared call"""
+    monkeypatch.setattr(settings, "llm_cache_enabled", False)
+    provider = FakeProvider(error=RuntimeError("timeout"))
+    processor = make_processor(provider)
+    
+    results = await asyncio.gather(
+        *(processor.generate_response("system", "user") for _ in range(3)),
+        return_exceptions=True
+    )
+    
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert provider.calls == 1
+
+@pytest.mark.asyncio
+async def test_cancelled_owner_leaves_shared_call_running(monkeypatch):
+    """Test that cancelling the request that started a shared call doesn't cancel it for a waiter"""
+    monkeypatch.setattr(settings, "llm_cache_enabled", False)
+    provider = FakeProvider()
+    processor = make_processor(provider)
+    
+    owner = asyncio.ensure_future(processor.generate_response("system", "user"))
+    while not processor._completion_requests:
+        await asyncio.sleep(0)
+    waiter = asyncio.ensure_future(processor.generate_response("system", "user"))
+    await asyncio.sleep(0)
+    owner.cancel()
+    
+    assert await waiter == "answer to user"
+    assert owner.cancelled()
+    assert provider.calls == 1
+    assert processor._completion_requests == {}
+
+@pytest.mark.asyncio
+async def test_cancelled_owner_leaves_shared_embedding_running():
+    """Test that cancelling the request that started a shared embedding doesn't cancel it for a waiter"""
+    processor = make_processor(FakeProvider())
+    calls = []
+    
+    async def create_embedding(text, provider_name=None):
+        calls.append(text)
+        await asyncio.sleep(0.01)
+        return [0.6, 0.8]
+    
+    processor.create_embedding = create_embedding
+    owner = asyncio.ensure_future(processor.create_embedding_cached("text"))
+    await asyncio.sleep(0)
+    waiter = asyncio.ensure_future(processor.create_embedding_cached("text"))
+    await asyncio.sleep(0)
+    owner.cancel()
+    
+    assert list(await waiter) == pytest.approx([0.6, 0.8])
+    assert owner.cancelled()
+    assert calls == ["text"]
+    assert processor._embedding_requests == {}
+    # The result is cached even though the request that started it went away
+    assert list(await processor.create_embedding_cached("text")) == pytest.approx([0.6, 0.8])
+    assert calls == ["text"]
+
+async def failing_stream(*args, **kwargs):
+    """Stream one chunk, then fail like a provider error mid-response"""
+    yield "partial"
+    raise RuntimeError("rate limited")
+
+@pytest.mark.asyncio
+async def test_generate_response_stream_raises():
+    """Test that a provider failure while streaming is raised instead of streamed as text"""
+    processor = make_processor(FakeProvider(error=RuntimeError("timeout")))
+    chunks = []
+    
+    with pytest.raises(RuntimeError, match="timeout"):
+        async for chunk in processor.generate_response_stream("system", "user"):
+            chunks.append(chunk)
+    
+    assert chunks == ["partial"]
+
+def test_context_stream_reports_failure_as_error_frame(client, monkeypatch):
+    """Test that a failure while streaming ends the event stream with an error frame"""
+    service = MagicMock()
+    service.process_query_stream_with_context_switching = failing_stream
+    monkeypatch.setattr(app.state, "context_switching_service", service, raising=False)
+    
+    response = client.post(f"{settings.api_prefix}/context/process/stream", json={"session_id": "s", "query": "Hello"})
+    assert response.text == 'data: partial\n\ndata: {"error":"rate limited"}\n\ndata: [DONE]\n\n'
+
+def test_context_ndjson_reports_failure_as_error_line(client, monkeypatch):
+    """Test that a failure while streaming NDJSON ends with an error object"""
+    service = MagicMock()
+    service.process_query_stream_with_context_switching = failing_stream
+    monkeypatch.setattr(app.state, "context_switching_service", service, raising=False)
+    
+    response = client.post(
+        f"{settings.api_prefix}/context/process/stream",
+        json={"session_id": "s", "query": "Hello"},
+        headers={"Accept": "application/x-ndjson"}
+    )
+    assert [orjson.loads(line) for line in response.text.splitlines()] == [{"delta": "partial"}, {"error": "rate limited"}]
+
+def test_role_stream_reports_failure_as_error_frame(client):
+    """Test that a failure while streaming a role query ends with an error frame"""
+    app.state.role_service.process_query_stream = failing_stream
+    
+    response = client.post(f"{settings.api_prefix}/roles/process/stream", json={"role_id": "cfo-advisor", "query": "Hello"})
+    assert response.text == 'data: partial\n\ndata: {"error":"rate limited"}\n\ndata: [DONE]\n\n'
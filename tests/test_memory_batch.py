@@ -0,0 +1,77 @@
+import pytest
+from unittest.mock import AsyncMock
+
+from app.main import app
+from app.config import settings
+from app.services.memory_service import MemoryService
+
+BATCH_URL = f"{settings.api_prefix}/memories/batch"
+
+def fake_embeddings(texts):
+    """Return a distinct 3-dimensional embedding per text"""
+    return [[1.0, float(i), 0.5] for i in range(len(texts))]
+
+@pytest.fixture(autouse=True)
+def setup_memory_service(client):
+    """Use a real memory service and a mocked embeddings call"""
+    app.state.memory_service = MemoryService()
+    app.state.ai_processor.create_embeddings = AsyncMock(side_effect=fake_embeddings)
+    yield
+
+
+def test_store_memories_batch(client):
+    """Test storing several memories with a single embeddings call"""
+    memories = [
+        {"role_id": "cfo-advisor", "content": "Budget review is on Friday", "type": "session"},
+        {"role_id": "cfo-advisor", "content": "Prefers quarterly summaries", "type": "user", "tags": ["reports"]},
+    ]
+    
+    response = client.post(BATCH_URL, json=memories)
+    assert response.status_code == 201
+    
+    stored = response.json()["memories"]
+    assert [memory["content"] for memory in stored] == [memory["content"] for memory in memories]
+    assert stored[1]["tags"] == ["reports"]
+    app.state.ai_processor.create_embeddings.assert_awaited_once_with([memory["content"] for memory in memories])
+    
+    # The memories are searchable through the embeddings they were stored with
+    memory_service = app.state.memory_service
+    assert len(memory_service.memories["cfo-advisor"]) == 2
+    assert all(memory.id in memory_service.embeddings.rows for memory in memory_service.memories["cfo-advisor"])
+
+def test_store_memories_batch_limit(client, monkeypatch):
+    """Test that batches over the limit are rejected before any embedding is created"""
+    monkeypatch.setattr(settings, "memory_batch_limit", 2)
+    memories = [
+        {"role_id": "cfo-advisor", "content": f"Memory {i}", "type": "session"}
+        for i in range(3)
+    ]
+    
+    response = client.post(BATCH_URL, json=memories)
+    assert response.status_code == 400
+    assert "maximum 2" in response.json()["detail"]
+    app.state.ai_processor.create_embeddings.assert_not_called()
+    assert app.state.memory_service.memories == {}
+
+def test_store_memories_batch_at_limit(client, monkeypatch):
+    """Test that a batch of exactly the limit is accepted"""
+    monkeypatch.setattr(settings, "memory_batch_limit", 2)
+    memories = [
+        {"role_id": "cfo-advisor", "content": f"Memory {i}", "type": "session"}
+        for i in range(2)
+    ]
+    
+    response = client.post(BATCH_URL, json=memories)
+    assert response.status_code == 201
+    assert len(response.json()["memories"]) == 2
+
+def test_store_memories_batch_validation(client):
+    """Test that an invalid memory fails the whole batch"""
+    memories = [
+        {"role_id": "cfo-advisor", "content": "Valid", "type": "session"},
+        {"role_id": "cfo-advisor", "content": "Invalid type", "type": "unknown"},
+    ]
+    
+    response = client.post(BATCH_URL, json=memories)
+    assert response.status_code == 422
+    app.state.ai_processor.create_embeddings.assert_not_called()
@@ -0,0 +1,57 @@
+import pytest
+from unittest.mock import AsyncMock
+
+from app.main import app
+from app.config import settings
+from app.utils.query import split_commas
+
+@pytest.mark.parametrize("values, expected", [
+    (None, None),
+    ([], None),
+    (["finance"], ["finance"]),
+    (["finance,technology"], ["finance", "technology"]),
+    (["finance", "technology,legal"], ["finance", "technology", "legal"]),
+    (["finance,,technology,"], ["finance", "technology"]),
+    ([",", ""], None),
+])
+def test_split_commas(values, expected):
+    """Test flattening repeated and comma-separated values"""
+    assert split_commas(values) == expected
+
+
+@pytest.fixture(autouse=True)
+def setup_services(client):
+    """Set up the role service mocks used by the role list endpoints"""
+    role_service = app.state.role_service
+    role_service.version = 0
+    role_service.get_roles = AsyncMock(return_value=[])
+    yield
+
+
+@pytest.mark.parametrize("query", [
+    "domains=finance,technology",
+    "domains=finance&domains=technology",
+    "domains=finance,&domains=technology",
+])
+def test_roles_domains_forms(client, query):
+    """Test that both list forms reach the role service as the same list"""
+    response = client.get(f"{settings.api_prefix}/roles?{query}")
+    assert response.status_code == 200
+    app.state.role_service.get_roles.assert_awaited_once_with(
+        search_query=None, domains=["finance", "technology"], tone=None
+    )
+
+def test_roles_domains_omitted(client):
+    """Test that an omitted or empty list parameter is passed as None"""
+    client.get(f"{settings.api_prefix}/roles")
+    client.get(f"{settings.api_prefix}/roles?domains=")
+    for call in app.state.role_service.get_roles.await_args_list:
+        assert call.kwargs["domains"] is None
+
+def test_memories_tags_forms(client):
+    """Test that memory tag filters accept comma-separated values"""
+    app.state.memory_service.get_memories_by_role_id = AsyncMock(return_value=[])
+    
+    response = client.get(f"{settings.api_prefix}/memories/cfo-advisor?tags=reports,q1&tags=budget")
+    assert response.status_code == 200
+    assert app.state.memory_service.get_memories_by_role_id.await_args.kwargs["tags"] == ["reports", "q1", "budget"]
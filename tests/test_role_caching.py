@@ -0,0 +1,83 @@
+import pytest
+from unittest.mock import AsyncMock
+
+from app.main import app
+from app.config import settings
+from app.routes import role_routes
+
+ROLES_URL = f"{settings.api_prefix}/roles"
+TONES_URL = f"{settings.api_prefix}/roles/tones"
+
+@pytest.fixture(autouse=True)
+def setup_role_service(client):
+    """Give the mocked role service a version and an empty role list"""
+    role_service = app.state.role_service
+    role_service.version = 0
+    role_service.get_roles = AsyncMock(return_value=[])
+    yield
+
+
+def test_roles_response_has_validators(client):
+    """Test that role reads carry an ETag and Cache-Control header"""
+    response = client.get(ROLES_URL)
+    assert response.status_code == 200
+    assert response.headers["etag"].startswith('W/"')
+    assert response.headers["cache-control"] == role_routes.ROLES_CACHE_CONTROL
+
+def test_roles_not_modified(client):
+    """Test that a current If-None-Match gets a 304 without re-running the query"""
+    etag = client.get(ROLES_URL).headers["etag"]
+    app.state.role_service.get_roles.reset_mock()
+    
+    response = client.get(ROLES_URL, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    app.state.role_service.get_roles.assert_not_called()
+
+def test_roles_etag_weak_comparison(client):
+    """Test that the validator is matched by weak comparison, in a list, or by *"""
+    etag = client.get(ROLES_URL).headers["etag"]
+    strong = etag.removeprefix("W/")
+    
+    assert client.get(ROLES_URL, headers={"If-None-Match": strong}).status_code == 304
+    assert client.get(ROLES_URL, headers={"If-None-Match": f'"other", {etag}'}).status_code == 304
+    assert client.get(ROLES_URL, headers={"If-None-Match": "*"}).status_code == 304
+    assert client.get(ROLES_URL, headers={"If-None-Match": '"other"'}).status_code == 200
+
+def test_roles_etag_changes_with_version(client):
+    """Test that a role change invalidates validators issued before it"""
+    etag = client.get(ROLES_URL).headers["etag"]
+    app.state.role_service.version += 1
+    
+    response = client.get(ROLES_URL, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+def test_roles_etag_depends_on_normalized_query(client):
+    """Test that the ETag covers the query, regardless of parameter order"""
+    plain = client.get(ROLES_URL).headers["etag"]
+    filtered = client.get(f"{ROLES_URL}?tone=formal&search=cfo").headers["etag"]
+    reordered = client.get(f"{ROLES_URL}?search=cfo&tone=formal").headers["etag"]
+    
+    assert filtered != plain
+    assert filtered == reordered
+
+def test_roles_etag_is_salted_per_process(client, monkeypatch):
+    """Test that a validator issued by another process (different salt) does not match"""
+    etag = client.get(ROLES_URL).headers["etag"]
+    monkeypatch.setattr(role_routes, "_ETAG_SALT", "restarted")
+    
+    response = client.get(ROLES_URL, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "restarted" in response.headers["etag"]
+
+def test_tones_not_modified(client):
+    """Test that the immutable tone list is served with a fixed ETag"""
+    response = client.get(TONES_URL)
+    assert response.status_code == 200
+    assert response.headers["etag"] == role_routes._TONES_ETAG
+    assert "immutable" in response.headers["cache-control"]
+    
+    response = client.get(TONES_URL, headers={"If-None-Match": role_routes._TONES_ETAG})
+    assert response.status_code == 304
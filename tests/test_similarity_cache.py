@@ -0,0 +1,92 @@
+import asyncio
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.models.memory import MemoryCreate
+from app.services.memory_service import MemoryService
+from app.utils.similarity_cache import SimilarityCache
+
+def unit(*values):
+    """Return a normalized float32 vector"""
+    return SimilarityCache.normalize(values)
+
+
+def test_hit_for_similar_vector_in_group():
+    """Test that a close vector in the same group reuses the cached value"""
+    cache = SimilarityCache(capacity=4, threshold=0.95, ttl=60)
+    cache.put("group", unit(1.0, 0.0, 0.0), "answer")
+    
+    assert cache.get("group", unit(1.0, 0.05, 0.0)) == "answer"
+    assert cache.get("group", unit(0.0, 1.0, 0.0)) is None
+    assert cache.get("other", unit(1.0, 0.0, 0.0)) is None
+    assert cache.get("group", unit(1.0, 0.0)) is None
+
+def test_zero_capacity_disables_cache():
+    """Test that a capacity of 0 stores nothing instead of failing"""
+    cache = SimilarityCache(capacity=0, threshold=0.95, ttl=60)
+    cache.put("group", unit(1.0, 0.0), "answer")
+    
+    assert cache.entries == {}
+    assert cache.get("group", unit(1.0, 0.0)) is None
+
+def test_evicts_least_recently_used():
+    """Test that the least recently used entry is evicted once the cache is full"""
+    cache = SimilarityCache(capacity=2, threshold=0.99, ttl=60)
+    cache.put("group", unit(1.0, 0.0, 0.0), "a")
+    cache.put("group", unit(0.0, 1.0, 0.0), "b")
+    assert cache.get("group", unit(1.0, 0.0, 0.0)) == "a"
+    
+    cache.put("group", unit(0.0, 0.0, 1.0), "c")
+    
+    assert cache.get("group", unit(0.0, 1.0, 0.0)) is None
+    assert cache.get("group", unit(1.0, 0.0, 0.0)) == "a"
+    assert cache.get("group", unit(0.0, 0.0, 1.0)) == "c"
+
+def test_expired_entry_is_dropped():
+    """Test that entries older than the TTL miss and are removed"""
+    cache = SimilarityCache(capacity=2, threshold=0.95, ttl=-1)
+    cache.put("group", unit(1.0, 0.0), "answer")
+    
+    assert cache.get("group", unit(1.0, 0.0)) is None
+    assert cache.entries == {}
+    assert cache.groups == {}
+
+def test_discard():
+    """Test dropping the entries a predicate marks as stale"""
+    cache = SimilarityCache(capacity=4, threshold=0.95, ttl=60)
+    cache.put("group", unit(1.0, 0.0), "keep")
+    cache.put("other", unit(1.0, 0.0), "drop")
+    
+    cache.discard(lambda value: value == "drop")
+    
+    assert cache.get("group", unit(1.0, 0.0)) == "keep"
+    assert cache.get("other", unit(1.0, 0.0)) is None
+    assert "other" not in cache.groups
+
+def test_normalize_rejects_zero_vectors():
+    """Test that empty and zero embeddings cannot be used as keys"""
+    assert SimilarityCache.normalize([]) is None
+    assert SimilarityCache.normalize([0.0, 0.0]) is None
+    np.testing.assert_allclose(SimilarityCache.normalize([3.0, 4.0]), [0.6, 0.8])
+
+@pytest.mark.parametrize("cache_size", [0, 1, 16])
+def test_memory_search_cache_sizes(monkeypatch, cache_size):
+    """Test memory search with the search cache disabled or small, including invalidation on store"""
+    monkeypatch.setattr(settings, "search_cache_size", cache_size)
+    memory_service = MemoryService()
+    embedding = [0.3, 0.1, 0.9]
+    
+    async def run():
+        await memory_service.store_memory(MemoryCreate(role_id="cfo-advisor", content="First", type="session"), embedding)
+        first = await memory_service.get_relevant_memories("cfo-advisor", "query", embedding)
+        repeated = await memory_service.get_relevant_memories("cfo-advisor", "query", embedding)
+        await memory_service.store_memory(MemoryCreate(role_id="cfo-advisor", content="Second", type="session"), embedding)
+        after_store = await memory_service.get_relevant_memories("cfo-advisor", "query", embedding)
+        return first, repeated, after_store
+    
+    first, repeated, after_store = asyncio.run(run())
+    assert [memory.content for memory in first] == ["First"]
+    assert [memory.content for memory in repeated] == ["First"]
+    assert sorted(memory.content for memory in after_store) == ["First", "Second"]
+    assert len(memory_service.search_cache.entries) <= cache_size
@@ -0,0 +1,107 @@
+import asyncio
+import pytest
+
+from app.main import app
+from app.config import settings
+from app.utils.sse import SSE_KEEPALIVE, coalesce_frames, sse_frame
+
+async def timed_frames(events):
+    """Yield frames after the given delays
+    
+    Args:
+        events: (delay in seconds, frame) pairs
+    """
+    for delay, frame in events:
+        if delay:
+            await asyncio.sleep(delay)
+        yield frame
+
+async def collect(frames):
+    """Collect every write produced by an async generator"""
+    return [write async for write in frames]
+
+
+def test_sse_frame():
+    """Test framing a text chunk as a server-sent event"""
+    assert sse_frame("héllo") == "data: héllo\n\n".encode()
+
+@pytest.mark.asyncio
+async def test_burst_is_coalesced():
+    """Test that frames arriving together are sent as one write"""
+    frames = [sse_frame(token) for token in ("Hel", "lo", " world")]
+    writes = await collect(coalesce_frames(timed_frames([(0, frame) for frame in frames]), max_delay=1.0))
+    assert writes == [b"".join(frames)]
+
+@pytest.mark.asyncio
+async def test_flush_at_max_bytes():
+    """Test that the buffer is flushed as soon as it reaches max_bytes"""
+    frames = [b"x" * 10 for _ in range(5)]
+    writes = await collect(coalesce_frames(timed_frames([(0, frame) for frame in frames]), max_bytes=20, max_delay=1.0))
+    assert writes == [b"x" * 20, b"x" * 20, b"x" * 10]
+
+@pytest.mark.asyncio
+async def test_pause_flushes_after_max_delay():
+    """Test that a pause in the source never holds back buffered text longer than max_delay"""
+    loop = asyncio.get_running_loop()
+    source = timed_frames([(0, b"a"), (0, b"b"), (0.2, b"c")])
+    started = loop.time()
+    writes = []
+    times = []
+    async for write in coalesce_frames(source, max_delay=0.02, keepalive=None):
+        writes.append(write)
+        times.append(loop.time() - started)
+    
+    assert writes == [b"ab", b"c"]
+    # The first write goes out after max_delay, well before the next frame arrives
+    assert times[0] < 0.15
+
+@pytest.mark.asyncio
+async def test_keepalive_when_idle():
+    """Test that an idle stream gets keep-alive comments between frames"""
+    source = timed_frames([(0.15, b"data: late\n\n")])
+    writes = await collect(coalesce_frames(source, max_delay=0.01, keepalive=0.05))
+    assert writes[-1] == b"data: late\n\n"
+    assert len(writes) >= 2
+    assert all(write == SSE_KEEPALIVE for write in writes[:-1])
+
+@pytest.mark.asyncio
+async def test_no_keepalive_when_disabled():
+    """Test that keepalive=None sends only the frames"""
+    source = timed_frames([(0.1, b"data: late\n\n")])
+    writes = await collect(coalesce_frames(source, max_delay=0.01, keepalive=None))
+    assert writes == [b"data: late\n\n"]
+
+@pytest.mark.asyncio
+async def test_closing_stops_the_source():
+    """Test that closing the output (client disconnect) closes the source stream"""
+    closed = asyncio.Event()
+    
+    async def endless():
+        try:
+            while True:
+                yield b"data: token\n\n"
+                await asyncio.sleep(0)
+        finally:
+            closed.set()
+    
+    frames = coalesce_frames(endless(), max_bytes=1)
+    assert await frames.__anext__() == b"data: token\n\n"
+    await frames.aclose()
+    await asyncio.sleep(0)
+    assert closed.is_set()
+
+def test_event_stream_is_not_compressed(client):
+    """Test that gzip leaves event streams alone even when they are large"""
+    async def tokens(*args, **kwargs):
+        for _ in range(200):
+            yield "token "
+    
+    app.state.role_service.process_query_stream = tokens
+    response = client.post(
+        f"{settings.api_prefix}/roles/process/stream",
+        json={"role_id": "cfo-advisor", "query": "Hello"},
+        headers={"Accept-Encoding": "gzip"}
+    )
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "content-encoding" not in response.headers
+    assert len(response.content) > settings.gzip_minimum_size
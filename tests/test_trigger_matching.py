@@ -0,0 +1,104 @@
+import asyncio
+import re
+import pytest
+
+from app.models.role import Role
+from app.services import trigger_service as trigger_module
+from app.services.trigger_service import TriggerService
+
+# Queries around word boundaries: punctuation, underscores, digits, phrases and substrings
+QUERIES = [
+    "What is our ROI this quarter?",
+    "roi",
+    "heroic efforts",
+    "Check the balance sheet, then the income statement.",
+    "balance sheets are due",
+    "the stock_market crashed",
+    "stock-market news",
+    "market2 is not a word boundary",
+    "art, artist and artisan",
+    "An app for applications",
+    "The CFO Advisor said so",
+    "Ask the cfo advisors",
+    "nothing relevant here",
+    "",
+    "law-abiding lawyers read the law.",
+]
+
+ROLES = [
+    Role(
+        id="cfo-advisor", name="CFO Advisor", description="Finance", instructions="Advise on finance",
+        domains=["finance"], tone="professional", system_prompt="You are a CFO advisor."
+    ),
+    Role(
+        id="tech-lead", name="Tech Lead", description="Technology", instructions="Advise on technology",
+        domains=["technology", "creative"], tone="technical", system_prompt="You are a tech lead."
+    ),
+    Role(
+        id="counsel", name="Counsel", description="Legal", instructions="Advise on law",
+        domains=["legal"], tone="formal", system_prompt="You are a lawyer."
+    ),
+]
+
+async def build_service() -> TriggerService:
+    """Create a trigger service with triggers registered for a few roles"""
+    service = TriggerService()
+    for role in ROLES:
+        await service.register_role_triggers(role)
+    await service.add_custom_trigger("tech-lead", r"deploy(ment)?s?")
+    return service
+
+@pytest.fixture
+def service():
+    """A trigger service with triggers registered for a few roles"""
+    return asyncio.run(build_service())
+
+def regex_matches(service: TriggerService, query: str):
+    """Match every trigger against its precompiled pattern, like the code before the automaton"""
+    query_lower = query.lower()
+    return {
+        role_id: {trigger.id for trigger in triggers if trigger.enabled and trigger.matches(query_lower)}
+        for role_id, triggers in service.role_triggers.items()
+    }
+
+def automaton_matches(service: TriggerService, query: str):
+    """Match triggers through the service's keyword index"""
+    matched = service._match_triggers(query.lower())
+    return {role_id: set(matched.get(role_id, {})) for role_id in service.role_triggers}
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_keyword_index_matches_regex(service, query):
+    """Test that the keyword automaton finds exactly the triggers the whole-word regexes find"""
+    pytest.importorskip("ahocorasick")
+    assert service._automaton is not None
+    assert automaton_matches(service, query) == regex_matches(service, query)
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_fallback_matches_regex(service, query, monkeypatch):
+    """Test that matching without pyahocorasick checks every pattern"""
+    monkeypatch.setattr(trigger_module, "AHOCORASICK_AVAILABLE", False)
+    service._rebuild_index()
+    assert service._automaton is None
+    assert automaton_matches(service, query) == regex_matches(service, query)
+
+def test_word_boundary_mirrors_regex():
+    """Test that _is_word_boundary agrees with re's \\b at every position"""
+    text = "a_b c-d 9x, é!"
+    for index in range(len(text) + 1):
+        expected = re.compile(r"\b").match(text, index) is not None
+        assert trigger_module._is_word_boundary(text, index) == expected, index
+
+@pytest.mark.asyncio
+async def test_detect_triggers_scores(service):
+    """Test scoring of matched roles"""
+    matches = await service.detect_triggers("The CFO advisor reviewed the budget and ROI")
+    # Both finance triggers (priority 1), the name trigger (priority 2), and two distinct priorities
+    assert matches[0] == ("cfo-advisor", 1 + 1 + 2 + 2 * 2)
+
+@pytest.mark.asyncio
+async def test_disabled_trigger_is_ignored(service):
+    """Test that disabled keyword triggers do not match"""
+    for trigger in service.role_triggers["counsel"]:
+        trigger.enabled = False
+    assert await service.detect_triggers("read the law") == []